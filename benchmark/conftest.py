@@ -0,0 +1,65 @@
+from danoan.perchance_tools.core import backend, cache
+
+import io
+import pytest
+import tracemalloc
+
+import synthetic
+
+SIZES = {
+    "small": synthetic.ThesaurusSpec(depth=2, fan_out=5, words_per_leaf=20),
+    "medium": synthetic.ThesaurusSpec(depth=3, fan_out=8, words_per_leaf=40),
+    "large": synthetic.ThesaurusSpec(depth=4, fan_out=8, words_per_leaf=40),
+}
+
+
+@pytest.fixture(params=list(SIZES))
+def spec(request) -> synthetic.ThesaurusSpec:
+    return SIZES[request.param]
+
+
+@pytest.fixture
+def markdown_text(spec) -> str:
+    output_stream = io.StringIO()
+    synthetic.write_markdown(spec, output_stream)
+    return output_stream.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def no_response_cache():
+    # Every benchmark round sends the same prompts. The cache would hide
+    # the cost of the prompts after the first round.
+    cache.set_cache(None)
+    yield
+    cache.set_cache(None)
+
+
+@pytest.fixture
+def stub_llm():
+    """
+    Answer the LLM prompts locally without corrections.
+    """
+    backend.set_backend(backend.StubBackend())
+    yield
+    backend.set_backend(None)
+
+
+@pytest.fixture
+def record_peak_memory(benchmark):
+    """
+    Run a function once under tracemalloc and record its peak memory.
+
+    The measure is taken outside of the timed rounds because tracemalloc
+    slows down the execution.
+    """
+
+    def _record(func, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info["peak_memory_mb"] = round(peak / 1024 / 1024, 3)
+
+    return _record
@@ -0,0 +1,133 @@
+"""
+Generator of synthetic thesauri for the benchmarks.
+
+    python benchmark/synthetic.py --depth 3 --fan-out 8 --words-per-leaf 40 > big.md
+"""
+
+import argparse
+from dataclasses import dataclass
+import random
+import sys
+from typing import Any, Dict, Iterator, List, TextIO
+
+ASCII_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+UNICODE_ALPHABETS = [
+    "àâäçéèêëîïôœùûüÿ" + ASCII_LETTERS,
+    "абвгдежзийклмнопрстуфхцчшщыэюя",
+    "αβγδεζηθικλμνξοπρστυφχψω",
+    "日本語漢字辞書言葉単語分類",
+    "😀🐱🌍🍎🚀",
+]
+
+
+@dataclass
+class ThesaurusSpec:
+    """
+    Shape of a synthetic thesaurus.
+
+    The thesaurus has `fan_out ** depth` leaf categories with
+    `words_per_leaf` words each. A fraction `unicode_ratio` of the words
+    use non ascii alphabets.
+    """
+
+    depth: int = 3
+    fan_out: int = 4
+    words_per_leaf: int = 20
+    unicode_ratio: float = 0.3
+    seed: int = 0
+
+    @property
+    def num_leaves(self) -> int:
+        return self.fan_out**self.depth
+
+    @property
+    def num_words(self) -> int:
+        return self.num_leaves * self.words_per_leaf
+
+
+def _make_word(rng: random.Random, unicode_ratio: float) -> str:
+    if rng.random() < unicode_ratio:
+        alphabet = rng.choice(UNICODE_ALPHABETS)
+    else:
+        alphabet = ASCII_LETTERS
+    length = rng.randint(3, 10)
+    word = "".join(rng.choice(alphabet) for _ in range(length))
+    if rng.random() < 0.1:
+        # Some entries are expressions of two words.
+        word += " " + "".join(rng.choice(alphabet) for _ in range(length))
+    return word
+
+
+def _make_words(rng: random.Random, spec: ThesaurusSpec) -> List[str]:
+    words: Dict[str, None] = {}
+    while len(words) < spec.words_per_leaf:
+        words[_make_word(rng, spec.unicode_ratio)] = None
+    return list(words)
+
+
+def iterate_sections(spec: ThesaurusSpec) -> Iterator[tuple]:
+    """
+    Yield (level, title, words) for each header in depth-first order.
+
+    Categories have empty word lists, leaves have `words_per_leaf` words.
+    """
+    rng = random.Random(spec.seed)
+    stack = [(1, f"Category {i}") for i in reversed(range(spec.fan_out))]
+    while stack:
+        level, title = stack.pop()
+        if level == spec.depth:
+            yield level, title, _make_words(rng, spec)
+        else:
+            yield level, title, []
+            stack.extend(
+                (level + 1, f"{title}.{i}") for i in reversed(range(spec.fan_out))
+            )
+
+
+def write_markdown(spec: ThesaurusSpec, output_stream: TextIO):
+    for level, title, words in iterate_sections(spec):
+        output_stream.write(f"{'#' * level} {title}\n\n")
+        for word in words:
+            output_stream.write(f"{word}\n")
+        if words:
+            output_stream.write("\n")
+
+
+def make_dict(spec: ThesaurusSpec) -> Dict[str, Any]:
+    """
+    Return the thesaurus as the dictionary of a WordDict.
+    """
+    root: Dict[str, Any] = {}
+    stack = [root]
+    for level, title, words in iterate_sections(spec):
+        del stack[level:]
+        if words:
+            stack[-1][title] = {"words": sorted(words)}
+        else:
+            node: Dict[str, Any] = {}
+            stack[-1][title] = node
+            stack.append(node)
+    return {"root": root}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Write a synthetic markdown thesaurus."
+    )
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fan-out", type=int, default=4)
+    parser.add_argument("--words-per-leaf", type=int, default=20)
+    parser.add_argument("--unicode-ratio", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    write_markdown(
+        ThesaurusSpec(
+            args.depth, args.fan_out, args.words_per_leaf, args.unicode_ratio, args.seed
+        ),
+        sys.stdout,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+from danoan.perchance_tools.commands import (
+    convert_to_perchance_format,
+    correct_words,
+    markdown_to_yml,
+)
+from danoan.perchance_tools.core import (
+    api,
+    model,
+    perchance,
+    pipeline,
+    replace,
+    snapshot,
+    utils,
+)
+
+import copy
+import io
+import json
+import pycountry
+import pytest
+import time
+
+import synthetic
+
+
+@pytest.fixture
+def word_dict_data(spec):
+    return synthetic.make_dict(spec)
+
+
+@pytest.fixture(autouse=True)
+def spec_info(benchmark, spec):
+    benchmark.extra_info["leaves"] = spec.num_leaves
+    benchmark.extra_info["words"] = spec.num_words
+
+
+class _FirstWriteStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.start = time.perf_counter()
+        self.first_write = None
+
+    def write(self, s):
+        if self.first_write is None:
+            self.first_write = time.perf_counter() - self.start
+        return super().write(s)
+
+
+# -------------------- Core functions --------------------
+
+
+def test_create_dict_from_markdown(benchmark, record_peak_memory, markdown_text):
+    def _run():
+        return api.create_dict_from_markdown(io.StringIO(markdown_text))
+
+    record_peak_memory(_run)
+    benchmark(_run)
+
+
+def test_write_yml_from_markdown(benchmark, record_peak_memory, markdown_text):
+    def _run():
+        api.write_yml_from_markdown(io.StringIO(markdown_text), io.StringIO())
+
+    record_peak_memory(_run)
+    benchmark(_run)
+
+
+def test_collect_key_path(benchmark, record_peak_memory, word_dict_data):
+    def _run():
+        # A new WordDict, such that the key path index is built every round.
+        word_dict = model.WordDict(word_dict_data)
+        for _ in utils.collect_key_path(word_dict, "words"):
+            pass
+
+    record_peak_memory(_run)
+    benchmark(_run)
+
+
+def test_replace_words(benchmark, record_peak_memory, word_dict_data):
+    instructions = [
+        model.ReplaceInstructions(list(path), [(words[0], words[0] + "x")])
+        for path, words in model.WordDict(word_dict_data).iter_key_paths()
+    ]
+
+    def _setup():
+        return (model.WordDict(copy.deepcopy(word_dict_data)), instructions), {}
+
+    record_peak_memory(api.replace_words, *_setup()[0])
+    benchmark.pedantic(api.replace_words, setup=_setup, rounds=5)
+
+
+def test_bulk_replace(benchmark, record_peak_memory, word_dict_data):
+    # One instruction per word, one category per line.
+    jsonl_text = "".join(
+        json.dumps({"key": list(path), "replace_pairs": [[x, x + "x"] for x in words]})
+        + "\n"
+        for path, words in model.WordDict(word_dict_data).iter_key_paths()
+    )
+
+    def _setup():
+        return (model.WordDict(copy.deepcopy(word_dict_data)),), {}
+
+    def _run(word_dict):
+        bulk_replace = replace.BulkReplace().read(io.StringIO(jsonl_text))
+        return bulk_replace.apply(word_dict)
+
+    benchmark.extra_info["instructions"] = _run(*_setup()[0]).instructions
+    record_peak_memory(_run, *_setup()[0])
+    benchmark.pedantic(_run, setup=_setup, rounds=5)
+
+
+def test_print_perchance_dict(benchmark, record_peak_memory, word_dict_data):
+    key_paths = list(utils.collect_key_path(model.WordDict(word_dict_data), "words"))
+    d = perchance.key_paths_to_dict(key_paths)
+
+    record_peak_memory(perchance.print_perchance_dict, d)
+    benchmark(perchance.print_perchance_dict, d)
+
+
+@pytest.mark.parametrize("file_format", ["yml", "snapshot"])
+def test_load_word_dict(
+    benchmark, record_peak_memory, word_dict_data, tmp_path, file_format
+):
+    filepath = tmp_path / f"thesaurus.{file_format}"
+    if file_format == "yml":
+        with open(filepath, "w") as f:
+            utils.dump_yml(word_dict_data, f)
+    else:
+        with open(filepath, "wb") as f:
+            snapshot.dump(model.WordDict(word_dict_data), f)
+
+    record_peak_memory(utils.load_word_dict, filepath)
+    benchmark(utils.load_word_dict, filepath)
+
+
+# -------------------- Commands --------------------
+
+
+def test_command_markdown_to_yml(
+    benchmark, record_peak_memory, markdown_text, tmp_path
+):
+    markdown_filepath = tmp_path / "thesaurus.md"
+    markdown_filepath.write_text(markdown_text)
+    yml_filepath = tmp_path / "thesaurus.yml"
+
+    def _run():
+        markdown_to_yml.__markdown_to_yml__(
+            [str(markdown_filepath)], output_filepath=str(yml_filepath)
+        )
+
+    record_peak_memory(_run)
+    benchmark(_run)
+
+
+@pytest.mark.parametrize("jobs,batch_words", [(1, 0), (8, 0), (1, 400)])
+def test_command_correct_words(
+    benchmark, record_peak_memory, stub_llm, word_dict_data, jobs, batch_words
+):
+    language = pycountry.languages.get(name="French")
+
+    def _setup():
+        return (model.WordDict(copy.deepcopy(word_dict_data)),), {}
+
+    def _run(word_dict):
+        corrected = correct_words.correct_word_dict(
+            word_dict, language, jobs, batch_words
+        )
+        utils.dump_yml(corrected.extract(), io.StringIO())
+
+    record_peak_memory(_run, *_setup()[0])
+    benchmark.pedantic(_run, setup=_setup, rounds=3)
+
+
+def test_command_convert_to_perchance_format(
+    benchmark, record_peak_memory, stub_llm, word_dict_data
+):
+    word_dict = model.WordDict(word_dict_data)
+
+    def _run():
+        convert_to_perchance_format.convert_word_dict(word_dict, io.StringIO())
+
+    output_stream = _FirstWriteStream()
+    convert_to_perchance_format.convert_word_dict(word_dict, output_stream)
+    benchmark.extra_info["first_write_seconds"] = round(output_stream.first_write, 4)
+
+    record_peak_memory(_run)
+    benchmark.pedantic(_run, rounds=3)
+
+
+def test_command_pipeline(benchmark, record_peak_memory, stub_llm, markdown_text):
+    language = pycountry.languages.get(name="French")
+
+    def _run():
+        pipeline.run(io.StringIO(markdown_text), io.StringIO(), language)
+
+    record_peak_memory(_run)
+    benchmark.pedantic(_run, rounds=3)
@@ -0,0 +1,68 @@
+from danoan.perchance_tools.core import model, utils
+
+import json
+import pytest
+import subprocess
+import sys
+
+import synthetic
+
+# Run the command line and print the modules it imported.
+SCRIPT = """
+import json
+import sys
+from danoan.perchance_tools import cli
+
+sys.argv = ["perchance-tools"] + sys.argv[1:]
+try:
+    cli.main()
+except SystemExit:
+    pass
+print(json.dumps(sorted(sys.modules)), file=sys.stderr)
+"""
+
+# Dependencies of the commands that call the LLM.
+HEAVY_MODULES = [
+    "danoan.llm_assistant",
+    "danoan.perchance_tools.core.api",
+    "jinja2",
+    "pycountry",
+]
+
+
+def _run_cli(*args: str) -> list:
+    completed = subprocess.run(
+        [sys.executable, "-c", SCRIPT, *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stderr.splitlines()[-1])
+
+
+@pytest.fixture
+def yml_filepath(tmp_path):
+    filepath = tmp_path / "thesaurus.yml"
+    spec = synthetic.ThesaurusSpec(depth=2, fan_out=2, words_per_leaf=2)
+    with open(filepath, "w") as f:
+        utils.dump_yml(model.WordDict(synthetic.make_dict(spec)).extract(), f)
+    return filepath
+
+
+@pytest.mark.parametrize("command", ["--help", "list-categories", "cache"])
+def test_startup(benchmark, command, yml_filepath, tmp_path):
+    if command == "list-categories":
+        args = [command, str(yml_filepath)]
+        forbidden = HEAVY_MODULES
+    elif command == "cache":
+        args = [command, "--cache-path", str(tmp_path / "cache.sqlite3"), "stats"]
+        forbidden = HEAVY_MODULES + ["yaml"]
+    else:
+        args = [command]
+        forbidden = HEAVY_MODULES + ["yaml"]
+
+    modules = benchmark.pedantic(_run_cli, args=args, rounds=5)
+
+    # Commands import only the dependencies they need.
+    assert [x for x in forbidden if x in modules] == []
@@ -0,0 +1,33 @@
+Instructions
+
+You are a fluent speaker of the {language} language and your task is to correct eventual
+typos and spelling errors in several lists of words.
+
+You are provided with a numbered list of sections. Each section has a list of categories and a
+list of words. The list of categories denotes the context which the list of words of that
+section belong to.
+
+For each section, you should output a list that contains the corrections to be done. Each item
+in the list is a list itself composed of two elements. The first element is the word as it was
+provided; and the second element is the correctly spelled version of the same word.
+
+Your answer must be a single json object. Each key is a section number and its value is the list
+of corrections of that section. Every section number must be present in the answer. If there are
+no errors in the list of words of a section, its value is an empty list.
+
+    {{
+    "0": [],
+    "1": [["entre deux ages", "entre deux âges"]]
+    }}
+
+Only output words which contain typos, spelling and accentuation errors.
+
+Do not replace a word by another, even if there is a word that sounds more natural and more common than
+the original word, always prefer the original word.
+
+-----
+
+Below there is a list containing full examples for the task. Each example contains a single
+section and the list of corrections of that section.
+
+{full_examples}
@@ -0,0 +1,19 @@
+{% for section in sections -%}
+# Section {{loop.index0}}
+
+## Words context
+
+{% for category in section.categories -%}
+{{category}}
+{% endfor -%}
+-----
+
+## Words to evaluate
+
+{% for word in section.words -%}
+{{word}}
+{% endfor -%}
+-----
+
+{% endfor -%}
+# Output
@@ -0,0 +1,5 @@
+input: (From {{from_language_name}} to {{to_language_name}})
+{% for word in words -%}
+<<{{word}}>>
+{% endfor %}
+answer:
@@ -1,12 +1,84 @@
-from danoan.perchance_tools.commands import (
-    convert_to_perchance_format,
-    correct_words,
-    list_categories,
-    markdown_to_yml,
+from danoan.perchance_tools.core import (
+    backend,
+    dispatch,
+    log,
+    metrics,
+    profiling,
+    prompts,
 )
 
 import argparse
+import cProfile
+import importlib
+import json
+from pathlib import Path
+import sys
 from textwrap import dedent
+import tracemalloc
+from typing import List
+
+
+# Command modules and their dependencies are imported only when the command
+# runs. Their help is listed here such that `--help` does not import them.
+COMMANDS = {
+    "markdown-to-yml": ("markdown_to_yml", "Convert markdown categorized file to yml"),
+    "correct-words": ("correct_words", "Correct the words of a yml list of words"),
+    "find-corrections": (
+        "find_corrections",
+        "Find the corrections of the words of yml files and write them in JSONL",
+    ),
+    "apply-corrections": (
+        "apply_corrections",
+        "Apply a JSONL file of corrections to yml files without the LLM",
+    ),
+    "convert-to-perchance-format": (
+        "convert_to_perchance_format",
+        "Convert one or more yml files containing a list of words in a perchance data structure",
+    ),
+    "list-categories": ("list_categories", "List the categories of a list of words"),
+    "cache": ("cache", "Manage the persistent cache of LLM responses"),
+    "yml-to-snapshot": (
+        "yml_to_snapshot",
+        "Convert a yml file list of words to a WordDict snapshot",
+    ),
+    "build": (
+        "build",
+        "Build the yml, corrected yml and perchance files of a folder of markdown files",
+    ),
+    "pipeline": (
+        "pipeline",
+        "Convert markdown files to the perchance format in a single process",
+    ),
+    "serve": (
+        "serve",
+        "Serve the conversion, correction and translation of words over HTTP",
+    ),
+    "client": (
+        "client",
+        "Send the content of a file to a perchance-tools server and print the response",
+    ),
+}
+
+
+def _parse_command_args(command_name: str, command_args: List[str]):
+    module_name, _ = COMMANDS[command_name]
+    command = importlib.import_module(f"danoan.perchance_tools.commands.{module_name}")
+
+    parser = argparse.ArgumentParser("perchance-tools")
+    command.extend_parser(parser.add_subparsers())
+    return parser.parse_args([command_name, *command_args])
+
+
+def _make_backend(name: str, args) -> backend.LLMBackend:
+    if name == "stub":
+        return backend.StubBackend(args.backend_latency)
+    elif name == "record":
+        return backend.RecordReplayBackend(
+            Path(args.recording), "record", backend.LLMAssistantBackend()
+        )
+    elif name == "replay":
+        return backend.RecordReplayBackend(Path(args.recording), "replay")
+    return backend.LLMAssistantBackend()
 
 
 def main():
@@ -29,24 +101,148 @@ def main():
         description=description,
         formatter_class=argparse.RawTextHelpFormatter,
     )
-    subparser_action = parser.add_subparsers()
-
-    list_of_commands = [
-        markdown_to_yml,
-        correct_words,
-        convert_to_perchance_format,
-        list_categories,
-    ]
-    for command in list_of_commands:
-        command.extend_parser(subparser_action)
-
-    args = parser.parse_args()
-    if "func" in args:
-        args.func(**vars(args))
-    elif "subcommand_help" in args:
-        args.subcommand_help()
-    else:
+    parser.add_argument(
+        "--prompts-dir",
+        help="Folder with prompts that replace the ones distributed with the package.",
+    )
+    parser.add_argument(
+        "--requests-per-minute",
+        type=float,
+        help="Maximum number of LLM requests per minute.",
+    )
+    parser.add_argument(
+        "--tokens-per-minute",
+        type=float,
+        help="Maximum number of estimated LLM tokens per minute.",
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        help="Maximum number of concurrent LLM requests.",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=5,
+        help="Number of retries of an LLM request after a transient error.",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["llm-assistant", "stub", "record", "replay"],
+        default="llm-assistant",
+        help=dedent(
+            """
+        Service answering the LLM prompts.
+        llm-assistant: the provider configured with llm-assistant setup.
+        stub: local answers without corrections, words translate to themselves.
+        record: llm-assistant, saving the responses to the --recording file.
+        replay: the responses saved in the --recording file.
+        """
+        ),
+    )
+    parser.add_argument(
+        "--backend-latency",
+        type=float,
+        default=0.0,
+        help="Seconds the stub backend waits before answering a prompt.",
+    )
+    parser.add_argument(
+        "--recording",
+        metavar="FILE",
+        help="JSONL file of the LLM responses of the record and replay backends.",
+    )
+    parser.add_argument(
+        "--correct-words-model",
+        help="Model used to correct words. Default: gpt-4o.",
+    )
+    parser.add_argument(
+        "--translate-model",
+        help="Model used to translate words. Default: gpt-3.5-turbo.",
+    )
+    parser.add_argument(
+        "--stats",
+        dest="stats_filepath",
+        help="Write a json report of the LLM calls, cache hits and costs to this file.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the time spent in each stage of the pipeline at exit.",
+    )
+    parser.add_argument(
+        "--profile-cprofile",
+        metavar="FILE",
+        help="Write the cProfile statistics of the command to this file.",
+    )
+    parser.add_argument(
+        "--profile-tracemalloc",
+        metavar="FILE",
+        help="Write a tracemalloc snapshot taken at the end of the command to this file.",
+    )
+    subparser_action = parser.add_subparsers(dest="command_name")
+    for command_name, (_, help) in COMMANDS.items():
+        # The arguments of the command are parsed once its module is imported.
+        subparser_action.add_parser(command_name, help=help, add_help=False)
+
+    args, command_args = parser.parse_known_args()
+    if args.command_name is None:
+        if command_args:
+            parser.error(f"unrecognized arguments: {' '.join(command_args)}")
         parser.print_help()
+        return
+    if args.backend in ["record", "replay"] and not args.recording:
+        parser.error(f"The {args.backend} backend needs a --recording file.")
+
+    args = argparse.Namespace(
+        **{**vars(args), **vars(_parse_command_args(args.command_name, command_args))}
+    )
+
+    log.configure()
+    if args.prompts_dir:
+        prompts.set_override_directory(Path(args.prompts_dir))
+    backend.set_backend(_make_backend(args.backend, args))
+    if args.correct_words_model or args.translate_model:
+        from danoan.perchance_tools.core import api
+
+        api.set_models(args.correct_words_model, args.translate_model)
+    dispatch.set_dispatcher(
+        dispatch.Dispatcher(
+            dispatch.DispatcherSettings(
+                args.requests_per_minute,
+                args.tokens_per_minute,
+                args.max_concurrency,
+                args.max_retries,
+            )
+        )
+    )
+
+    profiler = profiling.enable() if args.profile else None
+    c_profile = cProfile.Profile() if args.profile_cprofile else None
+    if args.profile_tracemalloc:
+        tracemalloc.start()
+    if c_profile:
+        c_profile.enable()
+
+    try:
+        if "func" in args:
+            args.func(**vars(args))
+        elif "subcommand_help" in args:
+            args.subcommand_help()
+    finally:
+        # Reports are also written when the command exits with an error.
+        if c_profile:
+            c_profile.disable()
+            c_profile.dump_stats(args.profile_cprofile)
+        if args.profile_tracemalloc:
+            tracemalloc.take_snapshot().dump(args.profile_tracemalloc)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"peak traced memory: {peak / 1024 / 1024:.1f} MB", file=sys.stderr)
+        if profiler:
+            print(profiler.format(), file=sys.stderr)
+        if args.stats_filepath:
+            with open(args.stats_filepath, "w") as f:
+                json.dump(metrics.get_metrics().report(), f, indent=2)
 
 
 if __name__ == "__main__":
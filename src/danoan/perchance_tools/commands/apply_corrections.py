@@ -0,0 +1,143 @@
+from danoan.perchance_tools.core import batch, model, replace, utils
+
+import argparse
+import functools
+import logging
+from pathlib import Path
+import sys
+from typing import List, Optional, TextIO
+
+LOG_LEVEL = logging.INFO
+
+logger = logging.getLogger(__name__)
+logger.setLevel(LOG_LEVEL)
+
+
+def apply_corrections(
+    word_dict: model.WordDict,
+    corrections_stream: TextIO,
+    source: Optional[str] = None,
+) -> replace.ReplaceReport:
+    """
+    Apply the JSONL corrections of `find-corrections` to a WordDict.
+
+    If `source` is given, only the corrections found in the file with this
+    name are applied.
+    """
+    return replace.BulkReplace().read(corrections_stream, source).apply(word_dict)
+
+
+def _apply_corrections_file(
+    corrections_filepath: str,
+    compact: bool,
+    yml_filepath: str,
+    output_stream: TextIO,
+):
+    word_dict = utils.load_word_dict(Path(yml_filepath), compact)
+    with open(corrections_filepath, "r", encoding="utf-8") as f:
+        report = apply_corrections(word_dict, f, Path(yml_filepath).name)
+
+    for issue in report.issues:
+        logger.warning(f"{yml_filepath}: Correction not applied: {issue}")
+    logger.info(
+        f"{yml_filepath}: {report.replaced} words replaced in {report.leaves} categories"
+    )
+    utils.dump_word_dict(word_dict, output_stream)
+
+
+def __apply_corrections__(
+    corrections_filepath: str,
+    list_yml_filepath: List[str],
+    compact: bool = False,
+    file_jobs: int = 1,
+    output_dir: Optional[str] = None,
+    *args,
+    **kwargs,
+):
+    """
+    Apply a JSONL file of corrections to yml files without the LLM.
+
+    The corrections are created with `find-corrections`. Each file gets the
+    corrections found in the file with the same name. Corrections of missing
+    categories or words are reported and skipped.
+    """
+    if not Path(corrections_filepath).exists():
+        logger.error(f"Corrections file {corrections_filepath} not found")
+        exit(1)
+
+    results = batch.run(
+        functools.partial(_apply_corrections_file, corrections_filepath, compact),
+        list_yml_filepath,
+        sys.stdout,
+        file_jobs,
+        Path(output_dir) if output_dir else None,
+        ".yml",
+    )
+    if any(x.error for x in results):
+        exit(1)
+
+
+def extend_parser(subparser_action=None):
+    command_name = "apply-corrections"
+    description = __apply_corrections__.__doc__
+    help = description.strip().split(".")[0] if description else ""
+
+    if subparser_action:
+        parser = subparser_action.add_parser(
+            command_name,
+            help=help,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+    else:
+        parser = argparse.ArgumentParser(
+            command_name,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+
+    parser.add_argument(
+        "corrections_filepath",
+        metavar="corrections_filepath",
+        help="JSONL file created by find-corrections.",
+    )
+    parser.add_argument(
+        "list_yml_filepath",
+        metavar="yml_filepath",
+        nargs="+",
+        help="One or more path to yml file list of words or WordDict snapshot.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Store the list of words in a memory efficient structure.",
+    )
+    parser.add_argument(
+        "--file-jobs",
+        type=int,
+        default=1,
+        help="Number of processes correcting input files in parallel.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="Write the corrected yml of each input file to its own file in this folder.",
+    )
+    parser.set_defaults(func=__apply_corrections__, subcommand_help=parser.print_help)
+
+    return parser
+
+
+def main():
+    parser = extend_parser()
+    args = parser.parse_args()
+
+    if "func" in args:
+        args.func(**vars(args))
+    elif "subcommand_help" in args:
+        args.subcommand_help()
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
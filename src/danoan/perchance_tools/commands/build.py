@@ -0,0 +1,292 @@
+from danoan.perchance_tools.commands import (
+    convert_to_perchance_format,
+    correct_words,
+    markdown_to_yml,
+)
+from danoan.perchance_tools.core import backend, cache, checkpoint, manifest, utils
+
+import argparse
+import logging
+import os
+from pathlib import Path
+import pycountry
+from typing import Callable, List, Optional, TextIO
+
+LOG_LEVEL = logging.INFO
+
+logger = logging.getLogger(__name__)
+logger.setLevel(LOG_LEVEL)
+
+JOURNAL_FILENAME = "corrections.jsonl"
+
+
+def get_journal_filename(backend_name: str) -> str:
+    """
+    Return the name of the corrections journal of a backend.
+
+    >>> get_journal_filename("")
+    'corrections.jsonl'
+    >>> get_journal_filename("stub")
+    'corrections.stub.jsonl'
+    """
+    if not backend_name:
+        return JOURNAL_FILENAME
+    return JOURNAL_FILENAME.replace(".jsonl", f".{backend_name}.jsonl")
+
+
+def _write_output(filepath: Path, write: Callable[[TextIO], None]) -> str:
+    # Outputs are replaced atomically such that an interrupted build never
+    # leaves a truncated output behind.
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    temporary_filepath = filepath.with_name(f".{filepath.name}.tmp")
+    with open(temporary_filepath, "w") as f:
+        write(f)
+    os.replace(temporary_filepath, filepath)
+    return manifest.hash_file(filepath)
+
+
+def _is_up_to_date(filepath: Path, recorded_hash: Optional[str]) -> bool:
+    return (
+        recorded_hash is not None
+        and filepath.exists()
+        and manifest.hash_file(filepath) == recorded_hash
+    )
+
+
+def _get_output_filepaths(out_dir: Path, relative_path: str) -> List[Path]:
+    path = Path(relative_path)
+    return [
+        out_dir / "yml" / path.with_suffix(".yml"),
+        out_dir / "corrected" / path.with_suffix(".yml"),
+        out_dir / "perchance" / path.with_suffix(".txt"),
+    ]
+
+
+def _build_input(
+    src_filepath: Path,
+    output_filepaths: List[Path],
+    previous: Optional[manifest.InputRecord],
+    tool_changed: bool,
+    correction_changed: bool,
+    conversion_changed: bool,
+    language,
+    jobs: int,
+    batch_words: int,
+    journal: checkpoint.CorrectionJournal,
+) -> manifest.InputRecord:
+    yml_filepath, corrected_filepath, perchance_filepath = output_filepaths
+    record = manifest.InputRecord(manifest.hash_file(src_filepath))
+
+    if (
+        previous
+        and not tool_changed
+        and previous.source == record.source
+        and _is_up_to_date(yml_filepath, previous.yml)
+    ):
+        record.yml = previous.yml
+    else:
+        logger.info(f"markdown-to-yml: {src_filepath}")
+
+        def _write_yml(output_stream: TextIO):
+            with open(src_filepath, "r") as f:
+                markdown_to_yml.markdown_to_yml(f, output_stream)
+
+        record.yml = _write_output(yml_filepath, _write_yml)
+
+    if (
+        previous
+        and not correction_changed
+        and previous.yml == record.yml
+        and _is_up_to_date(corrected_filepath, previous.corrected)
+    ):
+        record.corrected = previous.corrected
+    else:
+        logger.info(f"correct-words: {src_filepath}")
+
+        def _write_corrected(output_stream: TextIO):
+            # The journal holds the corrections of the previous builds. Only
+            # the categories whose words changed are sent to the LLM.
+            word_dict = utils.load_word_dict(yml_filepath)
+            corrected_dict = correct_words.correct_word_dict(
+                word_dict, language, jobs, batch_words, journal
+            )
+            utils.dump_word_dict(corrected_dict, output_stream)
+
+        record.corrected = _write_output(corrected_filepath, _write_corrected)
+
+    if (
+        previous
+        and not conversion_changed
+        and previous.corrected == record.corrected
+        and _is_up_to_date(perchance_filepath, previous.perchance)
+    ):
+        record.perchance = previous.perchance
+    else:
+        logger.info(f"convert-to-perchance-format: {src_filepath}")
+
+        def _write_perchance(output_stream: TextIO):
+            word_dict = utils.load_word_dict(corrected_filepath)
+            convert_to_perchance_format.convert_word_dict(word_dict, output_stream)
+
+        record.perchance = _write_output(perchance_filepath, _write_perchance)
+
+    return record
+
+
+def __build__(
+    src_dir: str,
+    out_dir: str,
+    language_name: str = "French",
+    jobs: int = 1,
+    batch_words: int = 0,
+    no_cache: bool = False,
+    *args,
+    **kwargs,
+):
+    """
+    Build the yml, corrected yml and perchance files of a folder of markdown files.
+
+    The state of the build is recorded in a manifest in the output folder.
+    The stages of an input file run again only if the file, the prompts,
+    the backend or the tool version changed since the last build. The corrections of each
+    category are kept in a journal, such that only the categories whose
+    words changed are sent to the LLM again.
+    """
+    if no_cache:
+        cache.set_cache(None)
+
+    language = pycountry.languages.get(name=language_name)
+    if language is None:
+        logger.error(f"Language {language_name} not recognized")
+        exit(1)
+
+    src_path = Path(src_dir)
+    out_path = Path(out_dir)
+    out_path.mkdir(parents=True, exist_ok=True)
+
+    manifest_filepath = out_path / manifest.MANIFEST_FILENAME
+    previous_manifest = manifest.Manifest.load(manifest_filepath)
+    current_manifest = manifest.Manifest(
+        manifest.get_tool_version(),
+        manifest.get_correction_dependencies(language),
+        manifest.get_conversion_dependencies(),
+    )
+    # The tool version is part of the dependencies of each stage.
+    tool_changed = current_manifest.tool_version != previous_manifest.tool_version
+    correction_changed = (
+        current_manifest.correction_dependencies
+        != previous_manifest.correction_dependencies
+    )
+    conversion_changed = (
+        current_manifest.conversion_dependencies
+        != previous_manifest.conversion_dependencies
+    )
+
+    journal_filepath = out_path / get_journal_filename(backend.get_backend().cache_name)
+    if correction_changed:
+        journal_filepath.unlink(missing_ok=True)
+    journal = checkpoint.CorrectionJournal(journal_filepath).load()
+
+    relative_paths = sorted(
+        str(x.relative_to(src_path)) for x in src_path.rglob("*.md") if x.is_file()
+    )
+
+    for relative_path in previous_manifest.inputs:
+        if relative_path not in relative_paths:
+            logger.info(f"removed: {relative_path}")
+            for filepath in _get_output_filepaths(out_path, relative_path):
+                filepath.unlink(missing_ok=True)
+
+    failed = False
+    for relative_path in relative_paths:
+        try:
+            record = _build_input(
+                src_path / relative_path,
+                _get_output_filepaths(out_path, relative_path),
+                previous_manifest.inputs.get(relative_path),
+                tool_changed,
+                correction_changed,
+                conversion_changed,
+                language,
+                jobs,
+                batch_words,
+                journal,
+            )
+        except Exception as e:
+            logger.error(f"{relative_path}: {type(e).__name__}: {e}")
+            failed = True
+            continue
+
+        # The manifest is saved after each input file, such that an
+        # interrupted build keeps the work already done.
+        current_manifest.inputs[relative_path] = record
+        current_manifest.save(manifest_filepath)
+
+    current_manifest.save(manifest_filepath)
+    if failed:
+        exit(1)
+
+
+def extend_parser(subparser_action=None):
+    command_name = "build"
+    description = __build__.__doc__
+    help = description.strip().split(".")[0] if description else ""
+
+    if subparser_action:
+        parser = subparser_action.add_parser(
+            command_name,
+            help=help,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+    else:
+        parser = argparse.ArgumentParser(
+            command_name,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+
+    parser.add_argument("src_dir", help="Folder with the markdown files.")
+    parser.add_argument("out_dir", help="Folder where the outputs are written.")
+    parser.add_argument(
+        "--language",
+        dest="language_name",
+        default="French",
+        help="Language of the list of words.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Maximum number of LLM prompts sent concurrently.",
+    )
+    parser.add_argument(
+        "--batch-words",
+        type=int,
+        default=0,
+        help="Pack several categories in a single prompt up to this number of words.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the persistent cache of LLM responses.",
+    )
+    parser.set_defaults(func=__build__, subcommand_help=parser.print_help)
+
+    return parser
+
+
+def main():
+    parser = extend_parser()
+    args = parser.parse_args()
+
+    if "func" in args:
+        args.func(**vars(args))
+    elif "subcommand_help" in args:
+        args.subcommand_help()
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+from danoan.perchance_tools.core import cache
+
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+
+def _get_cache(cache_path: Optional[str]) -> cache.ResponseCache:
+    if cache_path:
+        return cache.ResponseCache(Path(cache_path))
+    return cache.ResponseCache(cache.get_default_cache_path())
+
+
+def _format_timestamp(timestamp: Optional[float]) -> str:
+    if timestamp is None:
+        return "-"
+    return datetime.fromtimestamp(timestamp).isoformat(sep=" ", timespec="seconds")
+
+
+def __cache_stats__(cache_path: Optional[str] = None, *args, **kwargs):
+    """
+    Print statistics of the cache of LLM responses.
+    """
+    stats = _get_cache(cache_path).stats()
+    print(f"path: {stats.path}")
+    print(f"entries: {stats.entries}")
+    print(f"size: {stats.size_bytes / 1024 / 1024:.2f} MB")
+    print(f"oldest access: {_format_timestamp(stats.oldest_access)}")
+    print(f"newest access: {_format_timestamp(stats.newest_access)}")
+    for operation, entries in stats.entries_per_operation.items():
+        print(f"{operation}: {entries}")
+
+
+def __cache_prune__(
+    cache_path: Optional[str] = None,
+    max_age_days: Optional[float] = None,
+    max_size_mb: Optional[float] = None,
+    *args,
+    **kwargs,
+):
+    """
+    Remove old entries from the cache of LLM responses.
+
+    Entries created more than `max_age_days` ago are removed. Then, the least
+    recently used entries are removed until the cache is at most `max_size_mb`.
+    """
+    max_age_seconds = max_age_days * 24 * 3600 if max_age_days is not None else None
+    max_size_bytes = int(max_size_mb * 1024 * 1024) if max_size_mb is not None else None
+
+    removed = _get_cache(cache_path).prune(max_age_seconds, max_size_bytes)
+    print(f"Removed {removed} entries.")
+
+
+def __cache_clear__(cache_path: Optional[str] = None, *args, **kwargs):
+    """
+    Remove all entries from the cache of LLM responses.
+    """
+    _get_cache(cache_path).clear()
+
+
+def extend_parser(subparser_action=None):
+    command_name = "cache"
+    description = "Manage the persistent cache of LLM responses."
+    help = description.split(".")[0]
+
+    if subparser_action:
+        parser = subparser_action.add_parser(
+            command_name,
+            help=help,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+    else:
+        parser = argparse.ArgumentParser(
+            command_name,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+
+    parser.add_argument(
+        "--cache-path",
+        help=(
+            f"Path to the cache database. Default: ${cache.CACHE_ENV_VARIABLE}"
+            " or the user cache folder."
+        ),
+    )
+    cache_subparser_action = parser.add_subparsers()
+
+    def _add_cache_parser(name, func):
+        description = func.__doc__
+        help = description.strip().split(".")[0] if description else ""
+        cache_parser = cache_subparser_action.add_parser(
+            name,
+            help=help,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+        cache_parser.set_defaults(func=func)
+        return cache_parser
+
+    _add_cache_parser("stats", __cache_stats__)
+    _add_cache_parser("clear", __cache_clear__)
+    prune_parser = _add_cache_parser("prune", __cache_prune__)
+    prune_parser.add_argument(
+        "--max-age-days",
+        type=float,
+        help="Remove entries older than this number of days.",
+    )
+    prune_parser.add_argument(
+        "--max-size-mb",
+        type=float,
+        help="Remove least recently used entries above this size.",
+    )
+
+    parser.set_defaults(subcommand_help=parser.print_help)
+
+    return parser
+
+
+def main():
+    parser = extend_parser()
+    args = parser.parse_args()
+
+    if "func" in args:
+        args.func(**vars(args))
+    elif "subcommand_help" in args:
+        args.subcommand_help()
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
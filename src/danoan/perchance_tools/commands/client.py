@@ -0,0 +1,153 @@
+import argparse
+import json
+import sys
+from typing import Any, Dict, Optional, TextIO
+from urllib import error, request
+
+# The client only imports the standard library, such that it starts fast.
+DEFAULT_URL = "http://127.0.0.1:8765"
+
+# Field of the request and of the response of each endpoint.
+ENDPOINT_FIELDS = {
+    "markdown-to-yml": ("markdown", "yml"),
+    "correct": ("yml", "yml"),
+    "convert": ("yml", "perchance"),
+    "translate": ("words", "translations"),
+}
+
+
+def send_request(
+    endpoint: str, data: Optional[Dict[str, Any]] = None, url: str = DEFAULT_URL
+) -> Dict[str, Any]:
+    """
+    Send a request to a `perchance-tools serve` server and return its response.
+
+    Requests without data are sent with GET.
+    """
+    body = None if data is None else json.dumps(data).encode("utf-8")
+    http_request = request.Request(
+        f"{url.rstrip('/')}/{endpoint}",
+        data=body,
+        headers={"Content-Type": "application/json"},
+    )
+    try:
+        with request.urlopen(http_request) as response:
+            return json.loads(response.read())
+    except error.HTTPError as e:
+        raise RuntimeError(json.loads(e.read()).get("error", str(e))) from e
+
+
+def __client__(
+    endpoint: str,
+    input_filepath: Optional[str] = None,
+    url: str = DEFAULT_URL,
+    language_name: str = "French",
+    from_language_name: str = "French",
+    to_language_name: str = "English",
+    *args,
+    **kwargs,
+):
+    """
+    Send the content of a file to a perchance-tools server and print the response.
+
+    The file is read from the standard input if it is not given. The input
+    of translate is a list of words, one per line.
+    """
+    if endpoint in ["health", "stats"]:
+        data = None
+    else:
+        input_stream: TextIO = (
+            open(input_filepath, "r") if input_filepath else sys.stdin
+        )
+        with input_stream:
+            text = input_stream.read()
+
+        request_field, _ = ENDPOINT_FIELDS[endpoint]
+        if endpoint == "translate":
+            data = {
+                "words": [x.strip() for x in text.splitlines() if x.strip()],
+                "from_language": from_language_name,
+                "to_language": to_language_name,
+            }
+        else:
+            data = {request_field: text, "language": language_name}
+
+    try:
+        response = send_request(endpoint, data, url)
+    except (RuntimeError, error.URLError) as e:
+        print(f"{endpoint}: {e}", file=sys.stderr)
+        exit(1)
+
+    if endpoint in ENDPOINT_FIELDS and endpoint != "translate":
+        _, response_field = ENDPOINT_FIELDS[endpoint]
+        sys.stdout.write(response[response_field])
+    else:
+        print(json.dumps(response, ensure_ascii=False, indent=2))
+
+
+def extend_parser(subparser_action=None):
+    command_name = "client"
+    description = __client__.__doc__
+    help = description.strip().split(".")[0] if description else ""
+
+    if subparser_action:
+        parser = subparser_action.add_parser(
+            command_name,
+            help=help,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+    else:
+        parser = argparse.ArgumentParser(
+            command_name,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+
+    parser.add_argument(
+        "endpoint", choices=[*ENDPOINT_FIELDS, "health", "stats"], help="Endpoint."
+    )
+    parser.add_argument(
+        "-i",
+        "--input",
+        dest="input_filepath",
+        help="File sent to the server. Default: the standard input.",
+    )
+    parser.add_argument("--url", default=DEFAULT_URL, help="Address of the server.")
+    parser.add_argument(
+        "--language",
+        dest="language_name",
+        default="French",
+        help="Language of the list of words to correct.",
+    )
+    parser.add_argument(
+        "--from-language",
+        dest="from_language_name",
+        default="French",
+        help="Language of the words to translate.",
+    )
+    parser.add_argument(
+        "--to-language",
+        dest="to_language_name",
+        default="English",
+        help="Language of the translations.",
+    )
+    parser.set_defaults(func=__client__, subcommand_help=parser.print_help)
+
+    return parser
+
+
+def main():
+    parser = extend_parser()
+    args = parser.parse_args()
+
+    if "func" in args:
+        args.func(**vars(args))
+    elif "subcommand_help" in args:
+        args.subcommand_help()
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
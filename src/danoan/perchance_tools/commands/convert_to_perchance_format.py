@@ -1,105 +1,95 @@
-from danoan.perchance_tools.core import api, exception, model, utils
+from danoan.perchance_tools.core import (
+    batch,
+    cache,
+    model,
+    perchance,
+    pipeline,
+    profiling,
+    utils,
+)
 
 import argparse
-import io
+import functools
 import logging
-import pycountry
+from pathlib import Path
 import sys
-import yaml
 
-from typing import Any, Dict, List
+from typing import Dict, List, Optional, TextIO
 
 LOG_LEVEL = logging.INFO
 
-logger = logging.getLogger(__file__)
+logger = logging.getLogger(__name__)
 logger.setLevel(LOG_LEVEL)
-handler = logging.StreamHandler(sys.stderr)
-handler.setLevel(LOG_LEVEL)
-handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
-logger.addHandler(handler)
-
-
-def format_key_name(s):
-    return s.lower().replace(",", " ").replace("  ", " ").replace(" ", "_")
-
-
-def print_perchance_dict(pd):
-    ss = io.StringIO()
-    identation_spaces = 2
-
-    def _print(pd, level=0):
-        sp = identation_spaces * level
-
-        if type(pd) is list:
-            for value in pd:
-                ss.write(f"{sp*' '}{value}\n")
-        else:
-            if "name" in pd.keys():
-                ss.write(f"{sp*' '}name={pd['name']}\n")
-            for key, value in pd.items():
-                if key == "name":
-                    continue
-                ss.write(f"{sp*' '}{key}\n")
-                _print(pd[key], level + 1)
-
-    _print(pd["root"])
-    return ss.getvalue()
-
-
-def _key_path_to_perchance_dict(list_key_paths: List[Dict[str, Any]]):
-    d: Dict[str, Any] = {"root": {}}
-    for key_path in list_key_paths:
-        current = d["root"]
-        path = key_path["path"]
-        words = key_path["words"]
-
-        for key in path:
-            perchance_key = format_key_name(key)
-            if perchance_key not in current:
-                current[perchance_key] = {"name": key.lower()}
-            current = current[perchance_key]
-
-        current["words"] = words
-
-    return d
-
-
-def _translate_key_paths(word_dict: model.WordDict):
-    for key_path in utils.collect_key_path(word_dict, "words"):
-        kp = {"path": [], "words": key_path["words"]}
-        categories = key_path["path"]
-        for category in categories:
-            if category == "root":
-                continue
-            from_language = pycountry.languages.get(name="French")
-            to_language = pycountry.languages.get(name="English")
-            try:
-                response = api.translate(category, from_language.name, to_language.name)
-            except exception.CacheNotConfiguredError:
-                print(
-                    "The cache for LLM calls is not configured. Please setup",
-                    " the llm-assistant with llm-assistant setup before proceeding",
-                )
-                exit(1)
-            if not response:
-                logger.info(f"Error processing: {categories}. Skipping.")
-                continue
-
-            kp["path"].append(response[0])
-        yield kp
-
-
-def __convert_to_perchance_format__(list_yml_filepath: List[str], *args, **kwargs):
+
+
+def _write_perchance_dict(
+    word_dict: model.WordDict,
+    output_stream: TextIO,
+    translations: Optional[Dict[str, List[str]]] = None,
+):
+    # Each top-level category is written as soon as its categories are
+    # translated. Only the categories missing from `translations` are sent
+    # to the LLM.
+    translated_key_paths = pipeline.translate(
+        utils.collect_key_path(word_dict, "words"), translations=translations
+    )
+    perchance.write_key_paths(translated_key_paths, output_stream)
+
+    with profiling.stage("write"):
+        output_stream.write("\n")
+
+
+def convert_word_dict(word_dict: model.WordDict, output_stream: TextIO):
     """
-    Convert one or more yml files containing a list of words in a perchance data structure.
+    Translate the categories of a WordDict and write it in perchance format.
     """
-    for filepath in list_yml_filepath:
-        with open(filepath, "r") as f:
-            T = yaml.load(f, Loader=yaml.Loader)
-            word_dict = model.WordDict(T)
+    _write_perchance_dict(word_dict, output_stream)
+
 
-            d = _key_path_to_perchance_dict(list(_translate_key_paths(word_dict)))
-            print(print_perchance_dict(d))
+def _convert_file(compact: bool, yml_filepath: str, output_stream: TextIO):
+    convert_word_dict(utils.load_word_dict(yml_filepath, compact), output_stream)
+
+
+def __convert_to_perchance_format__(
+    list_yml_filepath: List[str],
+    no_cache: bool = False,
+    compact: bool = False,
+    file_jobs: int = 1,
+    output_dir: Optional[str] = None,
+    *args,
+    **kwargs,
+):
+    """
+    Convert one or more yml files containing a list of words in a perchance data structure.
+    """
+    if no_cache:
+        cache.set_cache(None)
+
+    process: batch.ProcessFile
+    if file_jobs > 1:
+        # Each process translates the categories of its files. The translations
+        # of categories shared by several files are reused through the cache.
+        process = functools.partial(_convert_file, compact)
+    else:
+        # The files are loaded one at a time and share their translations.
+        translations: Dict[str, List[str]] = {}
+
+        def _convert_file_with_translations(filepath: str, output_stream: TextIO):
+            word_dict = utils.load_word_dict(filepath, compact)
+            _write_perchance_dict(word_dict, output_stream, translations)
+
+        process = _convert_file_with_translations
+
+    results = batch.run(
+        process,
+        list_yml_filepath,
+        sys.stdout,
+        file_jobs,
+        Path(output_dir) if output_dir else None,
+        ".txt",
+    )
+    if any(x.error for x in results):
+        exit(1)
 
 
 def extend_parser(subparser_action=None):
@@ -125,7 +115,27 @@ def extend_parser(subparser_action=None):
         "list_yml_filepath",
         metavar="yml_filepath",
         nargs="+",
-        help="One or more path to yml file list of words.",
+        help="One or more path to yml file list of words or WordDict snapshot.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the persistent cache of LLM responses.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Store the list of words in a memory efficient structure.",
+    )
+    parser.add_argument(
+        "--file-jobs",
+        type=int,
+        default=1,
+        help="Number of processes converting input files in parallel.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="Write the perchance text of each input file to its own file in this folder.",
     )
     parser.set_defaults(
         func=__convert_to_perchance_format__, subcommand_help=parser.print_help
@@ -1,53 +1,124 @@
-from danoan.perchance_tools.core import api, exception, model
-from danoan.llm_assistant.core.api import LLM_ASSISTANT_ENV_VARIABLE
+from danoan.perchance_tools.core import (
+    api,
+    batch,
+    cache,
+    checkpoint,
+    model,
+    replace,
+    utils,
+)
 
 import argparse
+import functools
 import logging
 import os
 from pathlib import Path
 import pycountry
 import sys
-from typing import List, TextIO, Text
-import yaml
+from typing import List, Optional, TextIO, Text
 
 LOG_LEVEL = logging.INFO
 
-logger = logging.getLogger(__file__)
+logger = logging.getLogger(__name__)
 logger.setLevel(LOG_LEVEL)
-handler = logging.StreamHandler(sys.stderr)
-handler.setLevel(LOG_LEVEL)
-handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
-logger.addHandler(handler)
 
 
-def correct_words(yml_stream: TextIO, language: Text) -> model.WordDict:
-    Y = yaml.load(yml_stream, Loader=yaml.Loader)
+def correct_word_dict(
+    word_dict: model.WordDict,
+    language: Text,
+    jobs: int = 1,
+    batch_words: int = 0,
+    journal: Optional[checkpoint.CorrectionJournal] = None,
+) -> model.WordDict:
+    list_corrections = api.find_corrections(
+        word_dict, language, jobs, batch_words, journal
+    )
+    bulk_replace = replace.BulkReplace()
+    bulk_replace.add_instructions(list_corrections)
+    report = bulk_replace.apply(word_dict)
+    for issue in report.issues:
+        logger.warning(f"Correction not applied: {issue}")
+    return word_dict
+
+
+def correct_words(
+    yml_stream: TextIO, language: Text, jobs: int = 1, batch_words: int = 0
+) -> model.WordDict:
+    Y = utils.load_yml(yml_stream)
     word_dict = model.WordDict(Y)
-    list_corrections = api.find_corrections(word_dict, language)
-    corrected_dict = api.replace_words(word_dict, list_corrections)
-    return corrected_dict
+    return correct_word_dict(word_dict, language, jobs, batch_words)
+
+
+def _correct_words_file(
+    language_name: str,
+    jobs: int,
+    batch_words: int,
+    compact: bool,
+    checkpoint_filepath: Optional[str],
+    resume: bool,
+    yml_filepath: str,
+    output_stream: TextIO,
+):
+    journal = None
+    if checkpoint_filepath:
+        journal = checkpoint.CorrectionJournal(Path(checkpoint_filepath))
+        if resume:
+            journal.load()
+
+    # Language objects cannot be sent to the worker processes.
+    language = pycountry.languages.get(name=language_name)
+    if language is None:
+        raise ValueError(f"Language {language_name} not recognized")
+
+    word_dict = utils.load_word_dict(Path(yml_filepath), compact)
+    corrected_dict = correct_word_dict(word_dict, language, jobs, batch_words, journal)
+    utils.dump_word_dict(corrected_dict, output_stream)
 
 
 def __correct_words__(
-    list_yml_filepath: List[str], language_name: str, *args, **kwargs
+    list_yml_filepath: List[str],
+    language_name: str,
+    jobs: int = 1,
+    batch_words: int = 0,
+    no_cache: bool = False,
+    compact: bool = False,
+    file_jobs: int = 1,
+    output_dir: Optional[str] = None,
+    checkpoint_filepath: Optional[str] = None,
+    resume: bool = False,
+    *args,
+    **kwargs,
 ):
+    if resume and not checkpoint_filepath:
+        logger.error("--resume requires a --checkpoint file")
+        exit(1)
+
+    if no_cache:
+        cache.set_cache(None)
+
     language = pycountry.languages.get(name=language_name)
     if language is None:
-        logger.error(f"Language {language} not recognized")
+        logger.error(f"Language {language_name} not recognized")
         exit(1)
 
-    for _yml_filepath in list_yml_filepath:
-        yml_filepath = Path(_yml_filepath)
-        with open(yml_filepath, "r") as f_in:
-            try:
-                corrected_dict = correct_words(f_in, language)
-            except exception.CacheNotConfiguredError:
-                print(
-                    "The cache for LLM calls is not configured. Please setup",
-                    " the llm-assistant with llm-assistant setup before proceeding",
-                )
-                exit(1)
-            yaml.dump(corrected_dict.extract(), sys.stdout, allow_unicode=True)
+    results = batch.run(
+        functools.partial(
+            _correct_words_file,
+            language_name,
+            jobs,
+            batch_words,
+            compact,
+            checkpoint_filepath,
+            resume,
+        ),
+        list_yml_filepath,
+        sys.stdout,
+        file_jobs,
+        Path(output_dir) if output_dir else None,
+        ".yml",
+    )
+    if any(x.error for x in results):
+        exit(1)
 
 
 def extend_parser(subparser_action=None):
@@ -76,7 +147,53 @@ def extend_parser(subparser_action=None):
         "list_yml_filepath",
         metavar="yml_filepath",
         nargs="+",
-        help="One or more path to yml file list of words.",
+        help="One or more path to yml file list of words or WordDict snapshot.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Maximum number of LLM prompts sent concurrently.",
+    )
+    parser.add_argument(
+        "--batch-words",
+        type=int,
+        default=0,
+        help="Pack several categories in a single prompt up to this number of words.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the persistent cache of LLM responses.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Store the list of words in a memory efficient structure.",
+    )
+    parser.add_argument(
+        "--file-jobs",
+        type=int,
+        default=1,
+        help="Number of processes correcting input files in parallel.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="Write the corrected yml of each input file to its own file in this folder.",
+    )
+    parser.add_argument(
+        "--checkpoint",
+        dest="checkpoint_filepath",
+        help="Record the correction of each category in this JSONL journal.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Replay the corrections recorded in the checkpoint journal. Only"
+            " categories missing in the journal or whose words changed are sent"
+            " to the LLM."
+        ),
     )
     parser.set_defaults(func=__correct_words__, subcommand_help=parser.print_help)
 
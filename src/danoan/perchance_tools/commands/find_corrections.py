@@ -0,0 +1,206 @@
+from danoan.perchance_tools.core import api, batch, cache, checkpoint, model, utils
+
+import argparse
+import functools
+import logging
+from pathlib import Path
+import pycountry
+import sys
+from typing import List, Optional, TextIO, Text
+
+LOG_LEVEL = logging.INFO
+
+logger = logging.getLogger(__name__)
+logger.setLevel(LOG_LEVEL)
+
+
+def find_corrections(
+    word_dict: model.WordDict,
+    language: Text,
+    output_stream: TextIO,
+    jobs: int = 1,
+    batch_words: int = 0,
+    source: Optional[str] = None,
+):
+    """
+    Write the correction of each category of a WordDict as a JSONL record.
+
+    Records are written as soon as they are found. They have the format of
+    the `checkpoint.CorrectionJournal` records, with the name of the `source`
+    file if it is given.
+    """
+    for instruction in api.iter_corrections(word_dict, language, jobs, batch_words):
+        words_hash = checkpoint.hash_words(word_dict.get_leaf(instruction.key))
+        output_stream.write(
+            checkpoint.format_record(
+                instruction.key, words_hash, instruction.replace_pairs, source
+            )
+        )
+        output_stream.flush()
+
+
+def _find_corrections_file(
+    language_name: str,
+    jobs: int,
+    batch_words: int,
+    compact: bool,
+    yml_filepath: str,
+    output_stream: TextIO,
+):
+    # Language objects cannot be sent to the worker processes.
+    language = pycountry.languages.get(name=language_name)
+    if language is None:
+        raise ValueError(f"Language {language_name} not recognized")
+
+    word_dict = utils.load_word_dict(Path(yml_filepath), compact)
+    find_corrections(
+        word_dict,
+        language,
+        output_stream,
+        jobs,
+        batch_words,
+        Path(yml_filepath).name,
+    )
+
+
+def __find_corrections__(
+    list_yml_filepath: List[str],
+    language_name: str,
+    jobs: int = 1,
+    batch_words: int = 0,
+    no_cache: bool = False,
+    compact: bool = False,
+    file_jobs: int = 1,
+    output_dir: Optional[str] = None,
+    output_filepath: Optional[str] = None,
+    *args,
+    **kwargs,
+):
+    """
+    Find the corrections of the words of yml files and write them in JSONL.
+
+    Each line records the replace pairs of a category and the name of its
+    input file. The corrections are applied with `apply-corrections`,
+    without the LLM. The file can also be
+    given to `correct-words --checkpoint --resume`.
+
+    Each record is written as soon as it is found. The records written
+    before a failure are kept.
+    """
+    if no_cache:
+        cache.set_cache(None)
+
+    language = pycountry.languages.get(name=language_name)
+    if language is None:
+        logger.error(f"Language {language_name} not recognized")
+        exit(1)
+
+    output_stream = (
+        open(output_filepath, "w", encoding="utf-8") if output_filepath else sys.stdout
+    )
+    try:
+        results = batch.run(
+            functools.partial(
+                _find_corrections_file, language_name, jobs, batch_words, compact
+            ),
+            list_yml_filepath,
+            output_stream,
+            file_jobs,
+            Path(output_dir) if output_dir else None,
+            ".jsonl",
+            keep_partial=True,
+        )
+    finally:
+        if output_filepath:
+            output_stream.close()
+
+    if any(x.error for x in results):
+        exit(1)
+
+
+def extend_parser(subparser_action=None):
+    command_name = "find-corrections"
+    description = __find_corrections__.__doc__
+    help = description.strip().split(".")[0] if description else ""
+
+    if subparser_action:
+        parser = subparser_action.add_parser(
+            command_name,
+            help=help,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+    else:
+        parser = argparse.ArgumentParser(
+            command_name,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+
+    parser.add_argument(
+        "language_name", metavar="language", help="Language of the list of words."
+    )
+    parser.add_argument(
+        "list_yml_filepath",
+        metavar="yml_filepath",
+        nargs="+",
+        help="One or more path to yml file list of words or WordDict snapshot.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Maximum number of LLM prompts sent concurrently.",
+    )
+    parser.add_argument(
+        "--batch-words",
+        type=int,
+        default=0,
+        help="Pack several categories in a single prompt up to this number of words.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the persistent cache of LLM responses.",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Store the list of words in a memory efficient structure.",
+    )
+    parser.add_argument(
+        "--file-jobs",
+        type=int,
+        default=1,
+        help="Number of processes correcting input files in parallel.",
+    )
+    output_group = parser.add_mutually_exclusive_group()
+    output_group.add_argument(
+        "-o",
+        "--output",
+        dest="output_filepath",
+        help="Write the corrections to this file instead of the standard output.",
+    )
+    output_group.add_argument(
+        "--output-dir",
+        help="Write the corrections of each input file to its own file in this folder.",
+    )
+    parser.set_defaults(func=__find_corrections__, subcommand_help=parser.print_help)
+
+    return parser
+
+
+def main():
+    parser = extend_parser()
+    args = parser.parse_args()
+
+    if "func" in args:
+        args.func(**vars(args))
+    elif "subcommand_help" in args:
+        args.subcommand_help()
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,20 @@
-from danoan.perchance_tools.core import model, utils
+from danoan.perchance_tools.core import utils
 
 import argparse
 import logging
-import sys
-import yaml
 
 from typing import Dict, List, TextIO
 
 LOG_LEVEL = logging.INFO
 
-logger = logging.getLogger(__file__)
+logger = logging.getLogger(__name__)
 logger.setLevel(LOG_LEVEL)
-handler = logging.StreamHandler(sys.stderr)
-handler.setLevel(LOG_LEVEL)
-handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
-logger.addHandler(handler)
 
 
 def __list_categories__(yml_filepath: str, *args, **kwargs):
-    with open(yml_filepath, "r") as f:
-        word_dict = model.WordDict(yaml.load(f, Loader=yaml.Loader))
-        # l = list(utils.collect_key_path(word_dict, "words"))
-        # print(l)
-        for key_path in utils.collect_key_path(word_dict, "words"):
-            print(key_path["path"])
+    word_dict = utils.load_word_dict(yml_filepath)
+    for key_path in utils.collect_key_path(word_dict, "words"):
+        print(list(key_path["path"]))
 
 
 def extend_parser(subparser_action=None):
@@ -48,7 +39,7 @@ def extend_parser(subparser_action=None):
     parser.add_argument(
         "yml_filepath",
         metavar="yml_filepath",
-        help="Path to yml file list of words.",
+        help="Path to yml file list of words or WordDict snapshot.",
     )
     parser.set_defaults(func=__list_categories__, subcommand_help=parser.print_help)
 
@@ -1,26 +1,58 @@
-from danoan.perchance_tools.core import api
+from danoan.perchance_tools.core import api, batch, utils
 
 import argparse
+import functools
+from pathlib import Path
 import sys
-from typing import List, TextIO
-import yaml
+from typing import List, Optional, TextIO
 
 
-def markdown_to_yml(markdown_stream: TextIO, output_stream: TextIO):
+def markdown_to_yml(
+    markdown_stream: TextIO, output_stream: TextIO, stream: bool = False
+):
     """
     Convert markdown categorized file to yml.
 
     Given a list of words hierarchicaly categorized in markdown format,
     convert it to yaml.
     """
-    D = api.create_dict_from_markdown(markdown_stream)
-    yaml.dump(D.extract(), sys.stdout, allow_unicode=True)
-
+    if stream:
+        api.write_yml_from_markdown(markdown_stream, output_stream)
+    else:
+        D = api.create_dict_from_markdown(markdown_stream)
+        utils.dump_yml(D.extract(), output_stream)
+
+
+def _markdown_file_to_yml(stream: bool, filepath: str, output_stream: TextIO):
+    with open(filepath, "r") as f:
+        markdown_to_yml(f, output_stream, stream)
+
+
+def __markdown_to_yml__(
+    list_markdown_filepath: List[str],
+    output_filepath: Optional[str] = None,
+    stream: bool = False,
+    file_jobs: int = 1,
+    output_dir: Optional[str] = None,
+    *args,
+    **kwargs,
+):
+    output_stream = open(output_filepath, "w") if output_filepath else sys.stdout
+    try:
+        results = batch.run(
+            functools.partial(_markdown_file_to_yml, stream),
+            list_markdown_filepath,
+            output_stream,
+            file_jobs,
+            Path(output_dir) if output_dir else None,
+            ".yml",
+        )
+    finally:
+        if output_filepath:
+            output_stream.close()
 
-def __markdown_to_yml__(list_markdown_filepath: List[str], *args, **kwargs):
-    for filepath in list_markdown_filepath:
-        with open(filepath, "r") as f:
-            markdown_to_yml(f, sys.stdout)
+    if any(x.error for x in results):
+        exit(1)
 
 
 def extend_parser(subparser_action=None):
@@ -48,6 +80,31 @@ def extend_parser(subparser_action=None):
         nargs="+",
         help="One or more path to hierarchicaly markdown file list of words.",
     )
+    output_group = parser.add_mutually_exclusive_group()
+    output_group.add_argument(
+        "-o",
+        "--output",
+        dest="output_filepath",
+        help="Write the yml to this file instead of the standard output.",
+    )
+    output_group.add_argument(
+        "--output-dir",
+        help="Write the yml of each markdown file to its own file in this folder.",
+    )
+    parser.add_argument(
+        "--file-jobs",
+        type=int,
+        default=1,
+        help="Number of processes converting input files in parallel.",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "Write each section as soon as it is parsed. Keys keep the markdown"
+            " order instead of being sorted."
+        ),
+    )
     parser.set_defaults(func=__markdown_to_yml__, subcommand_help=parser.print_help)
 
     return parser
@@ -0,0 +1,153 @@
+from danoan.perchance_tools.core import batch, cache, pipeline
+
+import argparse
+import functools
+import logging
+from pathlib import Path
+import pycountry
+import sys
+from typing import List, Optional, TextIO
+
+LOG_LEVEL = logging.INFO
+
+logger = logging.getLogger(__name__)
+logger.setLevel(LOG_LEVEL)
+
+
+def _pipeline_file(
+    language_name: Optional[str],
+    jobs: int,
+    batch_words: int,
+    markdown_filepath: str,
+    output_stream: TextIO,
+):
+    language = pycountry.languages.get(name=language_name) if language_name else None
+    with open(markdown_filepath, "r") as f:
+        pipeline.run(f, output_stream, language, jobs, batch_words)
+
+
+def __pipeline__(
+    list_markdown_filepath: List[str],
+    language_name: str = "French",
+    no_correction: bool = False,
+    jobs: int = 1,
+    batch_words: int = 0,
+    no_cache: bool = False,
+    file_jobs: int = 1,
+    output_dir: Optional[str] = None,
+    *args,
+    **kwargs,
+):
+    """
+    Convert markdown files to the perchance format in a single process.
+
+    The words are parsed, corrected, translated and rendered in a stream of
+    categories, without intermediate yml files. Each top-level category is
+    written as soon as it is rendered.
+    """
+    if no_cache:
+        cache.set_cache(None)
+
+    if not no_correction and pycountry.languages.get(name=language_name) is None:
+        logger.error(f"Language {language_name} not recognized")
+        exit(1)
+
+    results = batch.run(
+        functools.partial(
+            _pipeline_file,
+            None if no_correction else language_name,
+            jobs,
+            batch_words,
+        ),
+        list_markdown_filepath,
+        sys.stdout,
+        file_jobs,
+        Path(output_dir) if output_dir else None,
+        ".txt",
+    )
+    if any(x.error for x in results):
+        exit(1)
+
+
+def extend_parser(subparser_action=None):
+    command_name = "pipeline"
+    description = __pipeline__.__doc__
+    help = description.strip().split(".")[0] if description else ""
+
+    if subparser_action:
+        parser = subparser_action.add_parser(
+            command_name,
+            help=help,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+    else:
+        parser = argparse.ArgumentParser(
+            command_name,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+
+    parser.add_argument(
+        "list_markdown_filepath",
+        metavar="markdown_filepath",
+        nargs="+",
+        help="One or more path to hierarchicaly markdown file list of words.",
+    )
+    parser.add_argument(
+        "--language",
+        dest="language_name",
+        default="French",
+        help="Language of the list of words.",
+    )
+    parser.add_argument(
+        "--no-correction",
+        action="store_true",
+        help="Do not correct the words with the LLM.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="Maximum number of LLM prompts sent concurrently.",
+    )
+    parser.add_argument(
+        "--batch-words",
+        type=int,
+        default=0,
+        help="Pack several categories in a single prompt up to this number of words.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the persistent cache of LLM responses.",
+    )
+    parser.add_argument(
+        "--file-jobs",
+        type=int,
+        default=1,
+        help="Number of processes converting input files in parallel.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        help="Write the perchance text of each input file to its own file in this folder.",
+    )
+    parser.set_defaults(func=__pipeline__, subcommand_help=parser.print_help)
+
+    return parser
+
+
+def main():
+    parser = extend_parser()
+    args = parser.parse_args()
+
+    if "func" in args:
+        args.func(**vars(args))
+    elif "subcommand_help" in args:
+        args.subcommand_help()
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+from danoan.perchance_tools.commands import (
+    convert_to_perchance_format,
+    correct_words,
+    markdown_to_yml,
+)
+from danoan.perchance_tools.core import api, cache, metrics, model, utils
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import io
+import json
+import logging
+import pycountry
+from typing import Any, Callable, Dict, List, Optional
+
+LOG_LEVEL = logging.INFO
+
+logger = logging.getLogger(__name__)
+logger.setLevel(LOG_LEVEL)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_MAX_JOBS = 4
+
+
+class RequestError(Exception):
+    pass
+
+
+def _get_text(request: Dict[str, Any], name: str, default: Optional[str] = None) -> str:
+    value = request[name] if default is None else request.get(name, default)
+    if type(value) is not str:
+        raise RequestError(f"{name} must be a string")
+    return value
+
+
+def _get_count(request: Dict[str, Any], name: str, default: int, minimum: int) -> int:
+    value = request.get(name, default)
+    if type(value) is not int or value < minimum:
+        raise RequestError(f"{name} must be an integer greater or equal to {minimum}")
+    return value
+
+
+def _get_words(request: Dict[str, Any]) -> List[str]:
+    words = request["words"]
+    if type(words) is not list or not all(type(x) is str for x in words):
+        raise RequestError("words must be a list of strings")
+    return words
+
+
+def _get_language(request: Dict[str, Any], name: str, default: str):
+    language_name = _get_text(request, name, default)
+    language = pycountry.languages.get(name=language_name)
+    if language is None:
+        raise RequestError(f"Language {language_name} not recognized")
+    return language
+
+
+def _markdown_to_yml(request: Dict[str, Any], server: "Server") -> Dict[str, Any]:
+    output_stream = io.StringIO()
+    markdown_to_yml.markdown_to_yml(
+        io.StringIO(_get_text(request, "markdown")), output_stream
+    )
+    return {"yml": output_stream.getvalue()}
+
+
+def _correct(request: Dict[str, Any], server: "Server") -> Dict[str, Any]:
+    # The threads of a request are not shared with the other requests.
+    jobs = min(_get_count(request, "jobs", 1, 1), server.max_jobs)
+    word_dict = correct_words.correct_words(
+        io.StringIO(_get_text(request, "yml")),
+        _get_language(request, "language", "French"),
+        jobs,
+        _get_count(request, "batch_words", 0, 0),
+    )
+    output_stream = io.StringIO()
+    utils.dump_yml(word_dict.extract(), output_stream)
+    return {"yml": output_stream.getvalue()}
+
+
+def _translate(request: Dict[str, Any], server: "Server") -> Dict[str, Any]:
+    words = _get_words(request)
+    from_language = _get_language(request, "from_language", "French")
+    to_language = _get_language(request, "to_language", "English")
+    translations = api.translate_many(words, from_language.name, to_language.name)
+    return {"translations": translations}
+
+
+def _convert(request: Dict[str, Any], server: "Server") -> Dict[str, Any]:
+    word_dict = model.WordDict(utils.load_yml(_get_text(request, "yml")))
+    output_stream = io.StringIO()
+    convert_to_perchance_format.convert_word_dict(word_dict, output_stream)
+    return {"perchance": output_stream.getvalue()}
+
+
+# Endpoints receive a json object and the server, and return a json object.
+# Invalid requests raise RequestError.
+ENDPOINTS: Dict[str, Callable[[Dict[str, Any], "Server"], Dict[str, Any]]] = {
+    "markdown-to-yml": _markdown_to_yml,
+    "correct": _correct,
+    "translate": _translate,
+    "convert": _convert,
+}
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server: "Server"
+
+    def _send_json(self, status: int, data: Dict[str, Any]):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok"})
+        elif self.path == "/stats":
+            self._send_json(200, metrics.get_metrics().report())
+        else:
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+
+        endpoint = ENDPOINTS.get(self.path.strip("/"))
+        if endpoint is None:
+            self._send_json(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+
+        try:
+            request = json.loads(body or b"{}")
+            if not isinstance(request, dict):
+                raise RequestError("The request must be a json object")
+            response = endpoint(request, self.server)
+        except (RequestError, json.JSONDecodeError) as e:
+            self._send_json(400, {"error": str(e)})
+        except KeyError as e:
+            self._send_json(400, {"error": f"Missing field {e}"})
+        except Exception as e:
+            logger.error(f"{self.path}: {type(e).__name__}: {e}")
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+        else:
+            self._send_json(200, response)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+class Server(HTTPServer):
+    """
+    HTTP server answering the requests in a fixed pool of threads.
+
+    The threads live as long as the server, such that their connections to
+    the cache database are reused from one request to the other. The `jobs`
+    of a correction request are capped to `max_jobs`.
+    """
+
+    def __init__(self, address, threads: int = 8, max_jobs: int = DEFAULT_MAX_JOBS):
+        super().__init__(address, _RequestHandler)
+        self.max_jobs = max_jobs
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+
+    def process_request(self, request, client_address):
+        self._executor.submit(self._process_request_in_thread, request, client_address)
+
+    def _process_request_in_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+
+def __serve__(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    threads: int = 8,
+    no_cache: bool = False,
+    memory_entries: int = 10000,
+    max_jobs: int = DEFAULT_MAX_JOBS,
+    *args,
+    **kwargs,
+):
+    """
+    Serve the conversion, correction and translation of words over HTTP.
+
+    The server keeps the prompts, the LLM client and the responses of the LLM
+    in memory between requests. Send a json object with a POST request to
+    one of the endpoints:
+
+      /markdown-to-yml  {"markdown": ...}                      -> {"yml": ...}
+      /correct          {"yml": ..., "language": "French",
+                         "jobs": 1, "batch_words": 0}           -> {"yml": ...}
+      /translate        {"words": [...], "from_language": "French",
+                         "to_language": "English"}             -> {"translations": ...}
+      /convert          {"yml": ...}                           -> {"perchance": ...}
+
+    GET /health and /stats report the state of the server and its LLM calls.
+    Invalid requests are answered with the status 400.
+    """
+    response_cache = None if no_cache else cache.get_cache()
+    cache.set_cache(cache.MemoryCache(response_cache, memory_entries))
+
+    if max_jobs < 1:
+        logger.error("--max-jobs must be at least 1")
+        exit(1)
+
+    server = Server((host, port), threads, max_jobs)
+    logger.info(f"Serving on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def extend_parser(subparser_action=None):
+    command_name = "serve"
+    description = __serve__.__doc__
+    help = description.strip().split(".")[0] if description else ""
+
+    if subparser_action:
+        parser = subparser_action.add_parser(
+            command_name,
+            help=help,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+    else:
+        parser = argparse.ArgumentParser(
+            command_name,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Address to listen on.")
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT, help="Port to listen on."
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=8,
+        help="Number of requests handled concurrently.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the persistent cache of LLM responses.",
+    )
+    parser.add_argument(
+        "--memory-entries",
+        type=int,
+        default=10000,
+        help="Number of LLM responses kept in memory.",
+    )
+    parser.add_argument(
+        "--max-jobs",
+        type=int,
+        default=DEFAULT_MAX_JOBS,
+        help="Maximum number of LLM prompts sent concurrently by a correction request.",
+    )
+    parser.set_defaults(func=__serve__, subcommand_help=parser.print_help)
+
+    return parser
+
+
+def main():
+    parser = extend_parser()
+    args = parser.parse_args()
+
+    if "func" in args:
+        args.func(**vars(args))
+    elif "subcommand_help" in args:
+        args.subcommand_help()
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+from danoan.perchance_tools.core import snapshot, utils
+
+import argparse
+
+
+def __yml_to_snapshot__(yml_filepath: str, snapshot_filepath: str, *args, **kwargs):
+    """
+    Convert a yml file list of words to a WordDict snapshot.
+
+    The snapshot is a binary format accepted as input by every command
+    that reads a yml file list of words. Reading a snapshot is faster than
+    parsing the yml.
+    """
+    word_dict = utils.load_word_dict(yml_filepath)
+    with open(snapshot_filepath, "wb") as f:
+        snapshot.dump(word_dict, f)
+
+
+def extend_parser(subparser_action=None):
+    command_name = "yml-to-snapshot"
+    description = __yml_to_snapshot__.__doc__
+    help = description.strip().split(".")[0] if description else ""
+
+    if subparser_action:
+        parser = subparser_action.add_parser(
+            command_name,
+            help=help,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+    else:
+        parser = argparse.ArgumentParser(
+            command_name,
+            description=description,
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+
+    parser.add_argument(
+        "yml_filepath",
+        metavar="yml_filepath",
+        help="Path to yml file list of words.",
+    )
+    parser.add_argument(
+        "snapshot_filepath",
+        metavar="snapshot_filepath",
+        help="Path to the WordDict snapshot to be written.",
+    )
+    parser.set_defaults(func=__yml_to_snapshot__, subcommand_help=parser.print_help)
+
+    return parser
+
+
+def main():
+    parser = extend_parser()
+    args = parser.parse_args()
+
+    if "func" in args:
+        args.func(**vars(args))
+    elif "subcommand_help" in args:
+        args.subcommand_help()
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
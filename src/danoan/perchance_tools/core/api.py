@@ -1,33 +1,61 @@
-from danoan.perchance_tools.core import exception, model, utils
-from danoan.llm_assistant.core import api as llm_assistant
-
+from danoan.perchance_tools.core import (
+    backend,
+    cache,
+    checkpoint,
+    dispatch,
+    metrics,
+    model,
+    profiling,
+    prompts,
+    utils,
+)
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from importlib import resources
-from jinja2 import Template
 import json
 import logging
-from pathlib import Path
-import sys
 import re
-from typing import Any, Dict, Generator, List, TextIO, Tuple
+import time
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    TextIO,
+    Tuple,
+)
+import yaml
 
 LOG_LEVEL = logging.DEBUG
 
-logger = logging.getLogger(__file__)
+logger = logging.getLogger(__name__)
 logger.setLevel(LOG_LEVEL)
-handler = logging.StreamHandler(sys.stderr)
-handler.setLevel(LOG_LEVEL)
-handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
-logger.addHandler(handler)
 
-# -------------------- Markdown to YML --------------------
+CORRECT_WORDS_MODEL = "gpt-4o"
+TRANSLATE_MODEL = "gpt-3.5-turbo"
 
 
-@dataclass
-class _MarkdownMarker:
-    level: int
-    title: str
-    character_span: Tuple[int, int]
+def set_models(
+    correct_words_model: Optional[str] = None, translate_model: Optional[str] = None
+):
+    """
+    Set the models used to correct and to translate words. None keeps the current.
+    """
+    global CORRECT_WORDS_MODEL, TRANSLATE_MODEL
+    if correct_words_model:
+        CORRECT_WORDS_MODEL = correct_words_model
+    if translate_model:
+        TRANSLATE_MODEL = translate_model
+
+
+# -------------------- Markdown to YML --------------------
 
 
 @dataclass
@@ -37,11 +65,15 @@ class _MarkdownCue:
     lines: List[str]
 
 
-def _collect_markdown_markers(
-    markdown_text: str,
-) -> Generator[_MarkdownMarker, None, None]:
+_HEADER_START = re.compile(r"[ ]*(#+)")
+
+
+def _parse_markdown(markdown_stream: TextIO) -> Generator[_MarkdownCue, None, None]:
     """
-    Return the start and end characters of header titles in a markdown.
+    Parse markdown text into (level, title, list of words) components.
+
+    The stream is read line by line and only the words of the current header
+    are kept in memory. Text before the first header is ignored.
 
     >>> markdown_text = '''
     ... # Running journal
@@ -49,42 +81,82 @@ def _collect_markdown_markers(
     ... ## 1st April 2024
     ... Ran 5km in 30 minutes.
     ... '''
-    >>> markers = list(_collect_markdown_markers(markdown_text))
-    >>> m0 = markers[0]
-    >>> m1 = markers[1]
-    >>> assert( (m0.level,m0.title,m0.character_span) == (1,'Running journal', (1,18)))
-    >>> assert( (m1.level,m1.title,m1.character_span) == (2,'1st April 2024', (64,81)))
+    >>> import io
+    >>> cues = list(_parse_markdown(io.StringIO(markdown_text)))
+    >>> [(c.level, c.title) for c in cues]
+    [(1, 'Running journal'), (2, '1st April 2024')]
+    >>> cues[1].lines
+    ['Ran 5km in 30 minutes.']
     """
-    header_start = re.compile(r"^[ ]*(#+)\s*([^\n]*)", re.MULTILINE)
-
-    for m in header_start.finditer(markdown_text):
-        header_marker, header_title = m.groups()
-        header_level = len(header_marker)
-        yield _MarkdownMarker(header_level, header_title, m.span())
+    level = 0
+    title = None
+    pending_title = False
+    words: Set[str] = set()
+
+    for line in markdown_stream:
+        line = line.rstrip("\n")
+        if pending_title:
+            # A header marker followed by blank lines takes the next non
+            # blank line as its title.
+            if line.strip():
+                title = line.lstrip()
+                pending_title = False
+            continue
+
+        m = _HEADER_START.match(line)
+        if m:
+            if title is not None:
+                yield _MarkdownCue(level, title, list(sorted(words)))
+
+            level = len(m.group(1))
+            title = line[m.end() :].lstrip()
+            pending_title = len(title) == 0
+            words = set()
+        elif title is not None:
+            _w = line.strip()
+            if len(_w) > 0:
+                words.add(_w)
+
+    if title is not None:
+        yield _MarkdownCue(level, title, list(sorted(words)))
 
 
-def _parse_markdown(markdown_text: str) -> Generator[_MarkdownCue, None, None]:
-    """
-    Parse markdown text into (level, title, list of words) components.
+def iterate_markdown_tree(
+    markdown_stream: TextIO,
+) -> Generator[Tuple[str, str, List[str]], None, None]:
     """
-    m = list(_collect_markdown_markers(markdown_text))
-    m.append(_MarkdownMarker(0, "root", (len(markdown_text), len(markdown_text))))
+    Iterate over the tree of headers of a markdown text.
 
-    for e, n in zip(m[:-1], m[1:]):
-        level, title, span = e.level, e.title, e.character_span
-        next_span = n.character_span
+    Yield ("open", title, []) when a header without text starts,
+    ("leaf", title, words) for a header with text and ("close", "", [])
+    when the last opened header ends.
 
-        start, end = span
-        next_start, _ = next_span
+    A header with text is a leaf. Its sub-headers are attached
+    to the closest ancestor which is not a leaf.
 
-        words = set()
-        for w in markdown_text[end:next_start].split("\n"):
-            _w = w.strip()
-            if len(_w) == 0:
-                continue
-            words.add(_w)
+    >>> import io
+    >>> markdown_text = "# A\\n## B\\nword\\n# C\\n"
+    >>> [e[0] for e in iterate_markdown_tree(io.StringIO(markdown_text))]
+    ['open', 'leaf', 'close', 'open', 'close']
+    """
+    # Levels of the headers that can still receive sub-headers. The root
+    # has level 0.
+    stack = [0]
 
-        yield _MarkdownCue(level, title, list(sorted(words)))
+    for cue in _parse_markdown(markdown_stream):
+        while stack[-1] >= cue.level:
+            stack.pop()
+            yield ("close", "", [])
+
+        title = cue.title.strip()
+        if len(cue.lines) > 0:
+            yield ("leaf", title, cue.lines)
+        else:
+            stack.append(cue.level)
+            yield ("open", title, [])
+
+    for _ in stack[1:]:
+        yield ("close", "", [])
 
 
 def create_dict_from_markdown(markdown_stream: TextIO) -> model.WordDict:
@@ -98,99 +170,173 @@ def create_dict_from_markdown(markdown_stream: TextIO) -> model.WordDict:
     closest header-level dictionary. The `words` key stores the
     lines of the text.
     """
-    cues = [_MarkdownCue(0, "root", [])]
-    cues.extend(list(_parse_markdown(markdown_stream.read())))
-    visited = [False] * len(cues)
+    root: Dict[str, Any] = {}
+    stack = [root]
+
+    # The markdown is read while it is parsed. Both are timed as parse.
+    with profiling.stage("parse"):
+        for kind, title, words in iterate_markdown_tree(markdown_stream):
+            if kind == "open":
+                node: Dict[str, Any] = {}
+                stack[-1][title] = node
+                stack.append(node)
+            elif kind == "leaf":
+                stack[-1][title] = {"words": words}
+            else:
+                stack.pop()
 
-    def _create_tree(start_index: int):
-        mc = cues[start_index]
-        if visited[start_index]:
-            return None
+    return model.WordDict({"root": root})
 
-        visited[start_index] = True
-        root: Dict[str, Any] = {mc.title.strip(): {}}
-        if len(mc.lines) > 0:
-            root[mc.title.strip()] = {"words": mc.lines}
-            return root
 
-        for index in range(start_index + 1, len(cues)):
-            c = cues[index]
-            if c.level > mc.level:
-                t = _create_tree(index)
-                if t:
-                    root[mc.title.strip()].update(t)
-            elif c.level <= mc.level:
-                return root
+_YAML_STR_TAG = "tag:yaml.org,2002:str"
+_yaml_resolver = yaml.resolver.Resolver()
 
-        return root
 
-    return model.WordDict(_create_tree(0))
+def _yaml_scalar_event(value: str) -> yaml.ScalarEvent:
+    # Strings that would be read back as another type (e.g. numbers)
+    # must be quoted by the emitter.
+    plain = _yaml_resolver.resolve(yaml.ScalarNode, value, (True, False))
+    return yaml.ScalarEvent(None, None, (plain == _YAML_STR_TAG, True), value)
 
 
-# -------------------- Correct Words --------------------
+def _iterate_yml_events(markdown_stream: TextIO):
+    yield yaml.StreamStartEvent()
+    yield yaml.DocumentStartEvent()
+    yield yaml.MappingStartEvent(None, None, True, flow_style=False)
+    yield _yaml_scalar_event("root")
+    yield yaml.MappingStartEvent(None, None, True, flow_style=False)
 
+    for kind, title, words in iterate_markdown_tree(markdown_stream):
+        if kind == "open":
+            yield _yaml_scalar_event(title)
+            yield yaml.MappingStartEvent(None, None, True, flow_style=False)
+        elif kind == "leaf":
+            yield _yaml_scalar_event(title)
+            yield yaml.MappingStartEvent(None, None, True, flow_style=False)
+            yield _yaml_scalar_event("words")
+            yield yaml.SequenceStartEvent(None, None, True, flow_style=False)
+            for word in words:
+                yield _yaml_scalar_event(word)
+            yield yaml.SequenceEndEvent()
+            yield yaml.MappingEndEvent()
+        else:
+            yield yaml.MappingEndEvent()
 
-def _get_asset(asset_relative_path: Path):
-    ASSETS_PACKAGE = "danoan.perchance_tools.assets"
+    yield yaml.MappingEndEvent()
+    yield yaml.MappingEndEvent()
+    yield yaml.DocumentEndEvent()
+    yield yaml.StreamEndEvent()
 
-    s = []
-    t = asset_relative_path
-    while t != t.parent:
-        s.append(t.name)
-        t = t.parent
-    s.reverse()
 
-    asset_dot_path = ".".join(s[:-1])
-    resource_dot_path = f"{ASSETS_PACKAGE}.{asset_dot_path}"
-    return resources.path(resource_dot_path, s[-1])
+def write_yml_from_markdown(markdown_stream: TextIO, output_stream: TextIO):
+    """
+    Convert markdown text to yml while it is read.
 
+    Each header section is written to `output_stream` as soon as the next
+    header is read, such that only the words of a single section are kept
+    in memory. The keys are written in the order they appear in the markdown.
+    Loading the yml gives the same dictionary as `create_dict_from_markdown`.
+    """
+    with profiling.stage("parse"):
+        yaml.emit(
+            _iterate_yml_events(markdown_stream),
+            output_stream,
+            Dumper=utils.YamlDumper,
+            allow_unicode=True,
+        )
 
-def _read_asset_as_text(asset_relative_path: Path):
-    asset_path = _get_asset(asset_relative_path)
-    with open(asset_path, "r") as f:
-        return f.read()
 
+# -------------------- Correct Words --------------------
 
-def _setup_llm_assistant():
-    instance = llm_assistant.LLMAssistant()
-    if not instance.config:
-        config = llm_assistant.get_configuration()
-        if not config.use_cache:
-            raise exception.CacheNotConfiguredError()
 
-        instance.setup(config)
+def _send_prompt(
+    prompt_name: str, system_prompt: str, user_prompt: str, model: str, **data
+) -> str:
+    """
+    Send a prompt to the backend through the dispatcher and return the response text.
+    """
+    prompt_texts = [system_prompt, user_prompt, *(str(x) for x in data.values())]
+
+    def _call():
+        start = time.perf_counter()
+        try:
+            response = backend.get_backend().complete(
+                prompt_name, system_prompt, user_prompt, model, **data
+            )
+        except Exception:
+            metrics.get_metrics().record_call(
+                prompt_name, model, time.perf_counter() - start, error=True
+            )
+            raise
+
+        metrics.get_metrics().record_call(
+            prompt_name,
+            model,
+            time.perf_counter() - start,
+            response.prompt_tokens or dispatch.estimate_tokens(*prompt_texts),
+            response.completion_tokens
+            or dispatch.estimate_tokens(response.content or ""),
+        )
+        return response.content
+
+    with profiling.stage("llm"):
+        return dispatch.dispatch(_call, *prompt_texts)
 
 
 def _render_correct_words_user_prompt(categories: List[str], words: List[str]):
-    template_data = _read_asset_as_text(
-        Path("prompts") / "correct_words" / "user.txt.tpl"
+    return prompts.get_registry().render(
+        "correct_words/user.txt.tpl", categories=categories, words=words
     )
-    template = Template(template_data)
 
-    return template.render(categories=categories, words=words)
 
-
-def _call_correct_word_prompt(user_prompt: str, language, model: str):
-    system_prompt = _read_asset_as_text(
-        Path("prompts") / "correct_words" / "system.txt.tpl"
-    )
-    full_examples = _read_asset_as_text(
-        Path("prompts") / "correct_words" / language.alpha_3 / "full-examples.txt"
+def _render_correct_words_batch_user_prompt(sections: List[Dict[str, List[str]]]):
+    return prompts.get_registry().render(
+        "correct_words_batch/user.txt.tpl", sections=sections
     )
 
+
+def _call_correct_words_llm(
+    prompt_name: str, system_prompt_path: str, user_prompt: str, language, model: str
+):
+    registry = prompts.get_registry()
+    full_examples_path = f"correct_words/{language.alpha_3}/full-examples.txt"
+    system_prompt = registry.get_text(system_prompt_path)
+    full_examples = registry.get_text(full_examples_path)
+
     data = {
         "language": language.name,
         "full_examples": full_examples,
     }
 
-    prompt = llm_assistant.model.PromptConfiguration(
-        "correct-words", system_prompt, user_prompt
+    def _call():
+        return _send_prompt(prompt_name, system_prompt, user_prompt, model, **data)
+
+    return cache.cached_call(
+        prompt_name,
+        user_prompt,
+        language.alpha_3,
+        language.alpha_3,
+        model,
+        registry.hash(system_prompt_path, full_examples_path),
+        _call,
+        backend.get_backend().cache_name,
     )
 
-    _setup_llm_assistant()
-    result = llm_assistant.custom(prompt, model=model, **data)
 
-    return result.content
+def _call_correct_word_prompt(user_prompt: str, language, model: str):
+    return _call_correct_words_llm(
+        "correct-words", "correct_words/system.txt.tpl", user_prompt, language, model
+    )
+
+
+def _call_correct_words_batch_prompt(user_prompt: str, language, model: str):
+    return _call_correct_words_llm(
+        "correct-words-batch",
+        "correct_words_batch/system.txt.tpl",
+        user_prompt,
+        language,
+        model,
+    )
 
 
 def _ensure_json_list_string(text_response: str):
@@ -203,36 +349,218 @@ def _ensure_json_list_string(text_response: str):
     return "".join(response_lines[first_line:])
 
 
-def _find_corrections(word_dict: model.WordDict, language, model: str):
-    for key_path in utils.collect_key_path(word_dict, "words"):
-        categories = key_path["path"]
-        render_categories = [x for x in categories]
-        render_categories.remove("root")
-        words = key_path["words"]
+def _ensure_json_object_string(text_response: str):
+    response_lines = text_response.splitlines()
+    first_line = 0
+    for i, line in enumerate(response_lines):
+        if line and line[0] == "{":
+            first_line = i
+            break
+    return "".join(response_lines[first_line:])
 
-        user_prompt = _render_correct_words_user_prompt(render_categories, words)
-        r = _call_correct_word_prompt(user_prompt, language, model)
-        r = _ensure_json_list_string(r)
 
-        try:
-            correction = {}
-            correction["key"] = categories
-            correction["replace_pairs"] = json.loads(r)
+def _get_render_categories(categories: List[str]) -> List[str]:
+    render_categories = [x for x in categories]
+    render_categories.remove("root")
+    return render_categories
 
-            if correction["replace_pairs"] and len(correction["replace_pairs"]) > 0:
-                logger.debug(categories)
-                logger.debug(correction["replace_pairs"])
 
-        except json.JSONDecodeError as ex:
-            logger.debug("Error decoding LLM response as json")
+def _find_leaf_correction(key_path: Dict[str, Any], language, model: str):
+    categories = key_path["path"]
+    render_categories = _get_render_categories(categories)
+    words = key_path["words"]
+
+    user_prompt = _render_correct_words_user_prompt(render_categories, words)
+    r = _call_correct_word_prompt(user_prompt, language, model)
+    r = _ensure_json_list_string(r)
+
+    try:
+        correction = {}
+        correction["key"] = list(categories)
+        correction["replace_pairs"] = json.loads(r)
+
+        if correction["replace_pairs"] and len(correction["replace_pairs"]) > 0:
             logger.debug(categories)
-            logger.debug(r)
-            logger.debug(ex)
-            # If an error is found while generating the JSON, I assume the list of
-            # corrections is empty
-            correction["replace_pairs"] = []
+            logger.debug(correction["replace_pairs"])
+
+    except json.JSONDecodeError as ex:
+        metrics.get_metrics().record_parse_failure("correct-words")
+        logger.debug("Error decoding LLM response as json")
+        logger.debug(categories)
+        logger.debug(r)
+        logger.debug(ex)
+        # If an error is found while generating the JSON, I assume the list of
+        # corrections is empty
+        correction["replace_pairs"] = []
+
+    return correction
+
+
+def _find_batch_corrections(
+    batch: List[Dict[str, Any]], language, model: str
+) -> List[Dict[str, Any]]:
+    if len(batch) == 1:
+        return [_find_leaf_correction(batch[0], language, model)]
+
+    sections = [
+        {"categories": _get_render_categories(x["path"]), "words": x["words"]}
+        for x in batch
+    ]
+    user_prompt = _render_correct_words_batch_user_prompt(sections)
+    r = _call_correct_words_batch_prompt(user_prompt, language, model)
+    r = _ensure_json_object_string(r)
+
+    try:
+        response = json.loads(r)
+        if type(response) is not dict:
+            raise TypeError("Expected a json object")
+    except (json.JSONDecodeError, TypeError) as ex:
+        metrics.get_metrics().record_parse_failure("correct-words-batch")
+        logger.debug("Error decoding LLM batch response. Falling back to single calls")
+        logger.debug([x["path"] for x in batch])
+        logger.debug(r)
+        logger.debug(ex)
+        return [_find_leaf_correction(x, language, model) for x in batch]
+
+    corrections = []
+    for index, key_path in enumerate(batch):
+        replace_pairs = response.get(str(index))
+        if type(replace_pairs) is not list:
+            logger.debug(f"Section {index} missing in batch response")
+            corrections.append(_find_leaf_correction(key_path, language, model))
+            continue
+
+        if len(replace_pairs) > 0:
+            logger.debug(key_path["path"])
+            logger.debug(replace_pairs)
+
+        corrections.append(
+            {"key": list(key_path["path"]), "replace_pairs": replace_pairs}
+        )
+
+    return corrections
+
+
+def _make_correction_batches(
+    key_paths: Iterable[Dict[str, Any]], batch_words: int
+) -> Generator[List[Dict[str, Any]], None, None]:
+    """
+    Group consecutive key paths such that each group has at most `batch_words` words.
 
-        yield correction
+    A key path with more words than the budget is placed alone in its group.
+
+    >>> key_paths = [{"words": ["a", "b"]}, {"words": ["c"]}, {"words": ["d", "e"]}]
+    >>> [len(x) for x in _make_correction_batches(key_paths, 3)]
+    [2, 1]
+    """
+    batch: List[Dict[str, Any]] = []
+    batch_size = 0
+    for key_path in key_paths:
+        num_words = len(key_path["words"])
+        if batch and batch_size + num_words > batch_words:
+            yield batch
+            batch = []
+            batch_size = 0
+        batch.append(key_path)
+        batch_size += num_words
+
+    if batch:
+        yield batch
+
+
+def _correct_key_paths(
+    key_paths: Iterable[Dict[str, Any]],
+    language,
+    model: str,
+    jobs: int = 1,
+    batch_words: int = 0,
+    journal: Optional[checkpoint.CorrectionJournal] = None,
+):
+    if batch_words > 0:
+        batches: Iterable[List[Dict[str, Any]]] = _make_correction_batches(
+            key_paths, batch_words
+        )
+    else:
+        batches = ([x] for x in key_paths)
+
+    def _correct_batch(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        corrections = _find_batch_corrections(batch, language, model)
+        if journal is not None:
+            for key_path, correction in zip(batch, corrections):
+                journal.append(
+                    correction["key"],
+                    checkpoint.hash_words(key_path["words"]),
+                    correction["replace_pairs"],
+                )
+        return corrections
+
+    if jobs <= 1:
+        for batch in batches:
+            for correction in _correct_batch(batch):
+                yield correction
+        return
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        # Results are yielded in submission order, which keeps the list of
+        # corrections deterministic. At most 2 * jobs batches are pending,
+        # such that the key paths are consumed as the corrections are used.
+        pending: Deque[Future] = deque()
+        for batch in batches:
+            pending.append(executor.submit(_correct_batch, batch))
+            if len(pending) >= 2 * jobs:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _find_corrections(
+    word_dict: model.WordDict,
+    language,
+    model: str,
+    jobs: int = 1,
+    batch_words: int = 0,
+    journal: Optional[checkpoint.CorrectionJournal] = None,
+):
+    key_paths = utils.collect_key_path(word_dict, "words")
+    if journal is None:
+        yield from _correct_key_paths(key_paths, language, model, jobs, batch_words)
+        return
+
+    # Categories recorded in the journal with the same words are not sent
+    # to the LLM again. Corrections are still listed in the WordDict order.
+    key_paths = list(key_paths)
+    recorded = [
+        journal.get(x["path"], checkpoint.hash_words(x["words"])) for x in key_paths
+    ]
+    pending = _correct_key_paths(
+        (x for x, r in zip(key_paths, recorded) if r is None),
+        language,
+        model,
+        jobs,
+        batch_words,
+        journal,
+    )
+    for key_path, replace_pairs in zip(key_paths, recorded):
+        if replace_pairs is None:
+            yield next(pending)
+        else:
+            yield {"key": list(key_path["path"]), "replace_pairs": replace_pairs}
+
+
+def apply_replace_pairs(
+    words: Iterable[str], replace_pairs: Sequence[Sequence[str]]
+) -> List[str]:
+    """
+    Replace the words of a category and return them sorted.
+
+    >>> apply_replace_pairs(["chien", "chatt"], [["chatt", "chat"]])
+    ['chat', 'chien']
+    """
+    set_of_words = set(words)
+    for original, correction in replace_pairs:
+        set_of_words.remove(original)
+        set_of_words.add(correction)
+    return list(sorted(set_of_words))
 
 
 def replace_words(
@@ -245,35 +573,78 @@ def replace_words(
     The ReplaceInstruction has a key and a list of replace
     pairs with old and new word.
     """
-    for instruction in correction_instructions:
-        u = word_dict
-        for category in instruction.key:
-            u = u[category]
-
-        set_of_words = set(u["words"].extract())
-        for correction_pair in instruction.replace_pairs:
-            original, correction = correction_pair
-            set_of_words.remove(original)
-            set_of_words.add(correction)
-
-        u["words"] = list(sorted(set_of_words))
+    with profiling.stage("replace"):
+        for instruction in correction_instructions:
+            word_dict.set_leaf(
+                instruction.key,
+                apply_replace_pairs(
+                    word_dict.get_leaf(instruction.key), instruction.replace_pairs
+                ),
+            )
 
     return word_dict
 
 
 def find_corrections(
-    word_dict: model.WordDict, language
+    word_dict: model.WordDict,
+    language,
+    jobs: int = 1,
+    batch_words: int = 0,
+    journal: Optional[checkpoint.CorrectionJournal] = None,
 ) -> List[model.ReplaceInstructions]:
     """
     Find typos and mispelled words in the dictionary.
 
     Runs a prompt over a LLM to find mispelled words in the WordDict and return
-    a list of ReplaceInstructions.
+    a list of ReplaceInstructions. Up to `jobs` prompts are sent concurrently.
+    The ReplaceInstructions are listed in the same order as the categories in
+    the WordDict regardless of the number of jobs.
+
+    If `batch_words` is positive, consecutive categories are packed in a single
+    prompt as long as their total number of words does not exceed `batch_words`.
+    Categories of a batch which response cannot be parsed are corrected one
+    by one.
+
+    If a `journal` is given, each correction is recorded in it as soon as it
+    is found, and the categories already recorded in the journal with the
+    same words are not sent to the LLM.
     """
-    return [
-        model.ReplaceInstructions(**x)
-        for x in _find_corrections(word_dict, language, "gpt-4o")
-    ]
+    return list(iter_corrections(word_dict, language, jobs, batch_words, journal))
+
+
+def iter_corrections(
+    word_dict: model.WordDict,
+    language,
+    jobs: int = 1,
+    batch_words: int = 0,
+    journal: Optional[checkpoint.CorrectionJournal] = None,
+) -> Iterator[model.ReplaceInstructions]:
+    """
+    Yield the ReplaceInstructions of `find_corrections` as soon as they are found.
+    """
+    for x in _find_corrections(
+        word_dict, language, CORRECT_WORDS_MODEL, jobs, batch_words, journal
+    ):
+        yield model.ReplaceInstructions(**x)
+
+
+def correct_key_paths(
+    key_paths: Iterable[Dict[str, Any]],
+    language,
+    jobs: int = 1,
+    batch_words: int = 0,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the correction of each key path as soon as it is found.
+
+    Key paths are dictionaries with the `path` and the `words` of a category,
+    as yielded by `utils.collect_key_path`. The corrections have the `key` and
+    the `replace_pairs` of the category and are yielded in the input order.
+    `jobs` and `batch_words` have the same meaning as in `find_corrections`.
+    """
+    return _correct_key_paths(
+        key_paths, language, CORRECT_WORDS_MODEL, jobs, batch_words
+    )
 
 
 # -------------------- Perchance format --------------------
@@ -285,29 +656,31 @@ def translate(word: str, from_language: str, to_language: str) -> List[str]:
 
     Runs a prompt over a LLM to get the translation.
     """
-    system_prompt_template = _read_asset_as_text(
-        Path("prompts") / "translate" / "system.txt.tpl"
-    )
-    user_prompt_template = _read_asset_as_text(
-        Path("prompts") / "translate" / "user.txt.tpl"
-    )
+    registry = prompts.get_registry()
     data = {
         "word": word,
         "from_language_name": from_language,
         "to_language_name": to_language,
     }
 
-    system_prompt = Template(system_prompt_template).render(**data)
-    user_prompt = Template(user_prompt_template).render(**data)
-
-    prompt = llm_assistant.model.PromptConfiguration(
-        "translate-word", system_prompt, user_prompt
+    model = TRANSLATE_MODEL
+
+    def _call():
+        system_prompt = registry.render("translate/system.txt.tpl", **data)
+        user_prompt = registry.render("translate/user.txt.tpl", **data)
+        return _send_prompt("translate-word", system_prompt, user_prompt, model)
+
+    response = cache.cached_call(
+        "translate-word",
+        word,
+        from_language,
+        to_language,
+        model,
+        registry.hash("translate/system.txt.tpl", "translate/user.txt.tpl"),
+        _call,
+        backend.get_backend().cache_name,
     )
 
-    _setup_llm_assistant()
-    result = llm_assistant.custom(prompt, model="gpt-3.5-turbo")
-    response = result.content
-
     if not response:
         return []
     else:
@@ -319,6 +692,112 @@ def translate(word: str, from_language: str, to_language: str) -> List[str]:
                 logger.debug("Expected a list")
                 raise TypeError()
         except json.JSONDecodeError:
+            metrics.get_metrics().record_parse_failure("translate-word")
             logger.debug("Error decoding LLM response as json")
             logger.debug(word)
             return [word]
+
+
+def _call_translate_many_prompt(
+    words: List[str], from_language: str, to_language: str, model: str
+) -> str:
+    registry = prompts.get_registry()
+    data = {
+        "words": words,
+        "from_language_name": from_language,
+        "to_language_name": to_language,
+    }
+
+    system_prompt = registry.render("translate_many/system.txt.tpl", **data)
+    user_prompt = registry.render("translate_many/user.txt.tpl", **data)
+    return _send_prompt("translate-many", system_prompt, user_prompt, model)
+
+
+def _translate_batch(
+    words: List[str], from_language: str, to_language: str, model: str
+) -> Dict[str, List[str]]:
+    response = _call_translate_many_prompt(words, from_language, to_language, model)
+    response = _ensure_json_object_string(response or "")
+
+    try:
+        response_data = json.loads(response)
+        if type(response_data) is not dict:
+            raise TypeError("Expected a json object")
+    except (json.JSONDecodeError, TypeError) as ex:
+        metrics.get_metrics().record_parse_failure("translate-many")
+        logger.debug(
+            "Error decoding LLM batch translation. Falling back to single calls"
+        )
+        logger.debug(words)
+        logger.debug(ex)
+        response_data = {}
+
+    translations = {}
+    for word in words:
+        translation = response_data.get(word)
+        if type(translation) is list and len(translation) > 0:
+            translations[word] = translation
+
+    return translations
+
+
+def translate_many(
+    words: Iterable[str],
+    from_language: str,
+    to_language: str,
+    batch_size: int = 50,
+) -> Dict[str, List[str]]:
+    """
+    Translate a collection of words from one language to another.
+
+    Repeated words are translated once. The words are sent to the LLM in
+    prompts of at most `batch_size` words. Words which translation is missing
+    in the response are translated one by one with `translate`.
+
+    Return a dictionary mapping each word to its list of translations.
+    """
+    model = TRANSLATE_MODEL
+    template_hash = prompts.get_registry().hash(
+        "translate_many/system.txt.tpl", "translate_many/user.txt.tpl"
+    )
+    response_cache = cache.get_cache()
+    backend_name = backend.get_backend().cache_name
+
+    def _make_key(word: str) -> str:
+        return cache.ResponseCache.make_key(
+            "translate-many",
+            word,
+            from_language,
+            to_language,
+            model,
+            template_hash,
+            backend_name,
+        )
+
+    translations: Dict[str, List[str]] = {}
+    missing: List[str] = []
+    for word in dict.fromkeys(words):
+        cached = None
+        if response_cache:
+            cached = response_cache.get(_make_key(word))
+            metrics.get_metrics().record_cache("translate-many", cached is not None)
+        if cached is not None:
+            translations[word] = json.loads(cached)
+        else:
+            missing.append(word)
+
+    for start in range(0, len(missing), batch_size):
+        batch = missing[start : start + batch_size]
+        batch_translations = _translate_batch(batch, from_language, to_language, model)
+        for word in batch:
+            if word in batch_translations:
+                translation = batch_translations[word]
+                if response_cache:
+                    response_cache.put(
+                        _make_key(word), "translate-many", json.dumps(translation)
+                    )
+            else:
+                translation = translate(word, from_language, to_language)
+            translations[word] = translation
+
+    return translations
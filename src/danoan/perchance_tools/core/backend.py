@@ -0,0 +1,280 @@
+from danoan.perchance_tools.core import cache, exception
+
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+@dataclass
+class LLMResponse:
+    content: str
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+
+
+class LLMBackend:
+    """
+    Interface of the services answering the prompts of the api functions.
+
+    A prompt is identified by its name, e.g. `correct-words` or
+    `translate-many`, and has a system prompt and a user prompt. Extra data
+    is used to fill the placeholders of the system prompt.
+
+    `cache_name` separates the responses of the backend in the response
+    cache. It is empty for the backends answering with the LLM, such that
+    they share their responses.
+    """
+
+    cache_name = ""
+
+    def complete(
+        self,
+        prompt_name: str,
+        system_prompt: str,
+        user_prompt: str,
+        model: str,
+        **data: Any,
+    ) -> LLMResponse:
+        raise NotImplementedError()
+
+
+class LLMAssistantBackend(LLMBackend):
+    """
+    Send the prompts with llm-assistant, configured with `llm-assistant setup`.
+    """
+
+    def __init__(self):
+        self._setup_lock = threading.Lock()
+
+    def __getstate__(self):
+        return {}
+
+    def __setstate__(self, state):
+        self._setup_lock = threading.Lock()
+
+    def _setup(self):
+        from danoan.llm_assistant.core import api as llm_assistant
+
+        with self._setup_lock:
+            instance = llm_assistant.LLMAssistant()
+            if not instance.config:
+                config = llm_assistant.get_configuration()
+                if not config.use_cache and cache.get_cache() is None:
+                    raise exception.CacheNotConfiguredError()
+
+                instance.setup(config)
+        return llm_assistant
+
+    def complete(self, prompt_name, system_prompt, user_prompt, model, **data):
+        llm_assistant = self._setup()
+        prompt = llm_assistant.model.PromptConfiguration(
+            prompt_name, system_prompt, user_prompt
+        )
+        result = llm_assistant.custom(prompt, model=model, **data)
+
+        usage = getattr(result, "usage", None)
+        return LLMResponse(
+            result.content,
+            getattr(usage, "prompt_tokens", None),
+            getattr(usage, "completion_tokens", None),
+        )
+
+
+_QUOTED_WORD = re.compile(r"<<(.*)>>")
+_BATCH_SECTION = re.compile(r"^# Section (\d+)", re.MULTILINE)
+
+
+def stub_response(prompt_name: str, user_prompt: str) -> str:
+    """
+    Valid response without corrections to the prompts of the api.
+
+    Words are translated to themselves.
+
+    >>> stub_response("translate-word", "input: <<chat>> (From French to English)")
+    '["chat"]'
+    >>> stub_response("correct-words-batch", "# Section 0\\n...\\n# Section 1\\n...")
+    '{"0": [], "1": []}'
+    """
+    if prompt_name == "translate-word":
+        return json.dumps(_QUOTED_WORD.findall(user_prompt)[:1], ensure_ascii=False)
+    elif prompt_name == "translate-many":
+        return json.dumps(
+            {x: [x] for x in _QUOTED_WORD.findall(user_prompt)}, ensure_ascii=False
+        )
+    elif prompt_name == "correct-words-batch":
+        return json.dumps({x: [] for x in _BATCH_SECTION.findall(user_prompt)})
+    return "[]"
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic local backend for tests and benchmarks.
+
+    Each prompt waits `latency` seconds, plus a random delay up to `jitter`
+    seconds drawn from a generator seeded with `seed`, and returns
+    `responder(prompt_name, user_prompt)`. By default, `stub_response`.
+    """
+
+    cache_name = "stub"
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        seed: int = 0,
+        responder: Callable[[str, str], str] = stub_response,
+    ):
+        self.latency = latency
+        self.jitter = jitter
+        self.responder = responder
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def complete(self, prompt_name, system_prompt, user_prompt, model, **data):
+        delay = self.latency
+        if self.jitter:
+            with self._lock:
+                delay += self._random.uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        return LLMResponse(self.responder(prompt_name, user_prompt))
+
+
+class ReplayMissError(Exception):
+    pass
+
+
+class RecordReplayBackend(LLMBackend):
+    """
+    Record the responses of a backend to a JSONL file and serve them back.
+
+    In `record` mode the prompts are sent to `backend` and each response is
+    appended to the recording. In `replay` mode the responses are read from
+    the recording and a prompt that was not recorded raises ReplayMissError.
+    Prompts are identified by their name, texts, model and data.
+    """
+
+    def __init__(
+        self, path: Path, mode: str = "replay", backend: Optional[LLMBackend] = None
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown mode {mode}")
+        if mode == "record" and backend is None:
+            raise ValueError("The record mode needs a backend")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.backend = backend
+        # Recorded responses are the ones of `backend`. Replayed responses may
+        # come from another model or prompt version.
+        self.cache_name = "replay"
+        if mode == "record" and backend is not None:
+            self.cache_name = backend.cache_name
+        self._responses: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        state["_responses"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(prompt_name, system_prompt, user_prompt, model, **data) -> str:
+        return cache.hash_texts(
+            prompt_name,
+            system_prompt,
+            user_prompt,
+            model,
+            json.dumps(data, sort_keys=True, ensure_ascii=False),
+        )
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            if self._responses is None:
+                self._responses = {}
+                if self.path.exists():
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        for line in f:
+                            try:
+                                record = json.loads(line)
+                                self._responses[record["key"]] = record
+                            except (json.JSONDecodeError, KeyError, TypeError):
+                                continue
+            return self._responses
+
+    def complete(self, prompt_name, system_prompt, user_prompt, model, **data):
+        key = self.make_key(prompt_name, system_prompt, user_prompt, model, **data)
+        if self.mode == "replay":
+            record = self._load().get(key)
+            if record is None:
+                raise ReplayMissError(f"No recorded response for {prompt_name}")
+            return LLMResponse(
+                record["content"],
+                record.get("prompt_tokens"),
+                record.get("completion_tokens"),
+            )
+
+        assert self.backend is not None
+        response = self.backend.complete(
+            prompt_name, system_prompt, user_prompt, model, **data
+        )
+        record = {
+            "key": key,
+            "prompt_name": prompt_name,
+            "model": model,
+            "user_prompt": user_prompt,
+            "content": response.content,
+            "prompt_tokens": response.prompt_tokens,
+            "completion_tokens": response.completion_tokens,
+        }
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        with self._lock:
+            # A single append per record, as the checkpoint journal does.
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+        return response
+
+
+_backend: Optional[LLMBackend] = None
+
+
+def get_backend() -> LLMBackend:
+    """
+    Return the backend used by the api functions. llm-assistant by default.
+    """
+    global _backend
+    if _backend is None:
+        _backend = LLMAssistantBackend()
+    return _backend
+
+
+def set_backend(backend: Optional[LLMBackend]):
+    """
+    Set the backend used by the api functions. Pass None to restore the default.
+    """
+    global _backend
+    _backend = backend
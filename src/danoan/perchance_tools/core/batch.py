@@ -0,0 +1,257 @@
+from danoan.perchance_tools.core import (
+    api,
+    backend,
+    cache,
+    dispatch,
+    log,
+    metrics,
+    profiling,
+    prompts,
+)
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import logging
+from pathlib import Path
+import shutil
+import tempfile
+import traceback
+from typing import Callable, Dict, List, Optional, TextIO, Tuple
+
+LOG_LEVEL = logging.INFO
+
+logger = logging.getLogger(__name__)
+logger.setLevel(LOG_LEVEL)
+
+# Process one input file and write its output to the stream.
+ProcessFile = Callable[[str, TextIO], None]
+
+_CacheSettings = Tuple[Path, Optional[float], Optional[int], float]
+
+
+@dataclass
+class _WorkerResult:
+    spool_filepath: Optional[Path]
+    error: Optional[str]
+    metrics: metrics.Metrics
+    stage_totals: Dict[str, float] = field(default_factory=dict)
+    stage_calls: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class FileResult:
+    filepath: str
+    output_filepath: Optional[Path] = None
+    error: Optional[str] = None
+
+
+def get_output_filepath(filepath: str, output_dir: Path, suffix: str) -> Path:
+    """
+    Return the path of the output file of `filepath` in `output_dir`.
+
+    >>> get_output_filepath("chapters/animals.md", Path("out"), ".yml")
+    PosixPath('out/animals.yml')
+    """
+    return output_dir / f"{Path(filepath).stem}{suffix}"
+
+
+def _get_cache_settings() -> Optional[_CacheSettings]:
+    response_cache = cache.get_cache()
+    if isinstance(response_cache, cache.MemoryCache):
+        # Workers do not share the memory of the parent.
+        response_cache = response_cache.cache
+    if response_cache is None:
+        return None
+    return (
+        response_cache.path,
+        response_cache.max_age_seconds,
+        response_cache.max_size_bytes,
+        response_cache.timeout,
+    )
+
+
+def _init_worker(
+    prompts_directory: Optional[Path],
+    cache_settings: Optional[_CacheSettings],
+    dispatcher_settings: dispatch.DispatcherSettings,
+    profile: bool,
+    llm_backend: backend.LLMBackend,
+    models: Tuple[str, str],
+    log_configured: bool,
+):
+    # Workers do not share the SQLite connections and prompts of the parent.
+    prompts.set_override_directory(prompts_directory)
+    if log_configured:
+        log.configure()
+    backend.set_backend(llm_backend)
+    api.set_models(*models)
+    if profile:
+        profiling.enable()
+    dispatch.set_dispatcher(dispatch.Dispatcher(dispatcher_settings))
+    if cache_settings is None:
+        cache.set_cache(None)
+    else:
+        cache.set_cache(cache.ResponseCache(*cache_settings))
+
+
+def _run_file(
+    process: ProcessFile, filepath: str, output_filepath: Path, keep_partial: bool
+):
+    # The output of a failed input file is removed, unless it is a record
+    # log whose records are valid on their own.
+    try:
+        with open(output_filepath, "w", encoding="utf-8") as f:
+            process(filepath, f)
+    except BaseException:
+        if not keep_partial:
+            output_filepath.unlink(missing_ok=True)
+        raise
+
+
+def _new_spool_filepath() -> Path:
+    with tempfile.NamedTemporaryFile(
+        prefix="perchance-tools-", suffix=".out", delete=False
+    ) as f:
+        return Path(f.name)
+
+
+def _copy_spool_file(spool_filepath: Path, output_stream: TextIO):
+    with open(spool_filepath, "r", encoding="utf-8") as f:
+        shutil.copyfileobj(f, output_stream)
+    output_stream.flush()
+
+
+def _describe_error(e: BaseException) -> str:
+    return "".join(traceback.format_exception_only(type(e), e)).strip()
+
+
+def _run_file_in_worker(
+    process: ProcessFile,
+    filepath: str,
+    output_filepath: Optional[Path],
+    keep_partial: bool,
+) -> _WorkerResult:
+    # The metrics and stage times of the file are sent back to the parent
+    # process, also when the file fails. Without an output file, the output
+    # is spooled and copied by the parent, which removes the spool file.
+    result = _WorkerResult(None, None, metrics.reset_metrics())
+    profiler = profiling.enable() if profiling.get_profiler() else None
+
+    if output_filepath is None:
+        result.spool_filepath = output_filepath = _new_spool_filepath()
+        keep_partial = True
+
+    try:
+        _run_file(process, filepath, output_filepath, keep_partial)
+    except Exception as e:
+        result.error = _describe_error(e)
+
+    if profiler:
+        result.stage_totals = profiler.totals
+        result.stage_calls = profiler.calls
+    return result
+
+
+def run(
+    process: ProcessFile,
+    list_filepath: List[str],
+    output_stream: TextIO,
+    jobs: int = 1,
+    output_dir: Optional[Path] = None,
+    suffix: str = "",
+    keep_partial: bool = False,
+) -> List[FileResult]:
+    """
+    Apply `process` to each input file.
+
+    If `output_dir` is given, the output of each input file is written in
+    its own file in `output_dir`, named after the input file with `suffix`
+    as extension. Otherwise, the outputs are concatenated to `output_stream`
+    in the order of `list_filepath`.
+
+    With `jobs` greater than one, the files are distributed over a pool of
+    processes. `process` must then be picklable, e.g. a module function or
+    a `functools.partial` of it. The output of each file is then spooled to
+    a temporary file and copied to `output_stream` once the file is done.
+    Otherwise, it is written to `output_stream` as it is produced.
+
+    A failure in one file is logged and recorded in its result. The other
+    files are processed normally. The output written by a failed file is
+    removed from its output file or spool, unless `keep_partial` is True,
+    e.g. for a log of records that are valid on their own.
+    """
+    output_filepaths: List[Optional[Path]] = [None] * len(list_filepath)
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        output_filepaths = [
+            get_output_filepath(x, output_dir, suffix) for x in list_filepath
+        ]
+        if len(set(output_filepaths)) != len(output_filepaths):
+            raise ValueError(
+                "Input files with the same name would be written to the same output file"
+            )
+
+    results = []
+    if jobs <= 1:
+        for filepath, output_filepath in zip(list_filepath, output_filepaths):
+            result = FileResult(filepath, output_filepath)
+            try:
+                if output_filepath:
+                    _run_file(process, filepath, output_filepath, keep_partial)
+                else:
+                    process(filepath, output_stream)
+            except Exception as e:
+                result.error = _describe_error(e)
+                logger.error(f"{filepath}: {result.error}")
+            results.append(result)
+        return results
+
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(
+            prompts.get_registry().override_directory,
+            _get_cache_settings(),
+            # The workers share the quota of LLM requests.
+            dispatch.get_dispatcher().settings.split(min(jobs, len(list_filepath))),
+            profiling.get_profiler() is not None,
+            backend.get_backend(),
+            (api.CORRECT_WORDS_MODEL, api.TRANSLATE_MODEL),
+            log.is_configured(),
+        ),
+    ) as executor:
+        futures = [
+            executor.submit(
+                _run_file_in_worker, process, filepath, output_filepath, keep_partial
+            )
+            for filepath, output_filepath in zip(list_filepath, output_filepaths)
+        ]
+        # Outputs are written in the input order as soon as they are available.
+        for filepath, output_filepath, future in zip(
+            list_filepath, output_filepaths, futures
+        ):
+            result = FileResult(filepath, output_filepath)
+            try:
+                worker_result = future.result()
+                result.error = worker_result.error
+                metrics.get_metrics().merge(worker_result.metrics)
+                profiler = profiling.get_profiler()
+                if profiler:
+                    profiler.merge(
+                        worker_result.stage_totals, worker_result.stage_calls
+                    )
+                spool_filepath = worker_result.spool_filepath
+                if spool_filepath is not None:
+                    try:
+                        if keep_partial or not result.error:
+                            _copy_spool_file(spool_filepath, output_stream)
+                    finally:
+                        spool_filepath.unlink(missing_ok=True)
+            except Exception as e:
+                result.error = _describe_error(e)
+
+            if result.error:
+                logger.error(f"{filepath}: {result.error}")
+            results.append(result)
+
+    return results
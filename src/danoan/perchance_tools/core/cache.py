@@ -0,0 +1,313 @@
+from danoan.perchance_tools.core import metrics
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import hashlib
+import os
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Union
+
+CACHE_ENV_VARIABLE = "PERCHANCE_TOOLS_CACHE_PATH"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    operation TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+)
+"""
+
+
+@dataclass
+class CacheStats:
+    path: Path
+    entries: int
+    size_bytes: int
+    entries_per_operation: Dict[str, int] = field(default_factory=dict)
+    oldest_access: Optional[float] = None
+    newest_access: Optional[float] = None
+
+
+def get_default_cache_path() -> Path:
+    """
+    Return the location of the cache database.
+
+    The environment variable PERCHANCE_TOOLS_CACHE_PATH has precedence over the
+    default location in the user cache folder.
+    """
+    if CACHE_ENV_VARIABLE in os.environ:
+        return Path(os.environ[CACHE_ENV_VARIABLE])
+
+    cache_home = os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")
+    return Path(cache_home) / "perchance-tools" / "responses.sqlite3"
+
+
+def hash_texts(*texts: str) -> str:
+    """
+    Return a digest identifying a sequence of texts.
+
+    >>> hash_texts("a", "bc") == hash_texts("a", "bc")
+    True
+    >>> hash_texts("a", "bc") == hash_texts("ab", "c")
+    False
+    """
+    digest = hashlib.sha256()
+    for text in texts:
+        data = text.encode("utf-8")
+        digest.update(len(data).to_bytes(8, "little"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    Persistent cache of LLM responses backed by a SQLite database.
+
+    The database is opened in WAL mode, such that several processes can
+    read and write in the same cache. Each thread uses its own connection.
+
+    Entries older than `max_age_seconds` are treated as missing. The method
+    `prune` removes them from the database and evicts the least recently
+    used entries until the cache is not larger than `max_size_bytes`.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_age_seconds: Optional[float] = None,
+        max_size_bytes: Optional[int] = None,
+        timeout: float = 30.0,
+    ):
+        self.path = Path(path)
+        self.max_age_seconds = max_age_seconds
+        self.max_size_bytes = max_size_bytes
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @staticmethod
+    def make_key(
+        operation: str,
+        input: str,
+        from_language: str,
+        to_language: str,
+        model: str,
+        template_hash: str,
+        backend_name: str = "",
+    ) -> str:
+        texts = [operation, input, from_language, to_language, model, template_hash]
+        if backend_name:
+            # Keys of the LLM backends are unchanged.
+            texts.append(backend_name)
+        return hash_texts(*texts)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[str]:
+        connection = self._connect()
+        row = connection.execute(
+            "SELECT value, created FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+
+        value, created = row
+        now = time.time()
+        if self.max_age_seconds is not None and now - created > self.max_age_seconds:
+            return None
+
+        connection.execute(
+            "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+        )
+        return value
+
+    def put(self, key: str, operation: str, value: str):
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+            (key, operation, value, len(value.encode("utf-8")), now, now),
+        )
+
+    def stats(self) -> CacheStats:
+        connection = self._connect()
+        entries, size_bytes, oldest, newest = connection.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(accessed), MAX(accessed) "
+            "FROM responses"
+        ).fetchone()
+        per_operation = connection.execute(
+            "SELECT operation, COUNT(*) FROM responses GROUP BY operation "
+            "ORDER BY operation"
+        ).fetchall()
+
+        return CacheStats(
+            self.path, entries, size_bytes, dict(per_operation), oldest, newest
+        )
+
+    def prune(
+        self,
+        max_age_seconds: Optional[float] = None,
+        max_size_bytes: Optional[int] = None,
+    ) -> int:
+        """
+        Evict expired entries and least recently used entries above the size limit.
+
+        Return the number of removed entries. The limits given at construction
+        are used when the arguments are not given.
+        """
+        if max_age_seconds is None:
+            max_age_seconds = self.max_age_seconds
+        if max_size_bytes is None:
+            max_size_bytes = self.max_size_bytes
+
+        connection = self._connect()
+        removed = 0
+        if max_age_seconds is not None:
+            cursor = connection.execute(
+                "DELETE FROM responses WHERE created < ?",
+                (time.time() - max_age_seconds,),
+            )
+            removed += cursor.rowcount
+
+        if max_size_bytes is not None:
+            to_remove: List[str] = []
+            total_size = 0
+            for key, size in connection.execute(
+                "SELECT key, size FROM responses ORDER BY accessed DESC"
+            ):
+                total_size += size
+                if total_size > max_size_bytes:
+                    to_remove.append(key)
+
+            for key in to_remove:
+                connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            removed += len(to_remove)
+
+        if removed > 0:
+            connection.execute("VACUUM")
+
+        return removed
+
+    def clear(self):
+        connection = self._connect()
+        connection.execute("DELETE FROM responses")
+        connection.execute("VACUUM")
+
+
+class MemoryCache:
+    """
+    Most recently used LLM responses kept in memory in front of a ResponseCache.
+
+    Long-running processes answer repeated prompts without querying the
+    database. Without a `cache`, the responses are only kept in memory.
+    """
+
+    make_key = staticmethod(ResponseCache.make_key)
+
+    def __init__(self, cache: Optional[ResponseCache] = None, max_entries: int = 10000):
+        self.cache = cache
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+
+        if self.cache is None:
+            return None
+        value = self.cache.get(key)
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def put(self, key: str, operation: str, value: str):
+        self._remember(key, value)
+        if self.cache is not None:
+            self.cache.put(key, operation, value)
+
+    def _remember(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+_cache: Optional[Union[ResponseCache, MemoryCache]] = None
+_cache_configured = False
+
+
+def get_cache() -> Optional[Union[ResponseCache, MemoryCache]]:
+    """
+    Return the cache used by the api functions.
+
+    The cache at the default location is created at the first call. It
+    returns None if the cache was disabled with `set_cache(None)`.
+    """
+    global _cache, _cache_configured
+    if not _cache_configured:
+        _cache = ResponseCache(get_default_cache_path())
+        _cache_configured = True
+    return _cache
+
+
+def set_cache(cache: Optional[Union[ResponseCache, MemoryCache]]):
+    """
+    Set the cache used by the api functions. Pass None to disable caching.
+    """
+    global _cache, _cache_configured
+    _cache = cache
+    _cache_configured = True
+
+
+def cached_call(
+    operation: str,
+    input: str,
+    from_language: str,
+    to_language: str,
+    model: str,
+    template_hash: str,
+    call,
+    backend_name: str = "",
+) -> str:
+    """
+    Return the cached response of `call` or execute it and cache its response.
+
+    The response is identified by the operation, its input, the language pair,
+    the LLM model, the hash of the prompt templates and the `cache_name` of
+    the backend answering the prompt.
+    """
+    cache = get_cache()
+    if cache is None:
+        return call()
+
+    key = ResponseCache.make_key(
+        operation, input, from_language, to_language, model, template_hash, backend_name
+    )
+    value = cache.get(key)
+    metrics.get_metrics().record_cache(operation, value is not None)
+    if value is not None:
+        return value
+
+    value = call()
+    if value:
+        cache.put(key, operation, value)
+    return value
@@ -0,0 +1,106 @@
+from danoan.perchance_tools.core import cache, model
+
+import json
+import os
+from pathlib import Path
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+def hash_words(words: Iterable[str]) -> str:
+    """
+    Return a digest identifying the words of a category.
+
+    >>> hash_words(["a", "b"]) == hash_words(("a", "b"))
+    True
+    >>> hash_words(["a", "b"]) == hash_words(["b", "a"])
+    False
+    """
+    return cache.hash_texts(*words)
+
+
+def format_record(
+    key: Sequence[str],
+    words_hash: str,
+    replace_pairs: List[Any],
+    source: Optional[str] = None,
+) -> str:
+    """
+    Return the JSONL line recording the correction of a category.
+
+    The name of the `source` file of the category is recorded if it is given.
+
+    >>> format_record(["root", "A"], "x", [["chatt", "chat"]])
+    '{"key": ["root", "A"], "words_hash": "x", "replace_pairs": [["chatt", "chat"]]}\\n'
+    """
+    record: Dict[str, Any] = {
+        "key": list(key),
+        "words_hash": words_hash,
+        "replace_pairs": replace_pairs,
+    }
+    if source is not None:
+        record["file"] = source
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+class CorrectionJournal:
+    """
+    Append-only JSONL journal of the corrections found for each category.
+
+    Each line records the key path of a category, the hash of its words and
+    the replace pairs returned by the LLM:
+
+        {"key": ["root", "A"], "words_hash": "...", "replace_pairs": [...]}
+
+    A record is written as soon as the correction is found. Records are
+    identified by their key and words hash, such that a category is only
+    replayed if its words did not change. When a record is repeated, the
+    last one is kept. Incomplete lines left by an interrupted run are ignored.
+
+    Each record is written with a single append, such that several threads
+    or processes can share a journal.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._entries: Dict[Tuple[model.KeyPath, str], List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def load(self) -> "CorrectionJournal":
+        """
+        Read the records already written in the journal.
+        """
+        if not self.path.exists():
+            return self
+
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    key = (tuple(record["key"]), record["words_hash"])
+                    replace_pairs = record["replace_pairs"]
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    continue
+                self._entries[key] = replace_pairs
+        return self
+
+    def get(self, key: Sequence[str], words_hash: str) -> Optional[List[Any]]:
+        """
+        Return the replace pairs recorded for a category or None.
+        """
+        return self._entries.get((tuple(key), words_hash))
+
+    def append(self, key: Sequence[str], words_hash: str, replace_pairs: List[Any]):
+        line = format_record(key, words_hash, replace_pairs).encode("utf-8")
+
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, line)
+            finally:
+                os.close(fd)
+            self._entries[(tuple(key), words_hash)] = replace_pairs
@@ -0,0 +1,266 @@
+from dataclasses import dataclass
+import logging
+import random
+import threading
+import time
+from typing import Any, Callable, Optional, TypeVar
+
+LOG_LEVEL = logging.INFO
+
+logger = logging.getLogger(__name__)
+logger.setLevel(LOG_LEVEL)
+
+T = TypeVar("T")
+
+_TRANSIENT_STATUS_CODES = {408, 409, 500, 502, 503, 504}
+_TRANSIENT_ERROR_NAMES = ("Timeout", "APIConnectionError", "InternalServerError")
+
+
+def estimate_tokens(*texts: str) -> int:
+    """
+    Rough number of tokens of a prompt, assuming four characters per token.
+
+    >>> estimate_tokens("abcd" * 10, "ab")
+    11
+    """
+    return sum(len(x) for x in texts) // 4 + 1
+
+
+def _get_status_code(e: BaseException) -> Optional[int]:
+    status_code = getattr(e, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(e, "response", None), "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def is_rate_limit_error(e: BaseException) -> bool:
+    return _get_status_code(e) == 429 or "RateLimit" in type(e).__name__
+
+
+def is_transient_error(e: BaseException) -> bool:
+    """
+    Tell if an error of the LLM provider is worth retrying.
+    """
+    if is_rate_limit_error(e) or isinstance(e, (ConnectionError, TimeoutError)):
+        return True
+    if _get_status_code(e) in _TRANSIENT_STATUS_CODES:
+        return True
+    return any(x in type(e).__name__ for x in _TRANSIENT_ERROR_NAMES)
+
+
+def _get_retry_after(e: BaseException) -> Optional[float]:
+    headers = getattr(getattr(e, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate_per_minute` tokens per minute.
+
+    The bucket holds at most `capacity` tokens, one minute of quota by
+    default. A request larger than the capacity is served when the bucket
+    is full and leaves the bucket in debt.
+    """
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._clock = clock
+        self._tokens = self.capacity
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take `amount` tokens and return the number of seconds to wait before using them.
+        """
+        with self._lock:
+            self._refill()
+            needed = min(amount, self.capacity)
+            wait = max(0.0, (needed - self._tokens) / self.rate)
+            self._tokens -= amount
+            return wait
+
+
+class _AdaptiveLimit:
+    """
+    Limit of concurrent calls with additive increase and multiplicative decrease.
+
+    The limit is unbounded until the first rate limit error, unless a
+    `maximum` is given.
+    """
+
+    def __init__(self, maximum: Optional[int] = None):
+        self.maximum = maximum
+        self.limit: Optional[float] = maximum
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self.limit is not None and self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    def release(self):
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def on_success(self):
+        with self._condition:
+            if self.limit is None:
+                return
+            self.limit += 1 / self.limit
+            if self.maximum is not None:
+                self.limit = min(self.limit, self.maximum)
+            self._condition.notify()
+
+    def on_rate_limit(self):
+        with self._condition:
+            current = self.limit if self.limit is not None else self.in_flight
+            self.limit = max(1.0, current / 2)
+
+
+@dataclass
+class DispatcherSettings:
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+    max_concurrency: Optional[int] = None
+    max_retries: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def split(self, parts: int) -> "DispatcherSettings":
+        """
+        Return the settings of one of `parts` processes sharing the quota.
+        """
+        return DispatcherSettings(
+            self.requests_per_minute / parts if self.requests_per_minute else None,
+            self.tokens_per_minute / parts if self.tokens_per_minute else None,
+            max(1, self.max_concurrency // parts) if self.max_concurrency else None,
+            self.max_retries,
+            self.base_delay,
+            self.max_delay,
+        )
+
+
+class Dispatcher:
+    """
+    Send the LLM calls within the quota of the provider.
+
+    Each call takes one token of the requests bucket and its estimated number
+    of tokens from the tokens bucket. Transient errors are retried up to
+    `max_retries` times after a random delay of at most `base_delay * 2**n`
+    seconds, or the delay requested by the provider. Rate limit errors also
+    halve the number of concurrent calls, which then grows back by one per
+    round of successful calls.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[DispatcherSettings] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.settings = settings or DispatcherSettings()
+        self._sleep = sleep
+        self._requests = (
+            TokenBucket(self.settings.requests_per_minute, clock=clock)
+            if self.settings.requests_per_minute
+            else None
+        )
+        self._tokens = (
+            TokenBucket(self.settings.tokens_per_minute, clock=clock)
+            if self.settings.tokens_per_minute
+            else None
+        )
+        self._limit = _AdaptiveLimit(self.settings.max_concurrency)
+
+    @property
+    def concurrency_limit(self) -> Optional[float]:
+        return self._limit.limit
+
+    def _wait_for_quota(self, estimated_tokens: int):
+        wait = 0.0
+        if self._requests:
+            wait = max(wait, self._requests.reserve(1))
+        if self._tokens:
+            wait = max(wait, self._tokens.reserve(estimated_tokens))
+        if wait > 0:
+            self._sleep(wait)
+
+    def _get_delay(self, attempt: int, e: BaseException) -> float:
+        retry_after = _get_retry_after(e)
+        if retry_after is not None:
+            return min(retry_after, self.settings.max_delay)
+        ceiling = min(self.settings.max_delay, self.settings.base_delay * 2**attempt)
+        return random.uniform(0, ceiling)
+
+    def call(self, func: Callable[[], T], estimated_tokens: int = 0) -> T:
+        attempt = 0
+        while True:
+            self._limit.acquire()
+            try:
+                self._wait_for_quota(estimated_tokens)
+                result = func()
+            except Exception as e:
+                if not is_transient_error(e) or attempt >= self.settings.max_retries:
+                    raise
+                if is_rate_limit_error(e):
+                    self._limit.on_rate_limit()
+                delay = self._get_delay(attempt, e)
+                logger.info(
+                    f"{type(e).__name__} from the LLM provider. Retrying in {delay:.1f}s."
+                )
+            else:
+                self._limit.on_success()
+                return result
+            finally:
+                self._limit.release()
+
+            self._sleep(delay)
+            attempt += 1
+
+
+_dispatcher: Optional[Dispatcher] = None
+
+
+def get_dispatcher() -> Dispatcher:
+    """
+    Return the dispatcher used by the api functions.
+    """
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = Dispatcher()
+    return _dispatcher
+
+
+def set_dispatcher(dispatcher: Optional[Dispatcher]):
+    """
+    Set the dispatcher used by the api functions. Pass None to restore the default.
+    """
+    global _dispatcher
+    _dispatcher = dispatcher
+
+
+def dispatch(func: Callable[[], Any], *prompt_texts: str) -> Any:
+    """
+    Send an LLM call through the current dispatcher.
+    """
+    return get_dispatcher().call(func, estimate_tokens(*prompt_texts))
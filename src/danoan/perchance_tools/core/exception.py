@@ -1,2 +1,9 @@
 class CacheNotConfiguredError(Exception):
-    pass
+    def __init__(
+        self,
+        message: str = (
+            "The cache for LLM calls is not configured. Please setup"
+            " the llm-assistant with llm-assistant setup before proceeding"
+        ),
+    ):
+        super().__init__(message)
@@ -0,0 +1,25 @@
+import logging
+import sys
+
+# Parent of the loggers of the modules of the package.
+LOGGER_NAME = "danoan.perchance_tools"
+
+
+def configure():
+    """
+    Print the log messages of the package to the standard error.
+
+    Modules only create their loggers. The handler is installed once by the
+    command line, such that importing the package has no side effect.
+    """
+    logger = logging.getLogger(LOGGER_NAME)
+    if logger.handlers:
+        return
+
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+    logger.addHandler(handler)
+
+
+def is_configured() -> bool:
+    return bool(logging.getLogger(LOGGER_NAME).handlers)
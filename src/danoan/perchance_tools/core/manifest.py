@@ -0,0 +1,132 @@
+from danoan.perchance_tools.core import api, backend, cache, prompts
+
+from dataclasses import dataclass, field
+import hashlib
+from importlib import metadata
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def get_tool_version() -> str:
+    try:
+        return metadata.version("perchance-tools")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def hash_file(filepath: Path) -> str:
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_correction_dependencies(language) -> str:
+    """
+    Return a digest of everything, besides its input, a correction depends on.
+
+    The active backend is part of it, such that the outputs of the stub or
+    replay backend are not taken for the responses of the LLM.
+    """
+    registry = prompts.get_registry()
+    return cache.hash_texts(
+        get_tool_version(),
+        backend.get_backend().cache_name,
+        language.alpha_3,
+        api.CORRECT_WORDS_MODEL,
+        registry.hash(
+            "correct_words/system.txt.tpl",
+            "correct_words/user.txt.tpl",
+            "correct_words_batch/system.txt.tpl",
+            "correct_words_batch/user.txt.tpl",
+            f"correct_words/{language.alpha_3}/full-examples.txt",
+        ),
+    )
+
+
+def get_conversion_dependencies() -> str:
+    """
+    Return a digest of everything, besides its input, a conversion depends on.
+    """
+    registry = prompts.get_registry()
+    return cache.hash_texts(
+        get_tool_version(),
+        backend.get_backend().cache_name,
+        api.TRANSLATE_MODEL,
+        registry.hash(
+            "translate/system.txt.tpl",
+            "translate/user.txt.tpl",
+            "translate_many/system.txt.tpl",
+            "translate_many/user.txt.tpl",
+        ),
+    )
+
+
+@dataclass
+class InputRecord:
+    """
+    Hashes of an input file and of the outputs of each build stage.
+    """
+
+    source: str
+    yml: Optional[str] = None
+    corrected: Optional[str] = None
+    perchance: Optional[str] = None
+
+
+@dataclass
+class Manifest:
+    """
+    State of the last build of a directory.
+
+    The manifest records the tool version, the digest of the dependencies of
+    each stage and, for each input file, the hashes of the input and of its
+    outputs. A stage only has to run again if its input or its dependencies
+    changed.
+    """
+
+    tool_version: str = ""
+    correction_dependencies: str = ""
+    conversion_dependencies: str = ""
+    inputs: Dict[str, InputRecord] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, filepath: Path) -> "Manifest":
+        """
+        Read a manifest. Return an empty manifest if the file is missing or invalid.
+        """
+        try:
+            with open(filepath, "r") as f:
+                data = json.load(f)
+            if data.get("manifest_version") != MANIFEST_VERSION:
+                return cls()
+            return cls(
+                data["tool_version"],
+                data["correction_dependencies"],
+                data["conversion_dependencies"],
+                {k: InputRecord(**v) for k, v in data["inputs"].items()},
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return cls()
+
+    def save(self, filepath: Path):
+        """
+        Write the manifest. The previous manifest is replaced atomically.
+        """
+        data = {
+            "manifest_version": MANIFEST_VERSION,
+            "tool_version": self.tool_version,
+            "correction_dependencies": self.correction_dependencies,
+            "conversion_dependencies": self.conversion_dependencies,
+            "inputs": {k: v.__dict__ for k, v in sorted(self.inputs.items())},
+        }
+        temporary_filepath = filepath.with_name(f".{filepath.name}.tmp")
+        with open(temporary_filepath, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(temporary_filepath, filepath)
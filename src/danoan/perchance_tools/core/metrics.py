@@ -0,0 +1,193 @@
+from dataclasses import dataclass, field
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Price in USD per million of prompt and completion tokens.
+MODEL_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.5, 10.0),
+    "gpt-3.5-turbo": (0.5, 1.5),
+}
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> Optional[float]:
+    """
+    Return the nearest-rank `p`-th percentile of a sorted sequence.
+
+    >>> percentile([1, 2, 3, 4], 50)
+    2
+    >>> percentile([1, 2, 3, 4], 99)
+    4
+    >>> percentile([], 50) is None
+    True
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1e6
+
+
+@dataclass
+class CallStats:
+    calls: int = 0
+    errors: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latencies: List[float] = field(default_factory=list)
+
+    def merge(self, other: "CallStats"):
+        self.calls += other.calls
+        self.errors += other.errors
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.latencies.extend(other.latencies)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+
+    def merge(self, other: "CacheStats"):
+        self.hits += other.hits
+        self.misses += other.misses
+
+
+class Metrics:
+    """
+    Counters of the LLM calls, cache lookups and invalid LLM responses.
+
+    Calls are counted per operation and model. The number of tokens is the
+    one reported by the LLM backend, or an estimate when it is not reported.
+    """
+
+    def __init__(self):
+        self.calls: Dict[Tuple[str, str], CallStats] = {}
+        self.cache: Dict[str, CacheStats] = {}
+        self.parse_failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record_call(
+        self,
+        operation: str,
+        model: str,
+        latency: float,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        error: bool = False,
+    ):
+        with self._lock:
+            stats = self.calls.setdefault((operation, model), CallStats())
+            stats.calls += 1
+            stats.errors += int(error)
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.latencies.append(latency)
+
+    def record_cache(self, operation: str, hit: bool):
+        with self._lock:
+            stats = self.cache.setdefault(operation, CacheStats())
+            if hit:
+                stats.hits += 1
+            else:
+                stats.misses += 1
+
+    def record_parse_failure(self, operation: str):
+        with self._lock:
+            self.parse_failures[operation] = self.parse_failures.get(operation, 0) + 1
+
+    def merge(self, other: "Metrics"):
+        """
+        Add the counters of `other`, e.g. the metrics of a worker process.
+        """
+        with self._lock:
+            for key, call_stats in other.calls.items():
+                self.calls.setdefault(key, CallStats()).merge(call_stats)
+            for operation, cache_stats in other.cache.items():
+                self.cache.setdefault(operation, CacheStats()).merge(cache_stats)
+            for operation, count in other.parse_failures.items():
+                self.parse_failures[operation] = (
+                    self.parse_failures.get(operation, 0) + count
+                )
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def report(self) -> Dict[str, Any]:
+        """
+        Return the metrics as a json serializable dictionary.
+        """
+        with self._lock:
+            calls = []
+            total_cost = 0.0
+            for (operation, model), stats in sorted(self.calls.items()):
+                latencies = sorted(stats.latencies)
+                cost = estimate_cost(
+                    model, stats.prompt_tokens, stats.completion_tokens
+                )
+                total_cost += cost
+                calls.append(
+                    {
+                        "operation": operation,
+                        "model": model,
+                        "calls": stats.calls,
+                        "errors": stats.errors,
+                        "prompt_tokens": stats.prompt_tokens,
+                        "completion_tokens": stats.completion_tokens,
+                        "latency_seconds": {
+                            "mean": (
+                                sum(latencies) / len(latencies) if latencies else None
+                            ),
+                            "p50": percentile(latencies, 50),
+                            "p90": percentile(latencies, 90),
+                            "p99": percentile(latencies, 99),
+                            "max": latencies[-1] if latencies else None,
+                        },
+                        "estimated_cost_usd": cost,
+                    }
+                )
+
+            cache = {}
+            for operation, cache_stats in sorted(self.cache.items()):
+                lookups = cache_stats.hits + cache_stats.misses
+                cache[operation] = {
+                    "hits": cache_stats.hits,
+                    "misses": cache_stats.misses,
+                    "hit_rate": cache_stats.hits / lookups if lookups else None,
+                }
+
+            return {
+                "calls": calls,
+                "cache": cache,
+                "parse_failures": dict(sorted(self.parse_failures.items())),
+                "estimated_cost_usd": total_cost,
+            }
+
+
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """
+    Return the metrics collected by the api functions.
+    """
+    return _metrics
+
+
+def reset_metrics() -> Metrics:
+    """
+    Start a new collection of metrics and return it.
+    """
+    global _metrics
+    _metrics = Metrics()
+    return _metrics
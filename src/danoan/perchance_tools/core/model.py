@@ -1,5 +1,60 @@
+from danoan.perchance_tools.core import profiling
+
+from array import array
 from dataclasses import dataclass
-from typing import List, Tuple
+import sys
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+KeyPath = Tuple[str, ...]
+
+# Items of a depth-first traversal of a mapping: a category opens, a value
+# or a category closes.
+OPEN = "open"
+VALUE = "value"
+CLOSE = "close"
+Item = Tuple[str, Optional[str], Any]
+
+
+def _index_containers(data: Any, target_key: str) -> Dict[KeyPath, Dict[str, Any]]:
+    """
+    Map the key path of every dictionary having the `target_key` to the dictionary.
+
+    The paths are listed in depth-first order.
+
+    >>> d = {"root": {"A": {"words": ["a"]}, "B": {"C": {"words": ["c"]}}}}
+    >>> list(_index_containers(d, "words"))
+    [('root', 'A'), ('root', 'B', 'C')]
+    """
+    index: Dict[KeyPath, Dict[str, Any]] = {}
+    if type(data) is not dict:
+        return index
+
+    stack: List[Tuple[KeyPath, Iterator[Tuple[str, Any]], Dict[str, Any]]] = [
+        ((), iter(data.items()), data)
+    ]
+    while stack:
+        path, items, container = stack[-1]
+        item = next(items, None)
+        if item is None:
+            stack.pop()
+            continue
+
+        key, value = item
+        if key == target_key:
+            index[path] = container
+        elif type(value) is dict:
+            stack.append(((*path, key), iter(value.items()), value))
+    return index
 
 
 class WordDict:
@@ -28,14 +83,23 @@ class WordDict:
     }
     """
 
+    __slots__ = ("_data", "_root", "_path", "_indexes")
+
     def __init__(self, source_data):
         self._data = source_data
+        self._root = self
+        self._path: KeyPath = ()
+        self._indexes: Dict[str, Dict[KeyPath, Dict[str, Any]]] = {}
 
     def __getitem__(self, key):
-        return WordDict(self._data[key])
+        child = WordDict(self._data[key])
+        child._root = self._root
+        child._path = (*self._path, key)
+        return child
 
     def __setitem__(self, key, value):
         self._data[key] = value
+        self._root._update_indexes(self._path, key)
 
     def __str__(self):
         return self._data.__str__()
@@ -43,6 +107,351 @@ class WordDict:
     def extract(self):
         return self._data
 
+    def _update_indexes(self, path: KeyPath, key: str):
+        # Replacing the value of a target key in an indexed dictionary keeps
+        # the index valid. Any other assignment may change the structure.
+        for target_key in list(self._indexes):
+            if key != target_key or path not in self._indexes[target_key]:
+                del self._indexes[target_key]
+
+    def _get_index(self, target_key: str) -> Dict[KeyPath, Dict[str, Any]]:
+        if self._root is not self:
+            with profiling.stage("traverse"):
+                return _index_containers(self._data, target_key)
+
+        if target_key not in self._indexes:
+            with profiling.stage("traverse"):
+                self._indexes[target_key] = _index_containers(self._data, target_key)
+        return self._indexes[target_key]
+
+    def iter_key_paths(
+        self, target_key: str = "words"
+    ) -> Iterator[Tuple[KeyPath, Any]]:
+        """
+        Iterate over the key paths leading to `target_key` and their values.
+
+        The index from key paths to values is built at the first call and kept
+        until the structure of the WordDict changes.
+        """
+        index = self._get_index(target_key)
+        for path, container in index.items():
+            yield path, container[target_key]
+
+    def get_leaf(self, path: Sequence[str], target_key: str = "words") -> Any:
+        return self._get_index(target_key)[tuple(path)][target_key]
+
+    def set_leaf(self, path: Sequence[str], value: Any, target_key: str = "words"):
+        self._get_index(target_key)[tuple(path)][target_key] = value
+
+
+class _StringPool:
+    """
+    Append-only pool of strings stored as utf-8 in a single buffer.
+
+    Each distinct string is stored once and identified by its index. The
+    index from string to identifier is only needed to add strings. It can be
+    released to save memory and it is rebuilt when a string is added again.
+    """
+
+    __slots__ = ("_buffer", "_offsets", "_index")
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._offsets = array("Q", [0])
+        self._index: Optional[Dict[str, int]] = {}
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def intern(self, s: str) -> int:
+        if self._index is None:
+            self._index = {self.get(i): i for i in range(len(self))}
+
+        identifier = self._index.get(s)
+        if identifier is None:
+            identifier = len(self)
+            self._buffer.extend(s.encode("utf-8"))
+            self._offsets.append(len(self._buffer))
+            self._index[s] = identifier
+        return identifier
+
+    def get(self, identifier: int) -> str:
+        start = self._offsets[identifier]
+        end = self._offsets[identifier + 1]
+        return self._buffer[start:end].decode("utf-8")
+
+    def release_index(self):
+        self._index = None
+
+
+_MAPPING = 0
+_WORDS = 1
+_VALUE = 2
+
+
+class _CompactStore:
+    """
+    Flat table of the nodes of a CompactWordDict.
+
+    A node is a mapping from category names to node identifiers, a list
+    of words stored as identifiers in the string pool or any other value.
+    """
+
+    __slots__ = ("pool", "kinds", "payloads", "root", "indexes")
+
+    def __init__(self):
+        self.pool = _StringPool()
+        self.kinds = bytearray()
+        self.payloads: List[Any] = []
+        self.root = 0
+        # Map a target key to the key paths of the nodes having it and to
+        # the set of these nodes.
+        self.indexes: Dict[str, Tuple[Dict[KeyPath, int], Set[int]]] = {}
+
+    def _is_words(self, value: Any) -> bool:
+        return type(value) is list and all(type(x) is str for x in value)
+
+    def _new_node(self, value: Any) -> int:
+        if type(value) is dict:
+            self.kinds.append(_MAPPING)
+            self.payloads.append({})
+        elif self._is_words(value):
+            self.kinds.append(_WORDS)
+            self.payloads.append(array("I", [self.pool.intern(x) for x in value]))
+        else:
+            self.kinds.append(_VALUE)
+            self.payloads.append(value)
+        return len(self.payloads) - 1
+
+    def add(self, value: Any) -> int:
+        """
+        Add a value to the table and return the identifier of its node.
+        """
+        root = self._new_node(value)
+        stack = [(root, value)] if type(value) is dict else []
+        while stack:
+            node, data = stack.pop()
+            children = self.payloads[node]
+            for key, child_value in data.items():
+                child = self._new_node(child_value)
+                children[sys.intern(str(key))] = child
+                if type(child_value) is dict:
+                    stack.append((child, child_value))
+        return root
+
+    def add_items(self, items: Iterable[Item]) -> int:
+        """
+        Add a mapping described by `items` and return the identifier of its node.
+        """
+        root = self._new_node({})
+        stack = [root]
+        for kind, key, value in items:
+            if kind == CLOSE:
+                stack.pop()
+                continue
+
+            child = self._new_node({} if kind == OPEN else value)
+            self.payloads[stack[-1]][sys.intern(str(key))] = child
+            if kind == OPEN:
+                stack.append(child)
+        return root
+
+    def iter_items(self, node: int, sort_keys: bool = False) -> Iterator[Item]:
+        def _children(node: int):
+            children = self.payloads[node].items()
+            return iter(sorted(children) if sort_keys else children)
+
+        stack = [_children(node)]
+        while stack:
+            item = next(stack[-1], None)
+            if item is None:
+                stack.pop()
+                if stack:
+                    yield (CLOSE, None, None)
+                continue
+
+            key, child = item
+            if self.kinds[child] == _MAPPING:
+                yield (OPEN, key, None)
+                stack.append(_children(child))
+            else:
+                yield (VALUE, key, self.extract(child))
+
+    def set_child(self, node: int, key: str, value: Any):
+        for target_key in list(self.indexes):
+            if key != target_key or node not in self.indexes[target_key][1]:
+                del self.indexes[target_key]
+
+        children = self.payloads[node]
+        child = children.get(key)
+        if child is not None and self.kinds[child] == _WORDS and self._is_words(value):
+            # Words are replaced in place. That is the frequent update.
+            self.payloads[child] = array("I", [self.pool.intern(x) for x in value])
+        else:
+            # The previous node, if any, is left unreferenced in the table.
+            children[sys.intern(str(key))] = self.add(value)
+
+    def index_containers(self, node: int, target_key: str) -> Dict[KeyPath, int]:
+        index: Dict[KeyPath, int] = {}
+        if self.kinds[node] != _MAPPING:
+            return index
+
+        stack: List[Tuple[KeyPath, Iterator[Tuple[str, int]], int]] = [
+            ((), iter(self.payloads[node].items()), node)
+        ]
+        while stack:
+            path, items, container = stack[-1]
+            item = next(items, None)
+            if item is None:
+                stack.pop()
+                continue
+
+            key, child = item
+            if key == target_key:
+                index[path] = container
+            elif self.kinds[child] == _MAPPING:
+                stack.append(((*path, key), iter(self.payloads[child].items()), child))
+        return index
+
+    def get_index(self, node: int, target_key: str) -> Dict[KeyPath, int]:
+        if node != self.root:
+            with profiling.stage("traverse"):
+                return self.index_containers(node, target_key)
+
+        if target_key not in self.indexes:
+            with profiling.stage("traverse"):
+                index = self.index_containers(node, target_key)
+            self.indexes[target_key] = (index, set(index.values()))
+        return self.indexes[target_key][0]
+
+    def extract(self, node: int) -> Any:
+        kind = self.kinds[node]
+        if kind == _WORDS:
+            return [self.pool.get(x) for x in self.payloads[node]]
+        elif kind == _VALUE:
+            return self.payloads[node]
+
+        root: Dict[str, Any] = {}
+        stack = [(node, root)]
+        while stack:
+            node, data = stack.pop()
+            for key, child in self.payloads[node].items():
+                if self.kinds[child] == _MAPPING:
+                    data[key] = {}
+                    stack.append((child, data[key]))
+                else:
+                    data[key] = self.extract(child)
+        return root
+
+
+class CompactWordDict(WordDict):
+    """
+    Memory efficient alternative to WordDict.
+
+    It has the same interface of WordDict, but the data is stored
+    in a flat table of nodes. The words are stored once in an
+    utf-8 string pool and categories refer to them by their index
+    in the pool.
+
+    Values are materialized as dictionaries and lists only when
+    `extract` is called.
+
+    >>> d = {"root": {"A": {"words": ["b", "a"]}, "B": {"words": ["a"]}}}
+    >>> w = CompactWordDict(d)
+    >>> w["root"]["A"]["words"].extract()
+    ['b', 'a']
+    >>> w["root"]["B"]["words"] = ["c"]
+    >>> w.extract() == {"root": {"A": {"words": ["b", "a"]}, "B": {"words": ["c"]}}}
+    True
+    """
+
+    __slots__ = ("_store", "_node")
+
+    def __init__(self, source_data):
+        # The data lives in the store. The attributes of WordDict are unused.
+        super().__init__(None)
+        self._store = _CompactStore()
+        self._node = self._store.add(source_data)
+        self._store.root = self._node
+        # The string index is only rebuilt if words are assigned.
+        self._store.pool.release_index()
+
+    @classmethod
+    def _view(cls, store: _CompactStore, node: int) -> "CompactWordDict":
+        view = cls.__new__(cls)
+        view._store = store
+        view._node = node
+        return view
+
+    @classmethod
+    def from_items(cls, items: Iterable[Item]) -> "CompactWordDict":
+        """
+        Create a CompactWordDict from the items of a depth-first traversal.
+
+        The items are added as they are read, such that the source is never
+        materialized as a dictionary.
+
+        >>> items = [("open", "root", None), ("value", "words", ["a"])]
+        >>> CompactWordDict.from_items(items + [("close", None, None)]).extract()
+        {'root': {'words': ['a']}}
+        """
+        store = _CompactStore()
+        root = store.add_items(items)
+        store.root = root
+        store.pool.release_index()
+        return cls._view(store, root)
+
+    def is_mapping(self) -> bool:
+        """
+        Tell if the data is a mapping, i.e. if it can be indexed and traversed.
+        """
+        return self._store.kinds[self._node] == _MAPPING
+
+    def iter_items(self, sort_keys: bool = False) -> Iterator[Item]:
+        """
+        Traverse the categories in depth-first order.
+
+        Yield ("open", key, None) when a category starts, ("value", key,
+        value) for the other values and ("close", None, None) when a category
+        ends. Only one value is materialized at a time.
+        """
+        if not self.is_mapping():
+            raise TypeError("Only categories can be traversed")
+        return self._store.iter_items(self._node, sort_keys)
+
+    def __getitem__(self, key):
+        if self._store.kinds[self._node] != _MAPPING:
+            raise TypeError("Only categories can be indexed")
+        return CompactWordDict._view(self._store, self._store.payloads[self._node][key])
+
+    def __setitem__(self, key, value):
+        if self._store.kinds[self._node] != _MAPPING:
+            raise TypeError("Only categories can be indexed")
+        self._store.set_child(self._node, key, value)
+
+    def __str__(self):
+        return self.extract().__str__()
+
+    def extract(self):
+        return self._store.extract(self._node)
+
+    def iter_key_paths(
+        self, target_key: str = "words"
+    ) -> Iterator[Tuple[KeyPath, Any]]:
+        store = self._store
+        for path, node in store.get_index(self._node, target_key).items():
+            yield path, store.extract(store.payloads[node][target_key])
+
+    def get_leaf(self, path: Sequence[str], target_key: str = "words") -> Any:
+        store = self._store
+        node = store.get_index(self._node, target_key)[tuple(path)]
+        return store.extract(store.payloads[node][target_key])
+
+    def set_leaf(self, path: Sequence[str], value: Any, target_key: str = "words"):
+        store = self._store
+        node = store.get_index(self._node, target_key)[tuple(path)]
+        store.set_child(node, target_key, value)
+
 
 @dataclass
 class ReplaceInstructions:
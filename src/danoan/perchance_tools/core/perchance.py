@@ -0,0 +1,212 @@
+from danoan.perchance_tools.core import profiling
+
+import logging
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    TextIO,
+)
+
+LOG_LEVEL = logging.INFO
+
+logger = logging.getLogger(__name__)
+logger.setLevel(LOG_LEVEL)
+
+
+def format_key_name(s):
+    """
+    Return the perchance list name of a category.
+
+    >>> format_key_name("Noms, communs")
+    'noms_communs'
+    """
+    return s.lower().replace(",", " ").replace("  ", " ").replace(" ", "_")
+
+
+def iter_perchance_lines(pd, indentation_spaces: int = 2) -> Iterator[str]:
+    """
+    Yield the lines of the perchance text of a dictionary of `key_paths_to_dict`.
+
+    The dictionary is traversed with an explicit stack, such that there is no
+    limit on the depth of the categories.
+
+    >>> list(iter_perchance_lines({"root": {"animal": {"name": "animal", "words": ["cat"]}}}))
+    ['animal\\n', '  name=animal\\n', '  words\\n', '    cat\\n']
+    """
+    # Items are either a line to yield or a (node, level) pair to expand.
+    stack: List[Any] = [(pd["root"], 0)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            yield item
+            continue
+
+        node, level = item
+        sp = indentation_spaces * level * " "
+        if not isinstance(node, dict):
+            for value in node:
+                yield f"{sp}{value}\n"
+            continue
+
+        children: List[Any] = []
+        if "name" in node.keys():
+            children.append(f"{sp}name={node['name']}\n")
+        for key, value in node.items():
+            if key == "name":
+                continue
+            children.append(f"{sp}{key}\n")
+            children.append((value, level + 1))
+        stack.extend(reversed(children))
+
+
+def print_perchance_dict(pd) -> str:
+    return "".join(iter_perchance_lines(pd))
+
+
+def key_paths_to_dict(list_key_paths: Iterable[Dict[str, Any]]):
+    """
+    Nest the translated key paths in the dictionary printed by `print_perchance_dict`.
+    """
+    d: Dict[str, Any] = {"root": {}}
+    for key_path in list_key_paths:
+        current = d["root"]
+        path = key_path["path"]
+        words = key_path["words"]
+
+        for key in path:
+            perchance_key = format_key_name(key)
+            if perchance_key not in current:
+                current[perchance_key] = {"name": key.lower()}
+            current = current[perchance_key]
+
+        current["words"] = words
+
+    return d
+
+
+def translate_key_path(
+    key_path: Dict[str, Any], translations: Dict[str, List[str]]
+) -> Dict[str, Any]:
+    """
+    Replace the categories of a key path by their first translation.
+
+    The root and the categories without translation are left out of the path.
+    The untranslated path is kept as `source`.
+    """
+    kp: Dict[str, Any] = {
+        "path": [],
+        "words": key_path["words"],
+        "source": key_path["path"],
+    }
+    categories = key_path["path"]
+    for category in categories:
+        if category == "root":
+            continue
+        response = translations.get(category)
+        if not response:
+            logger.info(f"Error processing: {categories}. Skipping.")
+            continue
+
+        kp["path"].append(response[0])
+    return kp
+
+
+def get_top_level_name(translated_key_path: Dict[str, Any]) -> Optional[str]:
+    """
+    Return the perchance list name of the top-level category of a key path.
+
+    >>> get_top_level_name({"path": ["Animals", "Pets"], "words": ["cat"]})
+    'animals'
+    """
+    path = translated_key_path["path"]
+    return format_key_name(path[0]) if path else None
+
+
+def _get_source_top_level(translated_key_path: Dict[str, Any]) -> Optional[str]:
+    source = translated_key_path.get("source")
+    if source is None:
+        return get_top_level_name(translated_key_path)
+    return next((x for x in source if x != "root"), None)
+
+
+def group_top_level(
+    translated_key_paths: Iterable[Dict[str, Any]]
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Group the translated key paths by top-level category.
+
+    The key paths of a source top-level category are consecutive. Their
+    group is yielded as soon as the next source category starts. A group
+    whose translated name was already yielded, i.e. another source category
+    with the same translation, is held back. The held groups are merged by
+    name and yielded at the end, with a warning since their name repeats.
+    """
+    yielded: Set[Optional[str]] = set()
+    held: Dict[Optional[str], List[Dict[str, Any]]] = {}
+
+    def _release(group: List[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        name = get_top_level_name(group[0])
+        if name in yielded:
+            if name not in held:
+                logger.warning(f"Top-level category {name} is written twice")
+            held.setdefault(name, []).extend(group)
+            return
+        yielded.add(name)
+        yield group
+
+    group: List[Dict[str, Any]] = []
+    group_key: Optional[str] = None
+    for key_path in translated_key_paths:
+        key = _get_source_top_level(key_path)
+        if group and key != group_key:
+            yield from _release(group)
+            group = []
+        group.append(key_path)
+        group_key = key
+
+    if group:
+        yield from _release(group)
+    yield from held.values()
+
+
+def _next_chunk(lines: Iterator[str], chunk_size: int) -> str:
+    buffer: List[str] = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            break
+    return "".join(buffer)
+
+
+def write_key_paths(
+    translated_key_paths: Iterable[Dict[str, Any]],
+    output_stream: TextIO,
+    chunk_size: int = 1 << 16,
+):
+    """
+    Write the perchance text of translated key paths one top-level category at a time.
+
+    The key paths are grouped with `group_top_level`. Each group is rendered
+    and written in chunks of about `chunk_size` characters as soon as it is
+    complete, then flushed. Only the dictionary of one top-level category is
+    held in memory, besides the groups held back by `group_top_level`.
+    """
+    for group in group_top_level(translated_key_paths):
+        with profiling.stage("render"):
+            lines = iter_perchance_lines(key_paths_to_dict(group))
+            chunk = _next_chunk(lines, chunk_size)
+        while chunk:
+            with profiling.stage("write"):
+                output_stream.write(chunk)
+            with profiling.stage("render"):
+                chunk = _next_chunk(lines, chunk_size)
+
+        with profiling.stage("write"):
+            output_stream.flush()
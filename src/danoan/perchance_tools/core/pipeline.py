@@ -0,0 +1,145 @@
+from danoan.perchance_tools.core import api, perchance, profiling, replace
+
+from collections import deque
+import logging
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, TextIO
+
+# Stages are generators over key paths, i.e. dictionaries with the `path` of
+# categories and the `words` of a leaf category, as yielded by
+# `utils.collect_key_path`. Each stage consumes its input as it produces its
+# output.
+KeyPath = Dict[str, Any]
+
+LOG_LEVEL = logging.INFO
+
+logger = logging.getLogger(__name__)
+logger.setLevel(LOG_LEVEL)
+
+
+def parse(markdown_stream: TextIO) -> Iterator[KeyPath]:
+    """
+    Yield the key path of each leaf category of a markdown text while it is read.
+
+    Paths start with `root`, as the key paths of a WordDict created with
+    `api.create_dict_from_markdown`.
+    """
+    path = ["root"]
+    for kind, title, words in api.iterate_markdown_tree(markdown_stream):
+        if kind == "open":
+            path.append(title)
+        elif kind == "leaf":
+            yield {"path": tuple(path + [title]), "words": words}
+        else:
+            path.pop()
+
+
+def correct(
+    key_paths: Iterable[KeyPath], language, jobs: int = 1, batch_words: int = 0
+) -> Iterator[KeyPath]:
+    """
+    Yield the key paths with the corrections of the LLM applied to their words.
+
+    `jobs` and `batch_words` have the same meaning as in `api.find_corrections`.
+    The key paths are yielded in their input order. Corrections that cannot
+    be applied are logged as warnings.
+    """
+    # Key paths sent to the LLM and not corrected yet, in input order.
+    sent: Deque[KeyPath] = deque()
+
+    def _send() -> Iterator[KeyPath]:
+        for key_path in key_paths:
+            sent.append(key_path)
+            yield key_path
+
+    bulk_replace = replace.BulkReplace()
+    for correction in api.correct_key_paths(_send(), language, jobs, batch_words):
+        key_path = sent.popleft()
+        bulk_replace.add(key_path["path"], correction["replace_pairs"])
+        words = bulk_replace.apply_words(key_path["path"], key_path["words"])
+        for issue in bulk_replace.report.issues:
+            logger.warning(f"Correction not applied: {issue}")
+        bulk_replace.report.issues.clear()
+        yield {"path": key_path["path"], "words": words}
+
+
+def translate(
+    key_paths: Iterable[KeyPath],
+    from_language: str = "French",
+    to_language: str = "English",
+    batch_size: int = 50,
+    translations: Optional[Dict[str, List[str]]] = None,
+) -> Iterator[KeyPath]:
+    """
+    Yield the key paths with their categories translated.
+
+    Key paths are held until `batch_size` categories without translation are
+    collected. They are then translated in a single `api.translate_many`
+    call. Translations are reused for the categories that appear again.
+    They are added to `translations`, if it is given, such that they are
+    shared between several calls.
+    """
+    known: Dict[str, List[str]] = {} if translations is None else translations
+    held: List[KeyPath] = []
+    missing: Dict[str, None] = {}
+
+    def _flush() -> Iterator[KeyPath]:
+        if missing:
+            known.update(
+                api.translate_many(
+                    list(missing), from_language, to_language, batch_size
+                )
+            )
+            missing.clear()
+        for key_path in held:
+            yield perchance.translate_key_path(key_path, known)
+        held.clear()
+
+    for key_path in key_paths:
+        held.append(key_path)
+        for category in key_path["path"]:
+            if category != "root" and category not in known:
+                missing[category] = None
+        if len(missing) >= batch_size:
+            yield from _flush()
+
+    yield from _flush()
+
+
+def render(translated_key_paths: Iterable[KeyPath]) -> Iterator[str]:
+    """
+    Yield the perchance text of each top-level category.
+
+    The key paths are grouped with `perchance.group_top_level`. A top-level
+    category is rendered as soon as the next one starts.
+    """
+    for group in perchance.group_top_level(translated_key_paths):
+        with profiling.stage("render"):
+            yield perchance.print_perchance_dict(perchance.key_paths_to_dict(group))
+
+
+def run(
+    markdown_stream: TextIO,
+    output_stream: TextIO,
+    language=None,
+    jobs: int = 1,
+    batch_words: int = 0,
+    batch_size: int = 50,
+):
+    """
+    Convert a markdown thesaurus to the perchance format in a single pass.
+
+    The words are corrected in `language` if it is given. Each top-level
+    category is written to `output_stream` as soon as it is rendered, while
+    the rest of the markdown is still being read. It is equivalent to
+
+        key_paths = correct(parse(markdown_stream), language)
+        perchance.write_key_paths(translate(key_paths), output_stream)
+    """
+    key_paths = parse(markdown_stream)
+    if language is not None:
+        key_paths = correct(key_paths, language, jobs, batch_words)
+
+    perchance.write_key_paths(
+        translate(key_paths, batch_size=batch_size), output_stream
+    )
+    output_stream.write("\n")
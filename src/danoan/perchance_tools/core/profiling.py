@@ -0,0 +1,90 @@
+from contextlib import contextmanager
+import threading
+import time
+from typing import Dict, Iterator, Optional
+
+# Stages in the order they are listed in the report.
+STAGES = [
+    "read",
+    "parse",
+    "traverse",
+    "render-prompt",
+    "llm",
+    "replace",
+    "render",
+    "write",
+]
+
+
+class Profiler:
+    """
+    Accumulate the time spent in each stage of the pipeline.
+
+    Times of the stages running in concurrent threads are added, such that
+    the total of a stage can be larger than the wall time.
+    """
+
+    def __init__(self):
+        self.totals: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float, calls: int = 1):
+        with self._lock:
+            self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+            self.calls[stage] = self.calls.get(stage, 0) + calls
+
+    def merge(self, totals: Dict[str, float], calls: Dict[str, int]):
+        for stage, seconds in totals.items():
+            self.add(stage, seconds, calls.get(stage, 0))
+
+    def format(self) -> str:
+        stages = [x for x in STAGES if x in self.totals]
+        stages.extend(sorted(x for x in self.totals if x not in STAGES))
+
+        lines = [f"{'stage':<16}{'calls':>10}{'total (s)':>14}"]
+        for stage in stages:
+            lines.append(
+                f"{stage:<16}{self.calls[stage]:>10}{self.totals[stage]:>14.3f}"
+            )
+        lines.append(f"{'wall time':<26}{time.perf_counter() - self.start:>14.3f}")
+        return "\n".join(lines)
+
+
+_profiler: Optional[Profiler] = None
+
+
+def get_profiler() -> Optional[Profiler]:
+    return _profiler
+
+
+def enable() -> Profiler:
+    """
+    Start timing the stages of the pipeline and return the profiler.
+    """
+    global _profiler
+    _profiler = Profiler()
+    return _profiler
+
+
+def disable():
+    global _profiler
+    _profiler = None
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a block of code as part of the stage `name` if profiling is enabled.
+    """
+    profiler = _profiler
+    if profiler is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profiler.add(name, time.perf_counter() - start)
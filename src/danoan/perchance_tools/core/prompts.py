@@ -0,0 +1,119 @@
+from danoan.perchance_tools.core import cache, profiling
+
+from importlib import resources
+from pathlib import Path
+import threading
+from typing import TYPE_CHECKING, Dict, Optional
+
+if TYPE_CHECKING:
+    from jinja2 import Template
+
+
+def _get_asset(asset_relative_path: Path):
+    ASSETS_PACKAGE = "danoan.perchance_tools.assets"
+
+    s = []
+    t = asset_relative_path
+    while t != t.parent:
+        s.append(t.name)
+        t = t.parent
+    s.reverse()
+
+    asset_dot_path = ".".join(s[:-1])
+    resource_dot_path = f"{ASSETS_PACKAGE}.{asset_dot_path}"
+    return resources.path(resource_dot_path, s[-1])
+
+
+def _read_asset_as_text(asset_relative_path: Path):
+    with _get_asset(asset_relative_path) as asset_path:
+        with open(asset_path, "r") as f:
+            return f.read()
+
+
+class PromptRegistry:
+    """
+    Collection of the prompt assets.
+
+    Prompts are identified by their path relative to the prompts folder, e.g.
+    `correct_words/system.txt.tpl` or `correct_words/fra/full-examples.txt`.
+    Each prompt is read and each template is compiled at most once, at its
+    first use.
+
+    Prompts found in the `override_directory` take precedence over the
+    prompts distributed with the package.
+    """
+
+    def __init__(self, override_directory: Optional[Path] = None):
+        self.override_directory = override_directory
+        self._texts: Dict[str, str] = {}
+        self._templates: Dict[str, "Template"] = {}
+        self._hashes: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _load_text(self, prompt_path: str) -> str:
+        if self.override_directory:
+            override_path = Path(self.override_directory) / prompt_path
+            if override_path.exists():
+                return override_path.read_text()
+        return _read_asset_as_text(Path("prompts") / prompt_path)
+
+    def get_text(self, prompt_path: str) -> str:
+        text = self._texts.get(prompt_path)
+        if text is None:
+            with self._lock:
+                if prompt_path not in self._texts:
+                    self._texts[prompt_path] = self._load_text(prompt_path)
+                text = self._texts[prompt_path]
+        return text
+
+    def get_template(self, prompt_path: str) -> "Template":
+        template = self._templates.get(prompt_path)
+        if template is None:
+            # jinja2 is only imported by the commands which render prompts.
+            from jinja2 import Template
+
+            text = self.get_text(prompt_path)
+            with self._lock:
+                if prompt_path not in self._templates:
+                    self._templates[prompt_path] = Template(text)
+                template = self._templates[prompt_path]
+        return template
+
+    def render(self, prompt_path: str, **data) -> str:
+        template = self.get_template(prompt_path)
+        with profiling.stage("render-prompt"):
+            return template.render(**data)
+
+    def hash(self, *prompt_paths: str) -> str:
+        """
+        Return a digest of the content of one or more prompts.
+        """
+        digests = []
+        for prompt_path in prompt_paths:
+            digest = self._hashes.get(prompt_path)
+            if digest is None:
+                digest = cache.hash_texts(self.get_text(prompt_path))
+                self._hashes[prompt_path] = digest
+            digests.append(digest)
+        return cache.hash_texts(*digests)
+
+
+_registry: Optional[PromptRegistry] = None
+
+
+def get_registry() -> PromptRegistry:
+    global _registry
+    if _registry is None:
+        _registry = PromptRegistry()
+    return _registry
+
+
+def set_override_directory(override_directory: Optional[Path]):
+    """
+    Use the prompts in `override_directory` instead of the distributed ones.
+
+    The override directory mirrors the structure of the prompts folder.
+    Prompts missing in the override directory are taken from the package.
+    """
+    global _registry
+    _registry = PromptRegistry(override_directory)
@@ -0,0 +1,163 @@
+from danoan.perchance_tools.core import model, profiling
+
+from dataclasses import dataclass, field
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, TextIO
+
+MISSING_KEY = "missing-key"
+MISSING_WORD = "missing-word"
+CONFLICT = "conflict"
+INVALID = "invalid"
+
+# raw_decode skips the checks of json.loads that dominate on short lines.
+_DECODER = json.JSONDecoder()
+
+
+def _is_pair(pair: Any) -> bool:
+    return (
+        isinstance(pair, (list, tuple))
+        and len(pair) == 2
+        and all(type(x) is str for x in pair)
+    )
+
+
+@dataclass
+class ReplaceIssue:
+    kind: str
+    key: Optional[model.KeyPath] = None
+    original: Optional[str] = None
+    correction: Optional[str] = None
+    line: Optional[int] = None
+
+    def __str__(self):
+        where = (
+            f"line {self.line}" if self.line is not None else "/".join(self.key or ())
+        )
+        if self.kind == MISSING_KEY:
+            return f"{where}: category not found"
+        elif self.kind == MISSING_WORD:
+            return f"{where}: word {self.original!r} not found"
+        elif self.kind == CONFLICT:
+            return f"{where}: {self.original!r} corrected twice ({self.correction!r})"
+        return f"{where}: invalid instruction"
+
+
+@dataclass
+class ReplaceReport:
+    instructions: int = 0
+    leaves: int = 0
+    replaced: int = 0
+    issues: List[ReplaceIssue] = field(default_factory=list)
+
+
+class BulkReplace:
+    """
+    Apply a large number of replace instructions to a WordDict.
+
+    The replace pairs are grouped by key path as they are added. `apply`
+    then replaces the words of each category in a single pass and sorts them
+    once. The instructions are applied at the same time, i.e. a correction is
+    never replaced again by another pair of the same category.
+
+    Instructions that cannot be applied are reported instead of raised: a
+    missing category or word, a word with two different corrections (the
+    first one is kept), pairs that are not two words and invalid lines of a
+    JSONL file.
+    """
+
+    def __init__(self):
+        self._pairs: Dict[model.KeyPath, Dict[str, str]] = {}
+        self.report = ReplaceReport()
+
+    def add(self, key: Sequence[str], replace_pairs: Iterable[Sequence[str]]):
+        key = tuple(key)
+        pairs = self._pairs.setdefault(key, {})
+        for pair in replace_pairs:
+            self.report.instructions += 1
+            if not _is_pair(pair):
+                self.report.issues.append(ReplaceIssue(INVALID, key))
+                continue
+            original, correction = pair
+            previous = pairs.setdefault(original, correction)
+            if previous != correction:
+                self.report.issues.append(
+                    ReplaceIssue(CONFLICT, key, original, correction)
+                )
+
+    def add_instructions(self, instructions: Iterable[model.ReplaceInstructions]):
+        for instruction in instructions:
+            self.add(instruction.key, instruction.replace_pairs)
+
+    def read(self, jsonl_stream: TextIO, source: Optional[str] = None) -> "BulkReplace":
+        """
+        Add the instructions of a JSONL stream.
+
+        Each line is a json object with the `key` path of a category and its
+        `replace_pairs`, as the records of a `checkpoint.CorrectionJournal`.
+        Empty lines are skipped. If `source` is given, the records of another
+        `file` are skipped. Records without `file` apply to any file.
+        """
+        for line_number, line in enumerate(jsonl_stream, 1):
+            if not line or line.isspace():
+                continue
+            try:
+                record: Any
+                record, end = _DECODER.raw_decode(line)
+                if line[end:].strip():
+                    raise ValueError("Extra data after the instruction")
+                key = tuple(record["key"])
+                replace_pairs = [(o, c) for o, c in record["replace_pairs"]]
+                record_source = record.get("file")
+            except (KeyError, TypeError, ValueError):
+                self.report.issues.append(ReplaceIssue(INVALID, line=line_number))
+                continue
+            if source is not None and record_source not in (None, source):
+                continue
+            self.add(key, replace_pairs)
+        return self
+
+    def _replace(
+        self, key: model.KeyPath, pairs: Dict[str, str], words: Set[str]
+    ) -> Optional[List[str]]:
+        found = 0
+        for original in pairs:
+            if original in words:
+                found += 1
+            else:
+                self.report.issues.append(ReplaceIssue(MISSING_WORD, key, original))
+        if not found:
+            return None
+
+        self.report.leaves += 1
+        self.report.replaced += found
+        return sorted({pairs.get(x, x) for x in words})
+
+    def apply_words(self, key: Sequence[str], words: Iterable[str]) -> List[str]:
+        """
+        Replace the words of the category at `key` and return them sorted.
+
+        The instructions of the category are consumed, such that a stream of
+        categories can be corrected with a single BulkReplace.
+        """
+        key = tuple(key)
+        set_of_words = set(words)
+        replaced = self._replace(key, self._pairs.pop(key, {}), set_of_words)
+        return sorted(set_of_words) if replaced is None else replaced
+
+    def apply(self, word_dict: model.WordDict) -> ReplaceReport:
+        """
+        Replace the words of `word_dict` and return the report of all instructions.
+        """
+        with profiling.stage("replace"):
+            for key, pairs in self._pairs.items():
+                try:
+                    words = word_dict.get_leaf(key)
+                except KeyError:
+                    self.report.issues.append(ReplaceIssue(MISSING_KEY, key))
+                    continue
+
+                replaced = self._replace(key, pairs, set(words))
+                if replaced is not None:
+                    word_dict.set_leaf(key, replaced)
+
+        return self.report
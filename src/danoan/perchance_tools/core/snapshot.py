@@ -0,0 +1,186 @@
+from danoan.perchance_tools.core import model
+
+import json
+import struct
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple
+
+MAGIC = b"PTWD"
+VERSION = 1
+
+# Record tags. Every record starts with its tag and its key.
+_MAPPING = b"M"  # u32 number of children. The children records follow.
+_WORDS = b"W"  # u32 blob length and the words joined by the separator.
+_JSON = b"J"  # u32 blob length and the value encoded as json.
+
+_WORDS_SEPARATOR = "\x00"
+
+_U32 = struct.Struct("<I")
+
+
+def is_snapshot(header: bytes) -> bool:
+    """
+    Tell if a file starting with `header` is a WordDict snapshot.
+
+    >>> is_snapshot(MAGIC + bytes([VERSION]))
+    True
+    >>> is_snapshot(b"root:")
+    False
+    """
+    return header[: len(MAGIC)] == MAGIC
+
+
+def _write_blob(chunks: List[bytes], data: bytes):
+    chunks.append(_U32.pack(len(data)))
+    chunks.append(data)
+
+
+def _is_words(value: Any) -> bool:
+    return type(value) is list and all(
+        type(x) is str and _WORDS_SEPARATOR not in x for x in value
+    )
+
+
+def _write_record(chunks: List[bytes], key: str, value: Any):
+    if type(value) is dict:
+        chunks.append(_MAPPING)
+        _write_blob(chunks, key.encode("utf-8"))
+        chunks.append(_U32.pack(len(value)))
+    elif _is_words(value) and len(value) > 0:
+        chunks.append(_WORDS)
+        _write_blob(chunks, key.encode("utf-8"))
+        _write_blob(chunks, _WORDS_SEPARATOR.join(value).encode("utf-8"))
+    else:
+        chunks.append(_JSON)
+        _write_blob(chunks, key.encode("utf-8"))
+        _write_blob(chunks, json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
+def dump(word_dict: model.WordDict, output_stream: BinaryIO):
+    """
+    Write a WordDict in the binary snapshot format.
+
+    The snapshot is a preorder sequence of length-prefixed records. The
+    words of a category are stored in a single blob, such that loading a
+    snapshot does not parse every word individually.
+    """
+    output_stream.write(MAGIC + bytes([VERSION]))
+
+    # A CompactWordDict builds a new dictionary on each extract.
+    data = word_dict.extract()
+    chunks: List[bytes] = []
+    _write_record(chunks, "", data)
+    stack = []
+    if type(data) is dict:
+        stack.append(iter(data.items()))
+
+    while stack:
+        item = next(stack[-1], None)
+        if item is None:
+            stack.pop()
+            continue
+
+        key, value = item
+        _write_record(chunks, str(key), value)
+        if type(value) is dict:
+            stack.append(iter(value.items()))
+
+        if len(chunks) > 4096:
+            output_stream.write(b"".join(chunks))
+            chunks = []
+
+    output_stream.write(b"".join(chunks))
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.position = 0
+
+    def read_tag(self) -> bytes:
+        tag = bytes(self.data[self.position : self.position + 1])
+        self.position += 1
+        return tag
+
+    def read_u32(self) -> int:
+        (value,) = _U32.unpack_from(self.data, self.position)
+        self.position += _U32.size
+        return value
+
+    def read_text(self) -> str:
+        length = self.read_u32()
+        text = str(self.data[self.position : self.position + length], "utf-8")
+        self.position += length
+        return text
+
+    def read_record(self) -> Tuple[str, Any, int]:
+        """
+        Return the key, the value and the number of children of a record.
+        """
+        tag = self.read_tag()
+        key = self.read_text()
+        if tag == _MAPPING:
+            return key, {}, self.read_u32()
+        elif tag == _WORDS:
+            return key, self.read_text().split(_WORDS_SEPARATOR), 0
+        elif tag == _JSON:
+            return key, json.loads(self.read_text()), 0
+        else:
+            raise ValueError(f"Invalid snapshot record at byte {self.position - 1}")
+
+
+def _iterate_items(reader: _Reader, num_children: int) -> Iterator[model.Item]:
+    # Number of children still to read in each open mapping.
+    stack = [num_children]
+    while stack:
+        if stack[-1] == 0:
+            stack.pop()
+            if stack:
+                yield (model.CLOSE, None, None)
+            continue
+
+        stack[-1] -= 1
+        key, value, num_children = reader.read_record()
+        if type(value) is dict:
+            yield (model.OPEN, key, None)
+            stack.append(num_children)
+        else:
+            yield (model.VALUE, key, value)
+
+
+def load(input_stream: BinaryIO, compact: bool = False) -> model.WordDict:
+    """
+    Read a WordDict written with `dump`.
+
+    If `compact` is True, the records are added to a CompactWordDict as they
+    are read, without building the dictionary.
+    """
+    header = input_stream.read(len(MAGIC) + 1)
+    if not is_snapshot(header):
+        raise ValueError("Not a WordDict snapshot")
+    if header[-1] != VERSION:
+        raise ValueError(f"Unsupported snapshot version {header[-1]}")
+
+    reader = _Reader(input_stream.read())
+    _, root, num_children = reader.read_record()
+
+    if compact:
+        if type(root) is not dict:
+            return model.CompactWordDict(root)
+        return model.CompactWordDict.from_items(_iterate_items(reader, num_children))
+
+    # Mappings being filled with the number of children still to read.
+    stack: List[Tuple[Dict[str, Any], int]] = []
+    if num_children > 0:
+        stack.append((root, num_children))
+
+    while stack:
+        parent, remaining = stack.pop()
+        if remaining > 1:
+            stack.append((parent, remaining - 1))
+
+        key, value, num_children = reader.read_record()
+        parent[key] = value
+        if num_children > 0:
+            stack.append((value, num_children))
+
+    return model.WordDict(root)
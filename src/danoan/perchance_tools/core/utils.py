@@ -1,12 +1,301 @@
-from danoan.perchance_tools.core import model
+from danoan.perchance_tools.core import model, profiling, snapshot
 
+from collections.abc import Sequence
 import copy
+import io
+from pathlib import Path
+from typing import Any, Dict, Generator, Iterable, Iterator, List, TextIO, Union
+import yaml
 
+try:
+    from yaml import CSafeDumper as YamlDumper, CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeDumper as YamlDumper, SafeLoader as YamlLoader  # type: ignore
 
-def collect_key_path(source: model.WordDict, target_key: str):
+
+def load_yml(yml_stream: Union[str, TextIO]) -> Any:
+    """
+    Load yml with the libyaml loader when it is available.
+
+    `yml_stream` is a text stream or the yml text itself.
+    """
+    return yaml.load(yml_stream, Loader=YamlLoader)
+
+
+def dump_yml(data: Any, output_stream: TextIO):
+    """
+    Dump yml with the libyaml dumper when it is available.
+    """
+    with profiling.stage("write"):
+        yaml.dump(data, output_stream, Dumper=YamlDumper, allow_unicode=True)
+
+
+_YAML_STR_TAG = "tag:yaml.org,2002:str"
+_yaml_resolver = yaml.resolver.Resolver()
+_yaml_constructor = yaml.constructor.SafeConstructor()
+
+
+class _NotACategoryTree(Exception):
+    pass
+
+
+def _construct_scalar(event: yaml.ScalarEvent) -> Any:
+    tag = event.tag
+    if tag is None or tag == "!":
+        if not event.implicit[0]:
+            return event.value
+        tag = _yaml_resolver.resolve(yaml.ScalarNode, event.value, (True, False))
+    if tag == _YAML_STR_TAG:
+        return event.value
+    return _yaml_constructor.construct_object(
+        yaml.ScalarNode(tag, event.value, style=event.style)
+    )
+
+
+def _iterate_yml_items(events: Iterable[yaml.Event]) -> Iterator[model.Item]:
+    """
+    Convert the events of a yml mapping to the items of `CompactWordDict.from_items`.
+
+    Mappings that are values of a category are categories. Any other
+    collection, e.g. a list of words, is built as a value.
+    """
+    # Each frame is [collection, pending key]. The collection is None for a
+    # category, whose items are yielded instead of stored.
+    frames: List[List[Any]] = []
+    started = False
+
+    for event in events:
+        if isinstance(event, (yaml.StreamStartEvent, yaml.DocumentStartEvent)):
+            continue
+        elif isinstance(event, (yaml.StreamEndEvent, yaml.DocumentEndEvent)):
+            break
+        elif isinstance(event, yaml.AliasEvent):
+            raise _NotACategoryTree()
+
+        if not frames:
+            if started or not isinstance(event, yaml.MappingStartEvent):
+                raise _NotACategoryTree()
+            started = True
+            frames.append([None, None])
+            continue
+
+        frame = frames[-1]
+        collection, key = frame
+        if isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+            frames.pop()
+            if collection is None:
+                if frames:
+                    yield (model.CLOSE, None, None)
+                continue
+            value = collection
+        elif isinstance(event, yaml.ScalarEvent):
+            value = _construct_scalar(event)
+        elif collection is None and isinstance(event, yaml.MappingStartEvent):
+            if key is None:
+                raise _NotACategoryTree()
+            frame[1] = None
+            yield (model.OPEN, key, None)
+            frames.append([None, None])
+            continue
+        else:
+            if type(collection) is not list and key is None:
+                # A collection used as a mapping key.
+                raise _NotACategoryTree()
+            is_mapping = isinstance(event, yaml.MappingStartEvent)
+            frames.append([{} if is_mapping else [], None])
+            continue
+
+        # Deliver a complete value to the enclosing collection.
+        frame = frames[-1]
+        collection, key = frame
+        if type(collection) is list:
+            collection.append(value)
+        elif key is None:
+            frame[1] = value
+        elif collection is None:
+            frame[1] = None
+            yield (model.VALUE, key, value)
+        else:
+            frame[1] = None
+            collection[key] = value
+
+    if not started:
+        raise _NotACategoryTree()
+
+
+def _load_compact_yml(yml_stream: TextIO) -> model.CompactWordDict:
+    try:
+        return model.CompactWordDict.from_items(
+            _iterate_yml_items(yaml.parse(yml_stream, Loader=YamlLoader))
+        )
+    except _NotACategoryTree:
+        yml_stream.seek(0)
+        return model.CompactWordDict(load_yml(yml_stream))
+
+
+def load_word_dict(filepath: Union[str, Path], compact: bool = False) -> model.WordDict:
+    """
+    Load a WordDict from a yml file or from a WordDict snapshot.
+
+    If `compact` is True, the data is stored in a CompactWordDict while it
+    is parsed, without building the dictionary.
+    """
+    if compact:
+        # The file is read while it is parsed. Both are timed as parse.
+        with profiling.stage("parse"):
+            with open(filepath, "rb") as f:
+                if snapshot.is_snapshot(f.read(len(snapshot.MAGIC))):
+                    f.seek(0)
+                    return snapshot.load(f, compact=True)
+            with open(filepath, "r", encoding="utf-8") as f:
+                return _load_compact_yml(f)
+
+    with profiling.stage("read"):
+        with open(filepath, "rb") as f:
+            data = f.read()
+
+    with profiling.stage("parse"):
+        if snapshot.is_snapshot(data[: len(snapshot.MAGIC)]):
+            return snapshot.load(io.BytesIO(data))
+        return model.WordDict(load_yml(data.decode("utf-8")))
+
+
+def _scalar_events(value: str) -> Iterator[yaml.Event]:
+    # Strings that would be read back as another type (e.g. numbers)
+    # must be quoted by the emitter.
+    plain = _yaml_resolver.resolve(yaml.ScalarNode, value, (True, False))
+    yield yaml.ScalarEvent(None, None, (plain == _YAML_STR_TAG, True), value)
+
+
+def _node_events(node: yaml.Node) -> Iterator[yaml.Event]:
+    # Same events as the serializer of yaml.dump, without anchors.
+    stack: List[Any] = [node]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, yaml.Event):
+            yield item
+        elif isinstance(item, yaml.ScalarNode):
+            detected = _yaml_resolver.resolve(
+                yaml.ScalarNode, item.value, (True, False)
+            )
+            default = _yaml_resolver.resolve(yaml.ScalarNode, item.value, (False, True))
+            yield yaml.ScalarEvent(
+                None,
+                item.tag,
+                (item.tag == detected, item.tag == default),
+                item.value,
+                style=item.style,
+            )
+        else:
+            is_mapping = isinstance(item, yaml.MappingNode)
+            kind = yaml.MappingNode if is_mapping else yaml.SequenceNode
+            implicit = item.tag == _yaml_resolver.resolve(kind, None, True)
+            if is_mapping:
+                yield yaml.MappingStartEvent(
+                    None, item.tag, implicit, flow_style=item.flow_style
+                )
+                children = [x for pair in item.value for x in pair]
+                stack.append(yaml.MappingEndEvent())
+            else:
+                yield yaml.SequenceStartEvent(
+                    None, item.tag, implicit, flow_style=item.flow_style
+                )
+                children = list(item.value)
+                stack.append(yaml.SequenceEndEvent())
+            stack.extend(reversed(children))
+
+
+def _value_events(value: Any) -> Iterator[yaml.Event]:
+    if type(value) is str:
+        yield from _scalar_events(value)
+    elif type(value) is list and all(type(x) is str for x in value):
+        yield yaml.SequenceStartEvent(None, None, True, flow_style=False)
+        for x in value:
+            yield from _scalar_events(x)
+        yield yaml.SequenceEndEvent()
+    else:
+        representer = yaml.representer.SafeRepresenter(default_flow_style=False)
+        yield from _node_events(representer.represent_data(value))
+
+
+def _iterate_compact_events(word_dict: model.CompactWordDict) -> Iterator[yaml.Event]:
+    yield yaml.StreamStartEvent()
+    yield yaml.DocumentStartEvent()
+    yield yaml.MappingStartEvent(None, None, True, flow_style=False)
+    for kind, key, value in word_dict.iter_items(sort_keys=True):
+        if kind == model.CLOSE:
+            yield yaml.MappingEndEvent()
+            continue
+
+        yield from _value_events(key)
+        if kind == model.OPEN:
+            yield yaml.MappingStartEvent(None, None, True, flow_style=False)
+        else:
+            yield from _value_events(value)
+    yield yaml.MappingEndEvent()
+    yield yaml.DocumentEndEvent()
+    yield yaml.StreamEndEvent()
+
+
+def dump_word_dict(word_dict: model.WordDict, output_stream: TextIO):
+    """
+    Dump a WordDict in yml, as `dump_yml(word_dict.extract())`.
+
+    A CompactWordDict is written from its store, one category at a time,
+    without building the dictionary.
+    """
+    if not isinstance(word_dict, model.CompactWordDict) or not word_dict.is_mapping():
+        dump_yml(word_dict.extract(), output_stream)
+        return
+
+    with profiling.stage("write"):
+        yaml.emit(
+            _iterate_compact_events(word_dict),
+            output_stream,
+            Dumper=YamlDumper,
+            allow_unicode=True,
+        )
+
+
+class SequenceView(Sequence):
+    """
+    Read-only view over a list.
+
+    >>> v = SequenceView(["a", "b"])
+    >>> (len(v), v[0], v == ["a", "b"])
+    (2, 'a', True)
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: Sequence):
+        self._data = data
+
+    def __getitem__(self, index):
+        return self._data[index]
+
+    def __len__(self):
+        return len(self._data)
+
+    def __eq__(self, other):
+        if isinstance(other, SequenceView):
+            other = other._data
+        return self._data == other
+
+    def __repr__(self):
+        return f"SequenceView({self._data!r})"
+
+
+def collect_key_path(
+    source: model.WordDict, target_key: str, deep_copy: bool = False
+) -> Generator[Dict[str, Any], None, None]:
     """
     Finds all the sequences of dictionary keys leading to some target key.
 
+    Each record has the path as a tuple of keys and a read-only view of
+    the value of the target key. No data is copied unless `deep_copy` is
+    True, in which case the path is a list and the value is a deep copy.
+
     >>> d = {
     ...     'root':
     ...     {
@@ -34,22 +323,14 @@ def collect_key_path(source: model.WordDict, target_key: str):
     ... }
     >>> w = model.WordDict(d)
     >>> L = list(collect_key_path(w,'words'))
-    >>> assert( L[0]['path'] == ['root', 'Category_A', 'Category_B1'] )
+    >>> assert( L[0]['path'] == ('root', 'Category_A', 'Category_B1') )
     >>> assert( L[0]['words'] == ['word_a', 'word_b', 'word_c'] )
     """
 
-    def __traverse__(T, path):
-        assert type(T) is dict
-
-        for key in T.keys():
-            if key == target_key:
-                yield {"path": path, target_key: T[key]}
-            else:
-                path.append(key)
-                for x in __traverse__(T[key], path):
-                    yield x
-                path.pop()
-
-    for data_dict in __traverse__(source.extract(), []):
-        dict_copy = copy.deepcopy(data_dict)
-        yield dict_copy
+    for path, value in source.iter_key_paths(target_key):
+        if deep_copy:
+            yield {"path": list(path), target_key: copy.deepcopy(value)}
+        elif type(value) is list:
+            yield {"path": path, target_key: SequenceView(value)}
+        else:
+            yield {"path": path, target_key: value}
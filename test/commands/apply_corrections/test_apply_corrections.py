@@ -0,0 +1,78 @@
+from danoan.perchance_tools.commands import apply_corrections
+from danoan.perchance_tools.core import checkpoint, model, replace, utils
+
+import io
+import pytest
+
+
+@pytest.fixture
+def input_files(tmp_path):
+    list_yml_filepath = []
+    for name, words in [("a", ["chien", "chatt"]), ("b", ["oiseau", "poisson"])]:
+        yml_filepath = tmp_path / f"{name}.yml"
+        with open(yml_filepath, "w") as f:
+            utils.dump_yml({"root": {"A": {"words": words}}}, f)
+        list_yml_filepath.append(str(yml_filepath))
+
+    corrections_filepath = tmp_path / "corrections.jsonl"
+    with open(corrections_filepath, "w") as f:
+        f.write(
+            checkpoint.format_record(["root", "A"], "x", [["chatt", "chat"]], "a.yml")
+        )
+        f.write(
+            checkpoint.format_record(["root", "A"], "x", [["poison", "x"]], "b.yml")
+        )
+        f.write(checkpoint.format_record(["root", "B"], "x", [["a", "b"]], "b.yml"))
+    return str(corrections_filepath), list_yml_filepath
+
+
+def test_apply_corrections(input_files, tmp_path, caplog):
+    corrections_filepath, list_yml_filepath = input_files
+    output_dir = tmp_path / "output"
+
+    apply_corrections.__apply_corrections__(
+        corrections_filepath, list_yml_filepath, output_dir=str(output_dir)
+    )
+
+    for name, words in [("a", ["chat", "chien"]), ("b", ["oiseau", "poisson"])]:
+        with open(output_dir / f"{name}.yml", "r") as f:
+            assert utils.load_yml(f) == {"root": {"A": {"words": words}}}
+
+    # Each file only gets the corrections found in it.
+    warnings = [x.getMessage() for x in caplog.records if x.levelname == "WARNING"]
+    assert warnings == [
+        f"{list_yml_filepath[1]}: Correction not applied: root/A: word 'poison' not found",
+        f"{list_yml_filepath[1]}: Correction not applied: root/B: category not found",
+    ]
+
+
+def test_records_without_file():
+    word_dict = model.WordDict({"root": {"A": {"words": ["chatt"]}}})
+    corrections_stream = io.StringIO(
+        checkpoint.format_record(["root", "A"], "x", [["chatt", "chat"]])
+    )
+
+    report = apply_corrections.apply_corrections(word_dict, corrections_stream, "a.yml")
+
+    assert word_dict.get_leaf(["root", "A"]) == ["chat"]
+    assert (report.replaced, report.issues) == (1, [])
+
+
+def test_missing_corrections_file(tmp_path):
+    with pytest.raises(SystemExit):
+        apply_corrections.__apply_corrections__(
+            str(tmp_path / "missing.jsonl"), [str(tmp_path / "a.yml")]
+        )
+
+
+def test_issue_kinds(input_files):
+    corrections_filepath, list_yml_filepath = input_files
+    word_dict = utils.load_word_dict(list_yml_filepath[1])
+
+    with open(corrections_filepath, "r") as f:
+        report = apply_corrections.apply_corrections(word_dict, f, "b.yml")
+
+    assert [x.kind for x in report.issues] == [
+        replace.MISSING_WORD,
+        replace.MISSING_KEY,
+    ]
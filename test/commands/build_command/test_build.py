@@ -0,0 +1,129 @@
+from danoan.perchance_tools.commands import build
+from danoan.perchance_tools.core import backend, manifest, prompts
+
+import pytest
+from typing import List
+
+
+class _CountingBackend(backend.StubBackend):
+    def __init__(self, cache_name: str = ""):
+        super().__init__()
+        self.cache_name = cache_name
+        self.prompts: List[str] = []
+
+    def complete(self, prompt_name, system_prompt, user_prompt, model, **data):
+        if prompt_name == "correct-words":
+            self.prompts.append(user_prompt)
+        return super().complete(prompt_name, system_prompt, user_prompt, model, **data)
+
+
+@pytest.fixture
+def llm_backend():
+    llm_backend = _CountingBackend()
+    backend.set_backend(llm_backend)
+    yield llm_backend
+    backend.set_backend(None)
+
+
+@pytest.fixture
+def src_dir(tmp_path):
+    src_dir = tmp_path / "src"
+    src_dir.mkdir()
+    (src_dir / "animals.md").write_text(
+        "# Animaux\n## Chats\nsiamois\n## Chiens\ncaniche\n"
+    )
+    (src_dir / "colors.md").write_text("# Couleurs\n## Rouges\ncarmin\n")
+    return src_dir
+
+
+def _build(src_dir, out_dir):
+    build.__build__(str(src_dir), str(out_dir), no_cache=True)
+
+
+def test_unchanged_input(src_dir, tmp_path, llm_backend):
+    out_dir = tmp_path / "out"
+    _build(src_dir, out_dir)
+    assert len(llm_backend.prompts) == 3
+    assert (out_dir / "perchance" / "animals.txt").read_text().startswith("animaux\n")
+
+    llm_backend.prompts.clear()
+    _build(src_dir, out_dir)
+    assert llm_backend.prompts == []
+
+
+def test_edited_section(src_dir, tmp_path, llm_backend):
+    out_dir = tmp_path / "out"
+    _build(src_dir, out_dir)
+
+    llm_backend.prompts.clear()
+    (src_dir / "animals.md").write_text(
+        "# Animaux\n## Chats\nsiamois\n## Chiens\ncaniche\nbouledogue\n"
+    )
+    _build(src_dir, out_dir)
+
+    assert len(llm_backend.prompts) == 1
+    assert "bouledogue" in llm_backend.prompts[0]
+    assert "bouledogue" in (out_dir / "perchance" / "animals.txt").read_text()
+
+
+def test_removed_input(src_dir, tmp_path, llm_backend):
+    out_dir = tmp_path / "out"
+    _build(src_dir, out_dir)
+
+    (src_dir / "colors.md").unlink()
+    _build(src_dir, out_dir)
+
+    for folder, suffix in [
+        ("yml", ".yml"),
+        ("corrected", ".yml"),
+        ("perchance", ".txt"),
+    ]:
+        assert (out_dir / folder / f"animals{suffix}").exists()
+        assert not (out_dir / folder / f"colors{suffix}").exists()
+    assert list(manifest.Manifest.load(out_dir / "manifest.json").inputs) == [
+        "animals.md"
+    ]
+
+
+def test_changed_prompt(src_dir, tmp_path, llm_backend):
+    out_dir = tmp_path / "out"
+    _build(src_dir, out_dir)
+
+    prompts_dir = tmp_path / "prompts"
+    (prompts_dir / "correct_words").mkdir(parents=True)
+    (prompts_dir / "correct_words" / "system.txt.tpl").write_text("Other prompt")
+    prompts.set_override_directory(prompts_dir)
+    llm_backend.prompts.clear()
+    try:
+        _build(src_dir, out_dir)
+    finally:
+        prompts.set_override_directory(None)
+
+    assert len(llm_backend.prompts) == 3
+
+
+def test_changed_tool_version(src_dir, tmp_path, llm_backend, monkeypatch, caplog):
+    out_dir = tmp_path / "out"
+    _build(src_dir, out_dir)
+
+    monkeypatch.setattr(manifest, "get_tool_version", lambda: "99.0.0")
+    llm_backend.prompts.clear()
+    caplog.clear()
+    _build(src_dir, out_dir)
+
+    assert len(llm_backend.prompts) == 3
+    assert "markdown-to-yml: " in caplog.text
+
+
+def test_changed_backend(src_dir, tmp_path, llm_backend):
+    out_dir = tmp_path / "out"
+    stub_backend = _CountingBackend("stub")
+    backend.set_backend(stub_backend)
+    _build(src_dir, out_dir)
+    assert (out_dir / "corrections.stub.jsonl").exists()
+
+    backend.set_backend(llm_backend)
+    _build(src_dir, out_dir)
+
+    assert len(llm_backend.prompts) == 3
+    assert (out_dir / "corrections.jsonl").exists()
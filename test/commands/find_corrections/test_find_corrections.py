@@ -0,0 +1,72 @@
+from danoan.perchance_tools.commands import find_corrections
+from danoan.perchance_tools.core import backend, utils
+
+import json
+import pytest
+
+
+def _responder(prompt_name: str, user_prompt: str) -> str:
+    if prompt_name == "correct-words" and "chatt" in user_prompt:
+        return '[["chatt", "chat"]]'
+    return backend.stub_response(prompt_name, user_prompt)
+
+
+@pytest.fixture(autouse=True)
+def stub_backend():
+    backend.set_backend(backend.StubBackend(responder=_responder))
+    yield
+    backend.set_backend(None)
+
+
+def test_find_corrections(tmp_path, capsys):
+    list_yml_filepath = []
+    for name, words in [("a", ["chien", "chatt"]), ("b", ["oiseau"])]:
+        yml_filepath = tmp_path / f"{name}.yml"
+        with open(yml_filepath, "w") as f:
+            utils.dump_yml({"root": {"A": {"words": words}}}, f)
+        list_yml_filepath.append(str(yml_filepath))
+
+    find_corrections.__find_corrections__(list_yml_filepath, "French")
+
+    records = [json.loads(x) for x in capsys.readouterr().out.splitlines()]
+    assert [(x["file"], x["key"], x["replace_pairs"]) for x in records] == [
+        ("a.yml", ["root", "A"], [["chatt", "chat"]]),
+        ("b.yml", ["root", "A"], []),
+    ]
+
+
+def test_unknown_language(tmp_path):
+    with pytest.raises(SystemExit):
+        find_corrections.__find_corrections__([str(tmp_path / "a.yml")], "Unknown")
+
+
+def test_records_are_kept_on_failure(tmp_path):
+    def _failing_responder(prompt_name: str, user_prompt: str) -> str:
+        if "boom" in user_prompt:
+            raise RuntimeError("LLM unavailable")
+        return _responder(prompt_name, user_prompt)
+
+    backend.set_backend(backend.StubBackend(responder=_failing_responder))
+    words = {"A": {"words": ["chatt"]}, "B": {"words": ["a"]}, "C": {"words": ["boom"]}}
+    yml_filepath = tmp_path / "a.yml"
+    with open(yml_filepath, "w") as f:
+        utils.dump_yml({"root": words}, f)
+    output_filepath = tmp_path / "corrections.jsonl"
+    output_dir = tmp_path / "output"
+
+    for kwargs in [
+        {"output_filepath": str(output_filepath)},
+        {"output_dir": str(output_dir)},
+    ]:
+        with pytest.raises(SystemExit):
+            find_corrections.__find_corrections__(
+                [str(yml_filepath)], "French", no_cache=True, **kwargs
+            )
+
+    for filepath in [output_filepath, output_dir / "a.jsonl"]:
+        with open(filepath, "r") as f:
+            records = [json.loads(x) for x in f]
+        assert [(x["key"], x["replace_pairs"]) for x in records] == [
+            (["root", "A"], [["chatt", "chat"]]),
+            (["root", "B"], []),
+        ]
@@ -0,0 +1,93 @@
+from danoan.perchance_tools.commands import client, serve
+from danoan.perchance_tools.core import backend, cache
+
+import json
+import pytest
+import threading
+from urllib import error, request
+
+
+def _responder(prompt_name: str, user_prompt: str) -> str:
+    if prompt_name == "correct-words" and "chatt" in user_prompt:
+        return '[["chatt", "chat"]]'
+    return backend.stub_response(prompt_name, user_prompt)
+
+
+@pytest.fixture
+def url():
+    backend.set_backend(backend.StubBackend(responder=_responder))
+    cache.set_cache(cache.MemoryCache())
+    server = serve.Server(("127.0.0.1", 0), threads=2, max_jobs=2)
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,))
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    thread.join()
+    server.server_close()
+    backend.set_backend(None)
+
+
+def _post(url: str, endpoint: str, body: bytes):
+    http_request = request.Request(f"{url}/{endpoint}", data=body)
+    try:
+        with request.urlopen(http_request) as response:
+            return response.status, json.loads(response.read())
+    except error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_endpoints(url):
+    assert client.send_request("health", url=url) == {"status": "ok"}
+    assert client.send_request("translate", {"words": ["chat"]}, url) == {
+        "translations": {"chat": ["chat"]}
+    }
+
+    yml = "root:\n  A:\n    words:\n    - chatt\n    - chien\n"
+    for jobs in [1, 100]:
+        response = client.send_request("correct", {"yml": yml, "jobs": jobs}, url)
+        assert response == {"yml": "root:\n  A:\n    words:\n    - chat\n    - chien\n"}
+
+    response = client.send_request("convert", {"yml": yml}, url)
+    assert response["perchance"].startswith("a\n  name=a\n")
+
+
+@pytest.mark.parametrize(
+    "endpoint,data",
+    [
+        ("translate", {"words": "chat"}),
+        ("translate", {"words": ["chat", 1]}),
+        ("translate", {}),
+        ("translate", {"words": ["chat"], "from_language": "Unknown"}),
+        ("correct", {"yml": "root: {}", "jobs": 0}),
+        ("correct", {"yml": "root: {}", "jobs": "2"}),
+        ("correct", {"yml": "root: {}", "jobs": True}),
+        ("correct", {"yml": "root: {}", "batch_words": -1}),
+        ("correct", {"yml": ["root"]}),
+        ("markdown-to-yml", {"markdown": None}),
+        ("convert", []),
+    ],
+)
+def test_invalid_request(url, endpoint, data):
+    status, response = _post(url, endpoint, json.dumps(data).encode("utf-8"))
+
+    assert status == 400
+    assert "error" in response
+
+
+def test_invalid_json(url):
+    assert _post(url, "translate", b"{words")[0] == 400
+    assert _post(url, "unknown", b"{}")[0] == 404
+
+    with pytest.raises(RuntimeError, match="words must be a list of strings"):
+        client.send_request("translate", {"words": "chat"}, url)
+
+
+def test_client(url, tmp_path, capsys):
+    input_filepath = tmp_path / "words.txt"
+    input_filepath.write_text("chat\n\nchien\n")
+
+    client.__client__("translate", str(input_filepath), url)
+
+    assert json.loads(capsys.readouterr().out) == {
+        "translations": {"chat": ["chat"], "chien": ["chien"]}
+    }
@@ -1,3 +1,5 @@
+from danoan.perchance_tools.core import cache
+
 import pytest
 
 
@@ -8,3 +10,14 @@ def pytest_addoption(parser):
 @pytest.fixture
 def openai_key(request):
     return request.config.getoption("--openai-key")
+
+
+@pytest.fixture(autouse=True)
+def response_cache(tmp_path):
+    """
+    Isolate the persistent cache of LLM responses of each test.
+    """
+    response_cache = cache.ResponseCache(tmp_path / "responses.sqlite3")
+    cache.set_cache(response_cache)
+    yield response_cache
+    cache.set_cache(None)
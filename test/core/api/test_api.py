@@ -1,12 +1,14 @@
-from danoan.perchance_tools.core import api, model
+from danoan.perchance_tools.core import api, checkpoint, model
 from danoan.llm_assistant.core import api as llm_assistant
 from danoan.llm_assistant.core.model import LLMAssistantConfiguration
 
 import pytest
 
 import io
+import json
 import pycountry
 from pathlib import Path
+import time
 import yaml
 
 SCRIPT_FOLDER = Path(__file__).parent
@@ -109,3 +111,137 @@ def test_translation(
     llm_assistant.LLMAssistant().setup(config)
 
     assert api.translate(word, from_language, to_language) == expected
+
+
+def test_find_corrections_jobs_keep_order(monkeypatch):
+    input_file = ASSETS_FOLDER / "replace_words" / "in_markdown_thesaurus.md"
+
+    def _call_correct_word_prompt(user_prompt, language, model):
+        # Answer the first prompts last to shuffle the completion order.
+        time.sleep(0.05 if "Sexe" in user_prompt else 0)
+        return "[]"
+
+    monkeypatch.setattr(api, "_call_correct_word_prompt", _call_correct_word_prompt)
+
+    with open(input_file, "r") as f_in:
+        d = api.create_dict_from_markdown(f_in)
+        language = pycountry.languages.get(name="French")
+
+        sequential = api.find_corrections(d, language)
+        concurrent = api.find_corrections(d, language, jobs=4)
+
+        assert [x.key for x in concurrent] == [x.key for x in sequential]
+
+
+def test_find_corrections_resume(monkeypatch, tmp_path):
+    input_file = ASSETS_FOLDER / "replace_words" / "in_markdown_thesaurus.md"
+    prompts = []
+
+    def _call_correct_word_prompt(user_prompt, language, model):
+        prompts.append(user_prompt)
+        return "[]"
+
+    monkeypatch.setattr(api, "_call_correct_word_prompt", _call_correct_word_prompt)
+
+    journal_path = tmp_path / "journal.jsonl"
+    language = pycountry.languages.get(name="French")
+    with open(input_file, "r") as f_in:
+        d = api.create_dict_from_markdown(f_in)
+
+    journal = checkpoint.CorrectionJournal(journal_path)
+    first = api.find_corrections(d, language, journal=journal)
+    num_categories = len(prompts)
+    assert num_categories == len(first)
+
+    # Change the words of the first category. It is the only one corrected again.
+    key, words = next(d.iter_key_paths())
+    d.set_leaf(key, ["nouveau"] + list(words))
+    journal = checkpoint.CorrectionJournal(journal_path).load()
+    second = api.find_corrections(d, language, jobs=2, journal=journal)
+
+    assert len(prompts) == num_categories + 1
+    assert "nouveau" in prompts[-1]
+    assert [x.key for x in second] == [x.key for x in first]
+
+
+@pytest.mark.parametrize("batch_response", ['{"1": [["kid", "enfant"]]}', "oops"])
+def test_find_corrections_batch_fallback(monkeypatch, batch_response):
+    input_file = ASSETS_FOLDER / "replace_words" / "in_markdown_thesaurus.md"
+    single_calls = []
+
+    def _call_correct_word_prompt(user_prompt, language, model):
+        single_calls.append(user_prompt)
+        return "[]"
+
+    monkeypatch.setattr(api, "_call_correct_word_prompt", _call_correct_word_prompt)
+    monkeypatch.setattr(
+        api, "_call_correct_words_batch_prompt", lambda *args: batch_response
+    )
+
+    with open(input_file, "r") as f_in:
+        d = api.create_dict_from_markdown(f_in)
+        replace_instructions = api.find_corrections(
+            d, pycountry.languages.get(name="French"), batch_words=100
+        )
+
+    assert [x.key[-2:] for x in replace_instructions] == [
+        ["Sexe", "Adjectifs"],
+        ["Sexe", "Noms"],
+        ["Age", "Adjectifs"],
+    ]
+    if batch_response == "oops":
+        assert len(single_calls) == 3
+    else:
+        assert len(single_calls) == 2
+        assert replace_instructions[1].replace_pairs == [["kid", "enfant"]]
+
+
+def test_translate_many(monkeypatch):
+    batches = []
+
+    def _call_translate_many_prompt(words, from_language, to_language, model):
+        batches.append(words)
+        return json.dumps({w: [w.upper()] for w in words if w != "Sexe"})
+
+    monkeypatch.setattr(api, "_call_translate_many_prompt", _call_translate_many_prompt)
+    monkeypatch.setattr(api, "translate", lambda word, *args: [f"{word}?"])
+
+    words = ["Personnages", "Age", "Personnages", "Sexe", "Age", "Noms"]
+    expected = {
+        "Personnages": ["PERSONNAGES"],
+        "Age": ["AGE"],
+        "Sexe": ["Sexe?"],
+        "Noms": ["NOMS"],
+    }
+    assert api.translate_many(words, "French", "English", batch_size=2) == expected
+    assert batches == [["Personnages", "Age"], ["Sexe", "Noms"]]
+
+    # Translations found in the batch responses are served from the cache.
+    assert api.translate_many(words, "French", "English", batch_size=2) == expected
+    assert batches[2:] == [["Sexe"]]
+
+
+def test_markdown_to_yml_deep_nesting():
+    depth = 5000
+    markdown_text = "".join(f"{'#' * level} T{level}\n" for level in range(1, depth))
+    d = api.create_dict_from_markdown(io.StringIO(markdown_text + "word\n"))
+
+    node = d.extract()["root"]
+    for level in range(1, depth):
+        node = node[f"T{level}"]
+    assert node == {"words": ["word"]}
+
+
+def test_write_yml_from_markdown():
+    input_file = ASSETS_FOLDER / "markdown_to_yml" / "in_markdown_thesaurus.md"
+    expected_file = ASSETS_FOLDER / "markdown_to_yml" / "ex_markdown_thesaurus.yml"
+
+    with open(input_file, "r") as f_in, open(expected_file, "r") as f_ex:
+        ss = io.StringIO()
+        api.write_yml_from_markdown(f_in, ss)
+        ss.seek(0, io.SEEK_SET)
+
+        code_generated_yaml = yaml.load(ss, Loader=yaml.Loader)
+        expected_yaml = yaml.load(f_ex, Loader=yaml.Loader)
+
+        assert code_generated_yaml == expected_yaml
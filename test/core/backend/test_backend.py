@@ -0,0 +1,95 @@
+from danoan.perchance_tools.core import api, backend, metrics
+
+import pytest
+
+import io
+import pickle
+import pycountry
+
+MARKDOWN = """# Personnages
+
+## Sexe
+
+### Adjectifs
+
+masculin
+féminin
+
+## Age
+
+### Adjectifs
+
+jeune
+vieux
+"""
+
+
+@pytest.fixture
+def word_dict():
+    return api.create_dict_from_markdown(io.StringIO(MARKDOWN))
+
+
+@pytest.fixture(autouse=True)
+def reset_backend():
+    models = (api.CORRECT_WORDS_MODEL, api.TRANSLATE_MODEL)
+    yield
+    backend.set_backend(None)
+    api.set_models(*models)
+
+
+@pytest.mark.parametrize("batch_words", [0, 100])
+def test_stub_backend(word_dict, batch_words):
+    backend.set_backend(backend.StubBackend())
+    metrics.reset_metrics()
+    language = pycountry.languages.get(name="French")
+
+    replace_instructions = api.find_corrections(
+        word_dict, language, jobs=2, batch_words=batch_words
+    )
+    assert [x.replace_pairs for x in replace_instructions] == [[], []]
+    assert metrics.get_metrics().parse_failures == {}
+
+    assert api.translate("chat", "French", "English") == ["chat"]
+    assert api.translate_many(["jeune", "vieux"], "French", "English") == {
+        "jeune": ["jeune"],
+        "vieux": ["vieux"],
+    }
+
+
+def test_stub_backend_latency():
+    stub = backend.StubBackend(latency=0.01, jitter=0.01, seed=1)
+    stub = pickle.loads(pickle.dumps(stub))
+
+    response = stub.complete("translate-word", "", "input: <<chat>>", "model")
+    assert response.content == '["chat"]'
+
+
+def test_record_replay(tmp_path, word_dict):
+    recording = tmp_path / "recording.jsonl"
+    answers = []
+
+    def _responder(prompt_name, user_prompt):
+        answers.append(prompt_name)
+        return backend.stub_response(prompt_name, user_prompt)
+
+    api.set_models(correct_words_model="local-model")
+    backend.set_backend(
+        backend.RecordReplayBackend(
+            recording, "record", backend.StubBackend(responder=_responder)
+        )
+    )
+    language = pycountry.languages.get(name="French")
+    recorded = api.find_corrections(word_dict, language)
+    assert len(answers) == 2
+
+    backend.set_backend(
+        pickle.loads(pickle.dumps(backend.RecordReplayBackend(recording, "replay")))
+    )
+    replayed = api.find_corrections(word_dict, language)
+    assert len(answers) == 2
+    assert [x.key for x in replayed] == [x.key for x in recorded]
+
+    # The model is part of the recorded prompt.
+    api.set_models(correct_words_model="other-model")
+    with pytest.raises(backend.ReplayMissError):
+        api.find_corrections(word_dict, language)
@@ -0,0 +1,95 @@
+from danoan.perchance_tools.core import batch
+
+import functools
+import io
+import pytest
+from typing import TextIO
+
+
+def _copy_upper(prefix: str, filepath: str, output_stream: TextIO):
+    with open(filepath, "r") as f:
+        text = f.read()
+    # A failed file leaves a partial output.
+    output_stream.write(prefix)
+    if text == "fail":
+        raise ValueError("invalid content")
+    output_stream.write(f"{text.upper()}\n")
+
+
+@pytest.fixture
+def input_files(tmp_path):
+    list_filepath = []
+    for name, text in [("a", "first"), ("b", "fail"), ("c", "third")]:
+        filepath = tmp_path / f"{name}.txt"
+        filepath.write_text(text)
+        list_filepath.append(str(filepath))
+    return list_filepath
+
+
+@pytest.mark.parametrize(
+    "jobs,expected", [(1, "> FIRST\n> > THIRD\n"), (2, "> FIRST\n> THIRD\n")]
+)
+def test_run_ordered_output(input_files, jobs, expected):
+    output_stream = io.StringIO()
+    results = batch.run(
+        functools.partial(_copy_upper, "> "), input_files, output_stream, jobs
+    )
+
+    # Without a pool, the outputs are written as they are produced.
+    assert output_stream.getvalue() == expected
+    assert [x.error is None for x in results] == [True, False, True]
+    assert "invalid content" in results[1].error
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_run_output_dir(input_files, tmp_path, jobs):
+    output_dir = tmp_path / "output"
+    output_stream = io.StringIO()
+    results = batch.run(
+        functools.partial(_copy_upper, ""),
+        input_files,
+        output_stream,
+        jobs,
+        output_dir,
+        ".out",
+    )
+
+    assert output_stream.getvalue() == ""
+    assert (output_dir / "a.out").read_text() == "FIRST\n"
+    assert (output_dir / "c.out").read_text() == "THIRD\n"
+    assert results[1].error is not None
+    assert not (output_dir / "b.out").exists()
+
+
+def test_run_output_name_conflict(tmp_path):
+    with pytest.raises(ValueError):
+        batch.run(
+            functools.partial(_copy_upper, ""),
+            ["x/a.txt", "y/a.txt"],
+            io.StringIO(),
+            output_dir=tmp_path,
+        )
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_run_keep_partial(input_files, tmp_path, jobs):
+    output_dir = tmp_path / "output"
+    output_stream = io.StringIO()
+    process = functools.partial(_copy_upper, "> ")
+
+    batch.run(process, input_files, output_stream, jobs, keep_partial=True)
+    batch.run(process, input_files, io.StringIO(), jobs, output_dir, ".out", True)
+
+    assert output_stream.getvalue() == "> FIRST\n> > THIRD\n"
+    assert (output_dir / "b.out").read_text() == "> "
+
+
+def test_run_streams(input_files):
+    output_stream = io.StringIO()
+
+    def _process(filepath: str, stream: TextIO):
+        if filepath == input_files[1]:
+            assert output_stream.getvalue() == "FIRST\n"
+        _copy_upper("", filepath, stream)
+
+    batch.run(_process, input_files, output_stream)
@@ -0,0 +1,100 @@
+from danoan.perchance_tools.core import api, backend, cache
+
+import time
+
+
+def test_get_and_put(tmp_path):
+    response_cache = cache.ResponseCache(tmp_path / "cache.sqlite3")
+    key = cache.ResponseCache.make_key(
+        "translate-word", "chaise", "French", "English", "gpt-3.5-turbo", "hash"
+    )
+
+    assert response_cache.get(key) is None
+    response_cache.put(key, "translate-word", '["chair"]')
+    assert response_cache.get(key) == '["chair"]'
+
+    other_process_cache = cache.ResponseCache(tmp_path / "cache.sqlite3")
+    assert other_process_cache.get(key) == '["chair"]'
+
+    stats = response_cache.stats()
+    assert stats.entries == 1
+    assert stats.entries_per_operation == {"translate-word": 1}
+
+
+def test_prune(tmp_path):
+    response_cache = cache.ResponseCache(tmp_path / "cache.sqlite3")
+    for index in range(4):
+        response_cache.put(f"key-{index}", "correct-words", "x" * 100)
+    response_cache.get("key-0")
+
+    assert response_cache.prune(max_size_bytes=200) == 2
+    assert response_cache.get("key-0") is not None
+    assert response_cache.get("key-3") is not None
+
+    time.sleep(0.01)
+    assert response_cache.prune(max_age_seconds=0) == 2
+    assert response_cache.stats().entries == 0
+
+
+def test_cached_call(response_cache):
+    calls = []
+
+    def _call():
+        calls.append(1)
+        return "[]"
+
+    for _ in range(3):
+        response = cache.cached_call(
+            "correct-words", "prompt", "fra", "fra", "gpt-4o", "hash", _call
+        )
+        assert response == "[]"
+
+    assert len(calls) == 1
+
+
+def test_memory_cache(tmp_path):
+    response_cache = cache.ResponseCache(tmp_path / "cache.sqlite3")
+    response_cache.put("key-0", "translate-word", "a")
+
+    memory_cache = cache.MemoryCache(response_cache, max_entries=2)
+    assert memory_cache.get("key-0") == "a"
+    memory_cache.put("key-1", "translate-word", "b")
+    memory_cache.put("key-2", "translate-word", "c")
+    assert response_cache.get("key-2") == "c"
+
+    # The least recently used entry is evicted from memory only.
+    response_cache.clear()
+    assert memory_cache.get("key-0") is None
+    assert memory_cache.get("key-1") == "b"
+    assert memory_cache.get("key-2") == "c"
+
+    memory_only = cache.MemoryCache()
+    memory_only.put("key", "translate-word", "d")
+    assert memory_only.get("key") == "d"
+
+
+class _LLMBackend(backend.LLMBackend):
+    def __init__(self):
+        self.calls = 0
+
+    def complete(self, prompt_name, system_prompt, user_prompt, model, **data):
+        self.calls += 1
+        return backend.LLMResponse('["chair"]')
+
+
+def test_stub_responses_are_not_shared(tmp_path, response_cache):
+    llm_backend = _LLMBackend()
+    try:
+        backend.set_backend(backend.StubBackend())
+        assert api.translate("chaise", "French", "English") == ["chaise"]
+        backend.set_backend(
+            backend.RecordReplayBackend(tmp_path / "rec.jsonl", "record", llm_backend)
+        )
+        assert api.translate("chaise", "French", "English") == ["chair"]
+        backend.set_backend(llm_backend)
+        assert api.translate("chaise", "French", "English") == ["chair"]
+    finally:
+        backend.set_backend(None)
+
+    # The recording backend shares the responses of the LLM it records.
+    assert llm_backend.calls == 1
@@ -0,0 +1,29 @@
+from danoan.perchance_tools.core import checkpoint
+
+
+def test_journal_roundtrip(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = checkpoint.CorrectionJournal(path)
+    words_hash = checkpoint.hash_words(["chat", "chein"])
+    journal.append(("root", "A"), words_hash, [["chein", "chien"]])
+    journal.append(("root", "B"), checkpoint.hash_words(["x"]), [])
+
+    # A line left incomplete by an interrupted run is ignored.
+    with open(path, "a") as f:
+        f.write('{"key": ["root", "C"], "words_ha')
+
+    loaded = checkpoint.CorrectionJournal(path).load()
+    assert len(loaded) == 2
+    assert loaded.get(["root", "A"], words_hash) == [["chein", "chien"]]
+    assert loaded.get(["root", "A"], checkpoint.hash_words(["chat"])) is None
+    assert loaded.get(["root", "B"], checkpoint.hash_words(["x"])) == []
+
+
+def test_journal_keeps_last_record(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    words_hash = checkpoint.hash_words(["a"])
+    checkpoint.CorrectionJournal(path).append(["root"], words_hash, [])
+    checkpoint.CorrectionJournal(path).append(["root"], words_hash, [["a", "b"]])
+
+    loaded = checkpoint.CorrectionJournal(path).load()
+    assert loaded.get(["root"], words_hash) == [["a", "b"]]
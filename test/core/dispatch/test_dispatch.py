@@ -0,0 +1,94 @@
+from danoan.perchance_tools.core import dispatch
+
+import pytest
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket():
+    clock = FakeClock()
+    bucket = dispatch.TokenBucket(60, capacity=2, clock=clock)
+
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) == pytest.approx(1.0)
+    assert bucket.reserve(1) == pytest.approx(2.0)
+
+    clock.now += 10
+    assert bucket.reserve(2) == 0
+
+
+def test_dispatcher_rate(monkeypatch):
+    clock = FakeClock()
+    dispatcher = dispatch.Dispatcher(
+        dispatch.DispatcherSettings(requests_per_minute=60, tokens_per_minute=600),
+        sleep=clock.sleep,
+        clock=clock,
+    )
+
+    for _ in range(70):
+        dispatcher.call(lambda: "ok", estimated_tokens=5)
+    # One minute of quota is available at start, then one request per second.
+    assert clock.now == pytest.approx(10.0)
+
+
+def test_dispatcher_retry():
+    clock = FakeClock()
+    dispatcher = dispatch.Dispatcher(
+        dispatch.DispatcherSettings(max_retries=3, base_delay=1.0),
+        sleep=clock.sleep,
+        clock=clock,
+    )
+    errors = [RateLimitError(), TimeoutError()]
+
+    def _call():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert dispatcher.call(_call) == "ok"
+    assert len(clock.sleeps) == 2
+    assert clock.sleeps[0] <= 1.0 and clock.sleeps[1] <= 2.0
+    # The rate limit sets the limit to one call, the success increments it.
+    assert dispatcher.concurrency_limit == 2.0
+
+
+def test_dispatcher_errors():
+    clock = FakeClock()
+    dispatcher = dispatch.Dispatcher(
+        dispatch.DispatcherSettings(max_retries=2), sleep=clock.sleep, clock=clock
+    )
+
+    def _invalid():
+        raise ValueError()
+
+    with pytest.raises(ValueError):
+        dispatcher.call(_invalid)
+    assert clock.sleeps == []
+
+    def _rate_limited():
+        raise RateLimitError()
+
+    with pytest.raises(RateLimitError):
+        dispatcher.call(_rate_limited)
+    assert len(clock.sleeps) == 2
+
+
+def test_settings_split():
+    settings = dispatch.DispatcherSettings(100, 1000, 8)
+    assert settings.split(4) == dispatch.DispatcherSettings(25, 250, 2)
@@ -0,0 +1,35 @@
+from danoan.perchance_tools.core import manifest, prompts
+
+import pycountry
+
+
+def test_manifest_roundtrip(tmp_path):
+    manifest_filepath = tmp_path / manifest.MANIFEST_FILENAME
+    expected = manifest.Manifest("0.1.0", "a", "b")
+    expected.inputs["one.md"] = manifest.InputRecord("s", "y", "c", "p")
+    expected.save(manifest_filepath)
+
+    assert manifest.Manifest.load(manifest_filepath) == expected
+
+
+def test_manifest_invalid(tmp_path):
+    manifest_filepath = tmp_path / manifest.MANIFEST_FILENAME
+    assert manifest.Manifest.load(manifest_filepath) == manifest.Manifest()
+
+    manifest_filepath.write_text("{")
+    assert manifest.Manifest.load(manifest_filepath) == manifest.Manifest()
+
+
+def test_dependencies_follow_prompts(tmp_path):
+    language = pycountry.languages.get(name="French")
+    correction = manifest.get_correction_dependencies(language)
+    conversion = manifest.get_conversion_dependencies()
+
+    (tmp_path / "correct_words").mkdir()
+    (tmp_path / "correct_words" / "system.txt.tpl").write_text("Other prompt")
+    prompts.set_override_directory(tmp_path)
+    try:
+        assert manifest.get_correction_dependencies(language) != correction
+        assert manifest.get_conversion_dependencies() == conversion
+    finally:
+        prompts.set_override_directory(None)
@@ -0,0 +1,36 @@
+from danoan.perchance_tools.core import cache, metrics
+
+import pickle
+import pytest
+
+
+def test_metrics_report():
+    collected = metrics.Metrics()
+    for latency in [0.1, 0.2, 0.3, 0.4]:
+        collected.record_call("correct-words", "gpt-4o", latency, 1000, 100)
+    collected.record_call("correct-words", "gpt-4o", 5.0, error=True)
+    collected.record_cache("correct-words", hit=True)
+    collected.record_cache("correct-words", hit=False)
+    collected.record_parse_failure("correct-words")
+
+    worker = pickle.loads(pickle.dumps(collected))
+    collected.merge(worker)
+
+    report = collected.report()
+    (calls,) = report["calls"]
+    assert calls["calls"] == 10
+    assert calls["errors"] == 2
+    assert calls["prompt_tokens"] == 8000
+    assert calls["latency_seconds"]["p50"] == 0.3
+    assert calls["latency_seconds"]["max"] == 5.0
+    assert report["estimated_cost_usd"] == pytest.approx(0.028)
+    assert report["cache"]["correct-words"]["hit_rate"] == 0.5
+    assert report["parse_failures"] == {"correct-words": 2}
+
+
+def test_cached_call_metrics(response_cache):
+    collected = metrics.reset_metrics()
+    for _ in range(3):
+        cache.cached_call("translate-word", "chat", "fra", "eng", "m", "h", lambda: "x")
+
+    assert collected.cache["translate-word"] == metrics.CacheStats(hits=2, misses=1)
@@ -0,0 +1,56 @@
+from danoan.perchance_tools.core import api, model
+
+from pathlib import Path
+
+SCRIPT_FOLDER = Path(__file__).parent
+ASSETS_FOLDER = SCRIPT_FOLDER.parent / "api" / "assets"
+
+
+def test_compact_word_dict():
+    input_file = ASSETS_FOLDER / "replace_words" / "in_markdown_thesaurus.md"
+    with open(input_file, "r") as f_in:
+        d = api.create_dict_from_markdown(f_in)
+
+    c = model.CompactWordDict(d.extract())
+    assert c.extract() == d.extract()
+    assert str(c) == str(d)
+
+    ci = model.ReplaceInstructions(
+        ["root", "Personnages", "Age", "Adjectifs"],
+        [("baby", "bebe"), ("kid", "enfant")],
+    )
+    assert api.replace_words(c, [ci]).extract() == api.replace_words(d, [ci]).extract()
+
+    c["root"]["New"] = {"words": ["masculin", "neuf"]}
+    assert c["root"]["New"]["words"].extract() == ["masculin", "neuf"]
+
+
+def test_key_path_index():
+    for word_dict_type in [model.WordDict, model.CompactWordDict]:
+        w = word_dict_type(
+            {
+                "root": {
+                    "A": {"B1": {"words": ["a", "b"]}, "B2": {"words": ["c"]}},
+                    "C": {"words": ["d"]},
+                }
+            }
+        )
+
+        assert list(w.iter_key_paths()) == [
+            (("root", "A", "B1"), ["a", "b"]),
+            (("root", "A", "B2"), ["c"]),
+            (("root", "C"), ["d"]),
+        ]
+
+        w.set_leaf(["root", "A", "B2"], ["e"])
+        assert w.get_leaf(("root", "A", "B2")) == ["e"]
+        assert w["root"]["A"]["B2"]["words"].extract() == ["e"]
+
+        w["root"]["C"]["words"] = ["f"]
+        assert w.get_leaf(("root", "C")) == ["f"]
+
+        w["root"]["A"] = {"words": ["g"]}
+        assert [path for path, _ in w.iter_key_paths()] == [
+            ("root", "A"),
+            ("root", "C"),
+        ]
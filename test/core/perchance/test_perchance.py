@@ -0,0 +1,121 @@
+from danoan.perchance_tools.core import perchance
+
+import io
+import sys
+
+
+class _RecordingStream(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+        self.flushes = 0
+
+    def write(self, s):
+        self.writes.append(s)
+        return super().write(s)
+
+    def flush(self):
+        self.flushes += 1
+
+
+KEY_PATHS = [
+    {"path": ["Animals", "Pets"], "words": ["cat", "dog"]},
+    {"path": ["Animals", "Farm"], "words": ["cow"]},
+    {"path": ["Colors"], "words": ["red", "blue"]},
+]
+
+
+def test_print_perchance_dict():
+    text = perchance.print_perchance_dict(perchance.key_paths_to_dict(KEY_PATHS))
+    assert text == (
+        "animals\n"
+        "  name=animals\n"
+        "  pets\n"
+        "    name=pets\n"
+        "    words\n"
+        "      cat\n"
+        "      dog\n"
+        "  farm\n"
+        "    name=farm\n"
+        "    words\n"
+        "      cow\n"
+        "colors\n"
+        "  name=colors\n"
+        "  words\n"
+        "    red\n"
+        "    blue\n"
+    )
+
+
+def test_print_deep_perchance_dict():
+    depth = sys.getrecursionlimit() + 100
+    key_path = {"path": [f"level {i}" for i in range(depth)], "words": ["leaf"]}
+
+    lines = perchance.print_perchance_dict(
+        perchance.key_paths_to_dict([key_path])
+    ).splitlines()
+
+    assert len(lines) == 2 * depth + 2
+    assert lines[-1] == (2 * depth + 2) * " " + "leaf"
+
+
+def test_write_key_paths():
+    expected = perchance.print_perchance_dict(perchance.key_paths_to_dict(KEY_PATHS))
+    output_stream = _RecordingStream()
+
+    perchance.write_key_paths(iter(KEY_PATHS), output_stream, chunk_size=32)
+
+    assert output_stream.getvalue() == expected
+    assert output_stream.flushes == 2
+    assert len(output_stream.writes) > 2
+
+
+SOURCE_KEY_PATHS = [
+    {"path": ("root", "Animaux", "Chats"), "words": ["siamois"]},
+    {"path": ("root", "Animaux", "Chiens"), "words": ["caniche"]},
+    {"path": ("root", "Couleurs"), "words": ["rouge"]},
+    {"path": ("root", "Bêtes", "Loups"), "words": ["gris"]},
+]
+
+TRANSLATIONS = {
+    "Animaux": ["Animals"],
+    "Bêtes": ["Animals"],
+    "Chats": ["Cats"],
+    "Chiens": ["Dogs"],
+    "Couleurs": ["Colors"],
+    "Loups": ["Wolves"],
+}
+
+
+def test_write_key_paths_streams():
+    translations = dict(TRANSLATIONS, Bêtes=["Beasts"])
+    key_paths = [
+        perchance.translate_key_path(x, translations) for x in SOURCE_KEY_PATHS
+    ]
+    output_stream = _RecordingStream()
+
+    def _key_paths():
+        yield from key_paths
+        # Each source category is written once the next one starts.
+        assert output_stream.getvalue().splitlines()[-1] == "    rouge"
+
+    perchance.write_key_paths(_key_paths(), output_stream)
+
+    expected = perchance.print_perchance_dict(perchance.key_paths_to_dict(key_paths))
+    assert output_stream.getvalue() == expected
+    assert output_stream.flushes == 3
+
+
+def test_write_key_paths_collision(caplog):
+    output_stream = io.StringIO()
+    key_paths = [
+        perchance.translate_key_path(x, TRANSLATIONS) for x in SOURCE_KEY_PATHS
+    ]
+
+    perchance.write_key_paths(iter(key_paths), output_stream)
+
+    # Animals is written before Bêtes is translated to the same name.
+    lines = output_stream.getvalue().splitlines()
+    assert lines.count("animals") == 2
+    assert lines.index("colors") < lines.index("  wolves")
+    assert "Top-level category animals is written twice" in caplog.text
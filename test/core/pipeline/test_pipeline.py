@@ -0,0 +1,132 @@
+from danoan.perchance_tools.core import api, backend, perchance, pipeline, utils
+
+import pytest
+
+import io
+import pycountry
+from pathlib import Path
+from typing import Optional
+
+ASSETS_FOLDER = Path(__file__).parent.parent / "api" / "assets"
+MARKDOWN_FILE = ASSETS_FOLDER / "replace_words" / "in_markdown_thesaurus.md"
+
+
+def _responder(prompt_name: str, user_prompt: str) -> str:
+    if prompt_name == "correct-words" and "kid" in user_prompt:
+        return '[["kid", "enfant"]]'
+    return backend.stub_response(prompt_name, user_prompt)
+
+
+@pytest.fixture(autouse=True)
+def stub_backend():
+    backend.set_backend(backend.StubBackend(responder=_responder))
+    yield
+    backend.set_backend(None)
+
+
+class _CountingStream(io.StringIO):
+    def __init__(self, text: str):
+        super().__init__(text)
+        self.lines_read = 0
+        self.exhausted = False
+
+    def __next__(self):
+        try:
+            line = super().__next__()
+        except StopIteration:
+            self.exhausted = True
+            raise
+        self.lines_read += 1
+        return line
+
+
+@pytest.mark.parametrize("jobs,batch_words", [(1, 0), (4, 0), (1, 100)])
+def test_run(jobs, batch_words):
+    language = pycountry.languages.get(name="French")
+    with open(MARKDOWN_FILE, "r") as f:
+        markdown_text = f.read()
+
+    word_dict = api.create_dict_from_markdown(io.StringIO(markdown_text))
+    word_dict = api.replace_words(
+        word_dict, api.find_corrections(word_dict, language, jobs, batch_words)
+    )
+    key_paths = list(utils.collect_key_path(word_dict, "words"))
+    translations = api.translate_many(
+        [x for kp in key_paths for x in kp["path"] if x != "root"], "French", "English"
+    )
+    expected = perchance.print_perchance_dict(
+        perchance.key_paths_to_dict(
+            perchance.translate_key_path(x, translations) for x in key_paths
+        )
+    )
+
+    output_stream = io.StringIO()
+    pipeline.run(io.StringIO(markdown_text), output_stream, language, jobs, batch_words)
+
+    if batch_words == 0:
+        assert "enfant" in output_stream.getvalue()
+    assert output_stream.getvalue() == expected + "\n"
+
+
+def test_stages_stream():
+    markdown_text = "".join(f"# Category {i}\n## Leaf\nword {i}\n" for i in range(100))
+    stream = _CountingStream(markdown_text)
+    language = pycountry.languages.get(name="French")
+
+    key_paths = pipeline.translate(
+        pipeline.correct(pipeline.parse(stream), language, jobs=2), batch_size=2
+    )
+    first = next(key_paths)
+
+    assert first["path"] == ["Category 0", "Leaf"]
+    assert not stream.exhausted
+    assert stream.lines_read < 30
+
+    chunks = pipeline.render(key_paths)
+    assert next(chunks).startswith("category_1\n")
+    assert not stream.exhausted
+    assert len(list(chunks)) == 98
+
+
+class _WriteRecordingStream(io.StringIO):
+    def __init__(self, input_stream: _CountingStream):
+        super().__init__()
+        self.input_stream = input_stream
+        self.lines_read_at_first_write: Optional[int] = None
+
+    def write(self, s):
+        if self.lines_read_at_first_write is None:
+            self.lines_read_at_first_write = self.input_stream.lines_read
+        return super().write(s)
+
+
+def test_run_streams():
+    markdown_text = "".join(f"# Category {i}\n## Leaf\nword {i}\n" for i in range(300))
+    stream = _CountingStream(markdown_text)
+    output_stream = _WriteRecordingStream(stream)
+
+    pipeline.run(stream, output_stream, pycountry.languages.get(name="French"))
+
+    lines_read = output_stream.lines_read_at_first_write
+    assert lines_read is not None and lines_read < 300
+    assert output_stream.getvalue().startswith("category_0\n")
+
+
+def test_correct_reports_issues(caplog):
+    def _responder(prompt_name: str, user_prompt: str) -> str:
+        if prompt_name == "correct-words":
+            return '[["chatt", "chat"], ["unknown", "x"], ["chien"]]'
+        return backend.stub_response(prompt_name, user_prompt)
+
+    backend.set_backend(backend.StubBackend(responder=_responder))
+    language = pycountry.languages.get(name="French")
+    key_paths = [{"path": ("root", "A"), "words": ["chien", "chatt"]}]
+
+    corrected = list(pipeline.correct(key_paths, language))
+
+    assert corrected == [{"path": ("root", "A"), "words": ["chat", "chien"]}]
+    warnings = [x.getMessage() for x in caplog.records if x.levelname == "WARNING"]
+    assert warnings == [
+        "Correction not applied: root/A: invalid instruction",
+        "Correction not applied: root/A: word 'unknown' not found",
+    ]
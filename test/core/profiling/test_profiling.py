@@ -0,0 +1,25 @@
+from danoan.perchance_tools.core import api, profiling
+
+import io
+
+
+def test_stage_disabled():
+    profiling.disable()
+    with profiling.stage("parse"):
+        pass
+    assert profiling.get_profiler() is None
+
+
+def test_stage_timings():
+    profiler = profiling.enable()
+    try:
+        api.create_dict_from_markdown(io.StringIO("# A\n## B\nword\n"))
+        with profiling.stage("custom"):
+            pass
+    finally:
+        profiling.disable()
+
+    assert profiler.calls == {"parse": 1, "custom": 1}
+    lines = profiler.format().splitlines()
+    assert [x.split()[0] for x in lines[1:-1]] == ["parse", "custom"]
+    assert lines[-1].startswith("wall time")
@@ -0,0 +1,35 @@
+from danoan.perchance_tools.core import prompts
+
+
+def test_prompts_are_read_once(monkeypatch):
+    reads = []
+    read_asset_as_text = prompts._read_asset_as_text
+
+    def _read_asset_as_text(asset_relative_path):
+        reads.append(asset_relative_path)
+        return read_asset_as_text(asset_relative_path)
+
+    monkeypatch.setattr(prompts, "_read_asset_as_text", _read_asset_as_text)
+
+    registry = prompts.PromptRegistry()
+    for _ in range(3):
+        user_prompt = registry.render(
+            "correct_words/user.txt.tpl", categories=["Sexe"], words=["masculin"]
+        )
+        assert "masculin" in user_prompt
+
+    assert len(reads) == 1
+
+
+def test_override_directory(tmp_path):
+    (tmp_path / "translate").mkdir()
+    (tmp_path / "translate" / "user.txt.tpl").write_text("Translate {{word}}")
+
+    registry = prompts.PromptRegistry(tmp_path)
+    assert registry.render("translate/user.txt.tpl", word="chaise") == (
+        "Translate chaise"
+    )
+    assert "translator" in registry.get_text("translate/system.txt.tpl")
+    assert registry.hash("translate/user.txt.tpl") != prompts.PromptRegistry().hash(
+        "translate/user.txt.tpl"
+    )
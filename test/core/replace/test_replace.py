@@ -0,0 +1,88 @@
+from danoan.perchance_tools.core import api, checkpoint, model, replace
+
+import io
+from pathlib import Path
+
+ASSETS_FOLDER = Path(__file__).parent.parent / "api" / "assets"
+MARKDOWN_FILE = ASSETS_FOLDER / "replace_words" / "in_markdown_thesaurus.md"
+KEY = ["root", "Personnages", "Age", "Adjectifs"]
+
+
+def _load_word_dict() -> model.WordDict:
+    with open(MARKDOWN_FILE, "r") as f:
+        return api.create_dict_from_markdown(f)
+
+
+def test_apply_as_replace_words():
+    instructions = [
+        model.ReplaceInstructions(KEY, [("baby", "bebe")]),
+        model.ReplaceInstructions(KEY, [("kid", "enfant")]),
+    ]
+    expected = api.replace_words(_load_word_dict(), instructions)
+
+    for word_dict in [
+        _load_word_dict(),
+        model.CompactWordDict(_load_word_dict().extract()),
+    ]:
+        bulk_replace = replace.BulkReplace()
+        bulk_replace.add_instructions(instructions)
+        report = bulk_replace.apply(word_dict)
+
+        assert word_dict.extract() == expected.extract()
+        assert (report.instructions, report.leaves, report.replaced) == (2, 1, 2)
+        assert report.issues == []
+
+
+def test_read_reports_issues():
+    jsonl_stream = io.StringIO(
+        '{"key": ["root", "Personnages", "Age", "Adjectifs"],'
+        ' "replace_pairs": [["baby", "bebe"], ["kid", "enfant"], ["unknown", "x"]]}\n'
+        "\n"
+        '{"key": ["root", "Personnages", "Age", "Adjectifs"],'
+        ' "replace_pairs": [["baby", "bebé"]]}\n'
+        '{"key": ["root", "Missing"], "replace_pairs": [["a", "b"]]}\n'
+        '{"key": ["root"], "replace_pairs": [["a"]]}\n'
+        '{"key": ["root", "Incom'
+    )
+    word_dict = _load_word_dict()
+
+    report = replace.BulkReplace().read(jsonl_stream).apply(word_dict)
+
+    words = word_dict.get_leaf(KEY)
+    assert "bebe" in words and "enfant" in words and "baby" not in words
+    assert report.replaced == 2
+    assert [(x.kind, x.original, x.line) for x in report.issues] == [
+        (replace.CONFLICT, "baby", None),
+        (replace.INVALID, None, 5),
+        (replace.INVALID, None, 6),
+        (replace.MISSING_WORD, "unknown", None),
+        (replace.MISSING_KEY, None, None),
+    ]
+
+
+def test_read_correction_journal(tmp_path):
+    word_dict = _load_word_dict()
+    journal = checkpoint.CorrectionJournal(tmp_path / "corrections.jsonl")
+    for path, words in word_dict.iter_key_paths():
+        replace_pairs = [["kid", "enfant"]] if list(path) == KEY else []
+        journal.append(path, checkpoint.hash_words(words), replace_pairs)
+
+    with open(journal.path, "r") as f:
+        report = replace.BulkReplace().read(f).apply(word_dict)
+
+    assert "enfant" in word_dict.get_leaf(KEY)
+    assert (report.replaced, report.issues) == (1, [])
+
+
+def test_add_reports_invalid_pairs():
+    word_dict = _load_word_dict()
+    bulk_replace = replace.BulkReplace()
+    bulk_replace.add(KEY, [("baby", "bebe"), ("kid",), "ab", ["kid", 1]])
+
+    report = bulk_replace.apply(word_dict)
+
+    assert "bebe" in word_dict.get_leaf(KEY)
+    assert (report.instructions, report.replaced) == (4, 1)
+    assert [(x.kind, x.key) for x in report.issues] == [
+        (replace.INVALID, tuple(KEY))
+    ] * 3
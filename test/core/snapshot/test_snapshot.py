@@ -0,0 +1,60 @@
+from danoan.perchance_tools.core import api, model, snapshot, utils
+
+import io
+from pathlib import Path
+
+SCRIPT_FOLDER = Path(__file__).parent
+ASSETS_FOLDER = SCRIPT_FOLDER.parent / "api" / "assets"
+
+
+def test_snapshot_round_trip():
+    input_file = ASSETS_FOLDER / "markdown_to_yml" / "in_markdown_thesaurus.md"
+    with open(input_file, "r") as f_in:
+        d = api.create_dict_from_markdown(f_in)
+    d["root"]["Empty"] = {}
+    d["root"]["Mixed"] = {"words": ["a\x00b", 1984, None], "other": []}
+
+    ss = io.BytesIO()
+    snapshot.dump(d, ss)
+    ss.seek(0, io.SEEK_SET)
+
+    assert snapshot.load(ss).extract() == d.extract()
+    ss.seek(0, io.SEEK_SET)
+    assert snapshot.load(ss, compact=True).extract() == d.extract()
+
+
+def test_load_word_dict(tmp_path):
+    d = model.WordDict({"root": {"A": {"words": ["é", "b"]}}})
+
+    yml_filepath = tmp_path / "words.yml"
+    with open(yml_filepath, "w") as f:
+        utils.dump_yml(d.extract(), f)
+
+    snapshot_filepath = tmp_path / "words.snapshot"
+    with open(snapshot_filepath, "wb") as f:
+        snapshot.dump(d, f)
+
+    assert utils.load_word_dict(yml_filepath).extract() == d.extract()
+    assert utils.load_word_dict(snapshot_filepath).extract() == d.extract()
+    for filepath in [yml_filepath, snapshot_filepath]:
+        compact_dict = utils.load_word_dict(filepath, compact=True)
+        assert isinstance(compact_dict, model.CompactWordDict)
+        assert compact_dict.extract() == d.extract()
+
+
+def test_dump_compact_word_dict(monkeypatch):
+    d = model.CompactWordDict({"root": {"A": {"words": ["é", "b"]}}})
+    calls = []
+    extract = model.CompactWordDict.extract
+
+    def counting_extract(self):
+        calls.append(self)
+        return extract(self)
+
+    monkeypatch.setattr(model.CompactWordDict, "extract", counting_extract)
+    ss = io.BytesIO()
+    snapshot.dump(d, ss)
+    assert len(calls) == 1
+
+    ss.seek(0, io.SEEK_SET)
+    assert snapshot.load(ss).extract() == {"root": {"A": {"words": ["é", "b"]}}}
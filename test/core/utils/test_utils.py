@@ -1,5 +1,9 @@
 from danoan.perchance_tools.core import model, utils
 
+import pytest
+
+import io
+
 
 def test_collect_key_path():
     d = {
@@ -12,8 +16,51 @@ def test_collect_key_path():
     }
     w = model.WordDict(d)
     L = list(utils.collect_key_path(w, "words"))
-    assert L[0]["path"] == ["root", "Category_A", "Category_B1"]
+    assert L[0]["path"] == ("root", "Category_A", "Category_B1")
     assert L[0]["words"] == ["word_a", "word_b", "word_c"]
 
-    assert L[1]["path"] == ["root", "Category_A", "Category_B2"]
+    assert L[1]["path"] == ("root", "Category_A", "Category_B2")
     assert L[1]["words"] == ["word_d", "word_e"]
+
+
+def test_collect_key_path_views():
+    d = {"root": {"A": {"words": ["a", "b"]}}}
+    w = model.WordDict(d)
+
+    (view,) = utils.collect_key_path(w, "words")
+    with pytest.raises(TypeError):
+        view["words"][0] = "c"
+    d["root"]["A"]["words"].append("c")
+    assert view["words"] == ["a", "b", "c"]
+
+    (copied,) = utils.collect_key_path(w, "words", deep_copy=True)
+    copied["words"].append("d")
+    copied["path"].append("B")
+    assert d == {"root": {"A": {"words": ["a", "b", "c"]}}}
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {
+            "root": {
+                "A": {"words": ["b", "a", "1", "yes", "null", "a: b", "x\ny", "é"]},
+                "B": {"C": {"words": []}, "n": 3, "l": [1, {"k": [None]}], "d": {}},
+            }
+        },
+        {},
+        ["not", "a", "mapping"],
+    ],
+)
+def test_compact_yml(tmp_path, data):
+    yml_filepath = tmp_path / "words.yml"
+    with open(yml_filepath, "w") as f:
+        utils.dump_yml(data, f)
+
+    word_dict = utils.load_word_dict(yml_filepath, compact=True)
+    assert isinstance(word_dict, model.CompactWordDict)
+    assert word_dict.extract() == data
+
+    output_stream = io.StringIO()
+    utils.dump_word_dict(word_dict, output_stream)
+    assert output_stream.getvalue() == yml_filepath.read_text()